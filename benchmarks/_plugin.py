@@ -0,0 +1,28 @@
+"""
+基准测试脚本的公共工具
+
+插件使用包内相对导入，基准测试脚本把仓库根目录注册为一个包后再导入其中的模块。
+需要在安装了 AstrBot 的环境中运行（插件模块依赖 astrbot.api）。
+"""
+
+import importlib
+import sys
+import types
+from pathlib import Path
+
+PACKAGE_NAME = "stand_plugin"
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_plugin_module(name: str):
+    """
+    导入插件中的模块
+
+    Args:
+        name: 相对于仓库根目录的模块名，如 "services.write_behind_storage"
+    """
+    if PACKAGE_NAME not in sys.modules:
+        package = types.ModuleType(PACKAGE_NAME)
+        package.__path__ = [str(ROOT)]
+        sys.modules[PACKAGE_NAME] = package
+    return importlib.import_module(f"{PACKAGE_NAME}.{name}")
@@ -0,0 +1,80 @@
+"""
+冷却表在大量不同用户下的内存与检查耗时
+
+用模拟时钟让 --users 个不同的用户按 --rate（每秒人数）依次使用 /随机替身，
+每处理完一段用户输出冷却表条目数、到期队列长度、进程内存峰值和平均每次检查的耗时。
+到期队列按时间清理冷却已结束的记录，条目数应稳定在 rate × cooldown 附近，
+内存峰值和检查耗时不随累计用户数增长。
+
+用法：
+    python benchmarks/bench_cooldown.py --users 5000000 --rate 200 --cooldown 300
+"""
+
+import argparse
+import resource
+import sys
+import time
+
+from _plugin import import_plugin_module
+
+cooldown_manager = import_plugin_module("utils.cooldown_manager")
+
+
+class SimulatedClock:
+    """替换冷却管理器模块中的 time，按用户到达速率推进时间"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def max_rss_mb() -> float:
+    """进程内存峰值（MB）"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为KB，macOS 为字节
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=5_000_000)
+    parser.add_argument("--rate", type=float, default=200, help="每秒使用的新用户数")
+    parser.add_argument("--cooldown", type=int, default=300)
+    parser.add_argument("--reports", type=int, default=10, help="输出的统计次数")
+    args = parser.parse_args()
+
+    clock = SimulatedClock()
+    cooldown_manager.time = clock
+    manager = cooldown_manager.CooldownManager(args.cooldown)
+    step = 1.0 / args.rate
+    block = max(1, args.users // args.reports)
+    check = manager.check_cooldown
+
+    print(f"稳态条目数约为 rate × cooldown = {args.rate * args.cooldown:.0f}")
+    print(
+        f"{'累计用户':>10} {'冷却表':>8} {'到期队列':>8} {'内存峰值MB':>10} {'ns/次':>8}"
+    )
+    user = 0
+    while user < args.users:
+        end = min(args.users, user + block)
+        start = time.perf_counter()
+        for index in range(user, end):
+            clock.now += step
+            check(str(index))
+        elapsed = time.perf_counter() - start
+        count = end - user
+        user = end
+        print(
+            f"{user:>10} {len(manager.user_cooldowns):>8} "
+            f"{len(manager._expiry_queue):>8} {max_rss_mb():>10.1f} "
+            f"{elapsed / count * 1e9:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+原子写入在不同落盘策略下的并发性能对比
+
+多个线程同时用 AtomicFileWriter 写入小JSON文件（与觉醒记录大小相近），
+分别统计 always / batched / never 三种落盘策略下的吞吐量和单次写入延迟。
+batched 策略由一个后台线程按 --sync-interval 定时调用 sync_pending()，与插件的定时任务一致。
+
+用法：
+    python benchmarks/bench_fsync_policy.py --threads 8 --writes 500
+"""
+
+import argparse
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from _plugin import import_plugin_module
+
+atomic_file = import_plugin_module("utils.atomic_file")
+
+RECORD = {
+    "version": 2,
+    "today": {"date": "2024-01-01", "count": 1, "last_awaken_time": "00:00:00"},
+    "history": {"2023-12-31": 2},
+    "archived_total": 10,
+}
+
+
+def run(policy: str, data_dir: Path, args) -> tuple:
+    """执行一轮写入，返回 (每秒写入数, p50延迟ms, p99延迟ms)"""
+    writer = atomic_file.AtomicFileWriter(policy)
+    latencies = [[] for _ in range(args.threads)]
+    stop = threading.Event()
+
+    def syncer() -> None:
+        while not stop.wait(args.sync_interval):
+            writer.sync_pending()
+
+    def worker(index: int) -> None:
+        for i in range(args.writes):
+            file_path = data_dir / f"user_{(index * args.writes + i) % args.files}.json"
+            start = time.perf_counter()
+            writer.write_json(file_path, RECORD)
+            latencies[index].append(time.perf_counter() - start)
+
+    sync_thread = threading.Thread(target=syncer)
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    start = time.perf_counter()
+    if policy == "batched":
+        sync_thread.start()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    stop.set()
+    if policy == "batched":
+        sync_thread.join()
+        # 最后一批待落盘的文件也计入耗时
+        writer.sync_pending()
+    elapsed = time.perf_counter() - start
+
+    samples = sorted(value for values in latencies for value in values)
+    p50 = samples[len(samples) // 2] * 1000
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+    return len(samples) / elapsed, p50, p99
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=500, help="每个线程的写入次数")
+    parser.add_argument("--files", type=int, default=1000, help="写入的不同文件数")
+    parser.add_argument("--sync-interval", type=float, default=1.0)
+    parser.add_argument(
+        "--dir", help="测试目录（默认系统临时目录，应与数据目录在同一磁盘）"
+    )
+    args = parser.parse_args()
+
+    for policy in atomic_file.AtomicFileWriter.POLICIES:
+        data_dir = Path(tempfile.mkdtemp(prefix="bench_fsync_", dir=args.dir))
+        try:
+            throughput, p50, p99 = run(policy, data_dir, args)
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        print(
+            f"{policy:8} threads={args.threads} {throughput:9.0f} writes/s "
+            f"p50={p50:.3f}ms p99={p99:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
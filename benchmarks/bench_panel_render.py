@@ -0,0 +1,106 @@
+"""
+本地面板渲染的单次耗时与多线程吞吐量
+
+对几种典型的面板请求（短名字、四行描述、高画布、缺少能力值）以及替身图鉴网格
+分别重复绘制 --rounds 次，输出 p50/p95 耗时和PNG大小；随后用 --threads 个线程
+通过 PanelService.render_local 并发绘制同一组请求，输出每秒面板数和 panel.render 指标，
+用于评估 render_max_concurrency 的取值。首次绘制包含字体加载，单独列出。
+
+用法：
+    python benchmarks/bench_panel_render.py --rounds 50 --threads 4
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _plugin import import_plugin_module
+
+api_service = import_plugin_module("services.api_service")
+panel_service = import_plugin_module("services.panel_service")
+panel_renderer = import_plugin_module("services.panel_renderer")
+stand_models = import_plugin_module("models.stand_models")
+
+PanelRequest = stand_models.PanelRequest
+GalleryEntry = stand_models.GalleryEntry
+
+REQUESTS = {
+    "短名字": PanelRequest(name="白金之星", ability="5,5,5,5,4,5"),
+    "四行描述": PanelRequest(
+        name="黄金体验镇魂曲",
+        ability="5,4,3,2,1,5",
+        desc="能够将任何行动的结果归零，" * 8,
+    ),
+    "高画布": PanelRequest(
+        name="世界", ability="5,5,5,3,4,5", desc="时间停止", h="1200"
+    ),
+    "缺少能力值": PanelRequest(name="替身"),
+}
+
+GALLERY = [
+    GalleryEntry(user_id=str(i), name=f"替身{i}", abilities="5,4,3,2,1,5")
+    for i in range(9)
+]
+
+
+def percentile(samples: list, q: float) -> float:
+    """返回已排序样本的分位数（ms）"""
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+
+def measure(func, rounds: int) -> tuple:
+    """重复执行 rounds 次，返回 (p50 ms, p95 ms, 最后一次的输出大小KB)"""
+    samples = []
+    data = b""
+    for _ in range(rounds):
+        start = time.perf_counter()
+        data = func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return percentile(samples, 0.5), percentile(samples, 0.95), len(data) / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50, help="每种请求的绘制次数")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--font", help="字体路径（默认自动查找系统中文字体）")
+    args = parser.parse_args()
+
+    renderer = panel_renderer.LocalPanelRenderer(args.font)
+    if not renderer.is_available():
+        raise SystemExit("未安装 Pillow，无法进行本地面板渲染")
+
+    start = time.perf_counter()
+    renderer.render(REQUESTS["短名字"])
+    print(f"首次绘制（含字体加载）: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    print(f"{'请求':<10} {'p50 ms':>8} {'p95 ms':>8} {'PNG KB':>8}")
+    for label, request in REQUESTS.items():
+        p50, p95, size = measure(lambda: renderer.render(request), args.rounds)
+        print(f"{label:<10} {p50:>8.1f} {p95:>8.1f} {size:>8.1f}")
+    p50, p95, size = measure(
+        lambda: renderer.render_grid("替身图鉴", GALLERY), max(1, args.rounds // 5)
+    )
+    print(f"{'图鉴网格':<10} {p50:>8.1f} {p95:>8.1f} {size:>8.1f}")
+
+    service = panel_service.PanelService(
+        api_service.StandAPIService("http://localhost"), "local", renderer
+    )
+    requests = list(REQUESTS.values()) * args.rounds
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        # 字体按线程缓存，先让每个线程各绘制一次，不计入 panel.render 指标
+        list(pool.map(renderer.render, requests[: args.threads * 2]))
+        start = time.perf_counter()
+        list(pool.map(service.render_local, requests))
+        elapsed = time.perf_counter() - start
+    snapshot = service.metrics.snapshot()
+    print(
+        f"threads={args.threads} {len(requests) / elapsed:8.1f} panels/s "
+        f"panel.render avg={snapshot['panel.render.avg_ms']}ms "
+        f"max={snapshot['panel.render.max_ms']}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
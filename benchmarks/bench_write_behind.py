@@ -0,0 +1,83 @@
+"""
+延迟写入（write-behind）与直接写入（write-through）的吞吐量对比
+
+多个线程模拟 I/O 线程池，对大量用户执行觉醒次数消耗（consume_awaken），
+分别统计直接写入存储引擎和经过 WriteBehindStorage 时每秒完成的操作数。
+
+用法：
+    python benchmarks/bench_write_behind.py --engine sqlite --threads 8 --ops 20000
+"""
+
+import argparse
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from _plugin import import_plugin_module
+
+stand_storage = import_plugin_module("services.stand_storage")
+write_behind_storage = import_plugin_module("services.write_behind_storage")
+
+
+def create_storage(engine: str, data_dir: Path, fsync_policy: str):
+    """创建底层存储引擎"""
+    if engine == "json":
+        return stand_storage.JsonStandStorage(data_dir, fsync_policy=fsync_policy)
+    return stand_storage.SQLiteStandStorage(
+        data_dir / "stands.db", fsync_policy=fsync_policy
+    )
+
+
+def run(storage, threads: int, ops: int, users: int) -> float:
+    """多线程执行 ops 次觉醒消耗，返回每秒操作数"""
+    per_thread = ops // threads
+
+    def worker(index: int) -> None:
+        for i in range(per_thread):
+            user_id = str((index * per_thread + i) % users)
+            storage.consume_awaken(user_id, "2024-01-01", "2024-01-01 00:00:00", -1)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    if isinstance(storage, write_behind_storage.WriteBehindStorage):
+        # 计入最后一次刷新，结果才能和直接写入比较
+        storage.flush()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--engine", choices=("json", "sqlite"), default="sqlite")
+    parser.add_argument("--fsync-policy", default="batched")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--max-pending", type=int, default=500)
+    args = parser.parse_args()
+
+    for mode in ("write-through", "write-behind"):
+        data_dir = Path(tempfile.mkdtemp(prefix="bench_write_behind_"))
+        try:
+            storage = create_storage(args.engine, data_dir, args.fsync_policy)
+            if mode == "write-behind":
+                storage = write_behind_storage.WriteBehindStorage(
+                    storage, args.max_pending
+                )
+            throughput = run(storage, args.threads, args.ops, args.users)
+            storage.close()
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        print(
+            f"{args.engine:6} {mode:13} threads={args.threads} "
+            f"{throughput:10.0f} ops/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+"""
+管理员指令处理器
+"""
+
+from astrbot.api.event import AstrMessageEvent
+import astrbot.api.message_components as Comp
+
+from .base_handler import BaseStandHandler
+from ..resources import UITexts
+
+
+class AdminHandler(BaseStandHandler):
+    """管理员指令处理器"""
+
+    async def handle_metrics(self, event: AstrMessageEvent):
+        """处理替身统计指令，输出插件运行指标"""
+        metrics = self.service_container.get_metrics()
+        report = UITexts.METRICS_REPORT.format(metrics=metrics.format_text())
+        yield event.chain_result([Comp.Plain(report)])
@@ -6,15 +6,19 @@ import datetime
 from astrbot.api.event import AstrMessageEvent
 import astrbot.api.message_components as Comp
 
-from .base_handler import BaseStandHandler
+from .base_handler import BaseStandHandler, rate_limited, single_flight
 from ..utils.ability_utils import AbilityUtils
 from ..utils.ability_display_utils import AbilityDisplayUtils
+from ..models.stand_models import PanelRequest
 from ..resources import UITexts
+from ..services.render_queue import RenderQueueFullError
 
 
 class AwakenStandHandler(BaseStandHandler):
     """觉醒替身指令处理器"""
 
+    @single_flight("觉醒替身")
+    @rate_limited("觉醒替身")
     async def handle_awaken_stand(self, event: AstrMessageEvent):
         """处理觉醒替身指令"""
         if not self.check_group_permission(event):
@@ -28,7 +32,7 @@ class AwakenStandHandler(BaseStandHandler):
         user_id = event.get_sender_id()
 
         # 检查用户是否已经有替身
-        existing_stand = self.data_service.get_user_stand(user_id)
+        existing_stand = await self.data_service.aget_user_stand(user_id)
         if existing_stand is not None:
             # 用户已有替身，引导到重新觉醒
             yield event.chain_result([Comp.Plain(UITexts.AWAKEN_STAND_EXISTS)])
@@ -38,6 +42,8 @@ class AwakenStandHandler(BaseStandHandler):
         async for result in self._perform_awaken(event, user_id, is_reawaken=False):
             yield result
 
+    @single_flight("重新觉醒")
+    @rate_limited("重新觉醒")
     async def handle_reawaken_stand(self, event: AstrMessageEvent):
         """处理重新觉醒替身指令"""
         if not self.check_group_permission(event):
@@ -51,7 +57,7 @@ class AwakenStandHandler(BaseStandHandler):
         user_id = event.get_sender_id()
 
         # 检查用户是否有现有替身
-        existing_stand = self.data_service.get_user_stand(user_id)
+        existing_stand = await self.data_service.aget_user_stand(user_id)
         if existing_stand is None:
             # 用户没有替身，直接引导到觉醒替身
             yield event.chain_result([Comp.Plain(UITexts.REAWAKEN_STAND_NO_EXISTING)])
@@ -61,6 +67,123 @@ class AwakenStandHandler(BaseStandHandler):
         async for result in self._perform_awaken(event, user_id, is_reawaken=True):
             yield result
 
+    @single_flight("十连觉醒")
+    @rate_limited("十连觉醒")
+    async def handle_batch_awaken(self, event: AstrMessageEvent):
+        """处理十连觉醒指令：/十连觉醒 [数量]"""
+        if not self.check_group_permission(event):
+            return
+
+        # 检查觉醒系统和十连觉醒是否启用
+        if not self.config_manager.is_awaken_system_enabled():
+            yield event.chain_result([Comp.Plain(UITexts.AWAKEN_SYSTEM_DISABLED)])
+            return
+        max_amount = self.config_manager.get_batch_awaken_max()
+        if max_amount <= 0:
+            yield event.chain_result([Comp.Plain(UITexts.BATCH_AWAKEN_DISABLED)])
+            return
+
+        # 解析命令参数：默认数量为今日剩余的全部次数（不超过单次上限）
+        user_id = event.get_sender_id()
+        daily_limit = self.config_manager.get_daily_awaken_limit()
+        remaining = max_amount
+        if daily_limit > 0:
+            used = await self.data_service.aget_today_awaken_count(user_id)
+            remaining = daily_limit - used
+        # 次数已用完时仍按1次处理，由扣除次数时回复次数已用完的提示
+        default_amount = max(1, min(max_amount, remaining))
+        message_parts = event.message_str.strip().split()
+        amount = default_amount
+        if len(message_parts) > 1:
+            try:
+                amount = int(message_parts[1])
+            except ValueError:
+                amount = 0
+        if not 1 <= amount <= max_amount:
+            help_text = UITexts.BATCH_AWAKEN_HELP.format(
+                default=default_amount, max_amount=max_amount
+            )
+            yield event.chain_result([Comp.Plain(help_text)])
+            return
+
+        # 一次存储操作整体扣除 amount 次觉醒次数，次数不足时一次也不扣除
+        candidates, current_awaken_count, limit_message = (
+            await self.batch_awaken_service.awaken(user_id, amount, daily_limit)
+        )
+        if candidates is None:
+            yield event.chain_result([Comp.Plain(limit_message)])
+            return
+
+        candidate_lines = "\n".join(
+            UITexts.BATCH_AWAKEN_CANDIDATE.format(
+                index=index,
+                stand_name=candidate.name,
+                abilities=AbilityUtils.convert_abilities_to_letters(
+                    candidate.abilities
+                ),
+            )
+            for index, candidate in enumerate(candidates, 1)
+        )
+        response_text = UITexts.BATCH_AWAKEN_RESULT.format(
+            amount=amount,
+            candidates=candidate_lines,
+            ttl_minutes=int(self.batch_awaken_service.candidate_ttl // 60),
+            limit_hint=self._get_awaken_limit_hint(daily_limit, current_awaken_count),
+        )
+
+        image = None
+        try:
+            image = await self.batch_awaken_service.render_candidates(
+                user_id, "十连觉醒", candidates
+            )
+        except RenderQueueFullError:
+            # 面板生成繁忙，不排队等待，只回复文字
+            response_text = f"{response_text}\n\n{UITexts.PANEL_BUSY}"
+
+        chain = [Comp.Plain(response_text)]
+        if image is not None:
+            chain.append(self._to_image_component(image))
+        yield event.chain_result(chain)
+
+    @single_flight("选择替身")
+    @rate_limited("选择替身")
+    async def handle_choose_stand(self, event: AstrMessageEvent):
+        """处理选择替身指令：/选择替身 <序号>"""
+        if not self.check_group_permission(event):
+            return
+
+        message_parts = event.message_str.strip().split()
+        if len(message_parts) < 2 or not message_parts[1].isdigit():
+            yield event.chain_result([Comp.Plain(UITexts.CHOOSE_STAND_HELP)])
+            return
+
+        user_id = event.get_sender_id()
+        if not await self.batch_awaken_service.has_pending(user_id):
+            yield event.chain_result([Comp.Plain(UITexts.CHOOSE_STAND_NO_CANDIDATES)])
+            return
+
+        candidate = await self.batch_awaken_service.choose(
+            user_id, int(message_parts[1])
+        )
+        if candidate is None:
+            yield event.chain_result([Comp.Plain(UITexts.CHOOSE_STAND_INVALID_INDEX)])
+            return
+
+        # 替身面板绘制请求
+        panel = PanelRequest(name=candidate.name, ability=candidate.abilities)
+        ability_letters = AbilityUtils.convert_abilities_to_letters(candidate.abilities)
+        formatted_abilities = AbilityDisplayUtils.format_abilities_compact(
+            ability_letters
+        )
+        response_text = UITexts.CHOOSE_STAND_SUCCESS.format(
+            stand_name=candidate.name, abilities=formatted_abilities
+        )
+
+        async for result in self.send_response(
+            event, response_text, panel=panel, command="选择替身"
+        ):
+            yield result
+
     async def _perform_awaken(
         self, event: AstrMessageEvent, user_id: str, is_reawaken: bool = False
     ):
@@ -72,10 +195,10 @@ class AwakenStandHandler(BaseStandHandler):
             user_id: 用户ID
             is_reawaken: 是否为重新觉醒
         """
-        # 检查觉醒次数限制（使用配置的限制次数）
+        # 检查并消耗一次觉醒次数（使用配置的限制次数），一次读写完成
         daily_limit = self.config_manager.get_daily_awaken_limit()
-        can_awaken, limit_message = self.data_service.check_awaken_limit(
-            user_id, daily_limit
+        can_awaken, current_awaken_count, _, limit_message = (
+            await self.data_service.atry_consume_awaken(user_id, daily_limit)
         )
         if not can_awaken:
             yield event.chain_result([Comp.Plain(limit_message)])
@@ -86,17 +209,12 @@ class AwakenStandHandler(BaseStandHandler):
         random_name = self.stand_name_generator.generate_random_stand_name()
 
         # 保存新的替身数据（覆盖原有的）
-        self.data_service.save_user_stand(
+        await self.data_service.asave_user_stand(
             user_id, random_abilities, random_name, "awaken"
         )
 
-        # 记录觉醒次数
-        self.data_service.save_awaken_record(user_id)
-
-        # 生成替身面板URL
-        image_url = self.api_service.get_image_url(
-            name=random_name, ability=random_abilities
-        )
+        # 替身面板绘制请求
+        panel = PanelRequest(name=random_name, ability=random_abilities)
 
         # 构建回复消息
         ability_letters = AbilityUtils.convert_abilities_to_letters(random_abilities)
@@ -104,9 +222,7 @@ class AwakenStandHandler(BaseStandHandler):
             ability_letters
         )
 
-        # 根据配置生成觉醒次数提示
-        # 获取用户今日已使用的觉醒次数（包括当前这次）
-        current_awaken_count = self.data_service.get_today_awaken_count(user_id)
+        # 根据配置生成觉醒次数提示（current_awaken_count 已包括当前这次）
         limit_hint = self._get_awaken_limit_hint(daily_limit, current_awaken_count)
 
         # 公共的格式化信息
@@ -127,7 +243,10 @@ class AwakenStandHandler(BaseStandHandler):
                 limit_hint=limit_hint,
             )
 
-        async for result in self.send_response(event, response_text, image_url):
+        command = "重新觉醒" if is_reawaken else "觉醒替身"
+        async for result in self.send_response(
+            event, response_text, panel=panel, command=command
+        ):
             yield result
 
     def _get_awaken_limit_hint(self, daily_limit: int, current_count: int = 0) -> str:
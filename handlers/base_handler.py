@@ -2,17 +2,81 @@
 基础指令处理器，提供通用的指令处理逻辑
 """
 
-from typing import Optional
+import asyncio
+import functools
+from typing import Optional, Tuple
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api.platform import MessageType
 from astrbot.api import logger
 import astrbot.api.message_components as Comp
 
+from ..models.stand_models import PanelImage, PanelRequest
 from ..resources import UITexts
+from ..services.render_queue import RenderQueueFullError
 
 from ..utils.service_container import ServiceContainer
 
 
+def single_flight(command: str):
+    """
+    重复指令拦截装饰器，用于处理器的指令方法
+
+    同一用户在上一次执行尚未结束时重复发送的相同指令（指令名和参数都相同）直接丢弃，
+    根据配置回复一条简短提示或静默忽略；上一次执行结束后再发送会正常执行。
+
+    Args:
+        command: 指令名称
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, event: AstrMessageEvent):
+            key = (command, event.get_sender_id(), event.message_str.strip())
+            if not self.single_flight.try_acquire(command, key):
+                if self.config_manager.is_duplicate_command_notice_enabled():
+                    yield event.chain_result([Comp.Plain(UITexts.DUPLICATE_COMMAND)])
+                return
+
+            try:
+                async for result in func(self, event):
+                    yield result
+            finally:
+                self.single_flight.release(key)
+
+        return wrapper
+
+    return decorator
+
+
+def rate_limited(command: str):
+    """
+    指令限流装饰器，用于处理器的指令方法（放在 single_flight 之下，被丢弃的重复指令不计数）
+
+    记录用户活跃后按配置的限流规则检查使用频率，超出限制时只回复等待提示，
+    不读写数据也不生成面板。没有为该指令配置限流规则时直接执行。
+
+    Args:
+        command: 指令名称
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, event: AstrMessageEvent):
+            if self.is_group_allowed(event):
+                self.record_activity(event)
+            wait_message = self.check_rate_limit(command, event)
+            if wait_message:
+                yield event.chain_result([Comp.Plain(wait_message)])
+                return
+
+            async for result in func(self, event):
+                yield result
+
+        return wrapper
+
+    return decorator
+
+
 class BaseStandHandler:
     """替身指令处理器基类"""
 
@@ -28,11 +92,19 @@ class BaseStandHandler:
         # 从服务容器获取所有依赖
         self.data_service = service_container.get_data_service()
         self.api_service = service_container.get_api_service()
+        self.panel_service = service_container.get_panel_service()
         self.cooldown_manager = service_container.get_cooldown_manager()
         self.group_white_list = service_container.get_group_white_list()
         self.timezone = service_container.get_timezone()
         self.stand_name_generator = service_container.get_stand_name_generator()
         self.config_manager = service_container.get_config_manager()
+        self.single_flight = service_container.get_single_flight()
+        self.rate_limiter = service_container.get_rate_limiter()
+        self.metrics = service_container.get_metrics()
+        self.activity_tracker = service_container.get_activity_tracker()
+        self.today_stand_service = service_container.get_today_stand_service()
+        self.gallery_service = service_container.get_gallery_service()
+        self.batch_awaken_service = service_container.get_batch_awaken_service()
 
     def check_group_permission(self, event: AstrMessageEvent) -> bool:
         """
@@ -44,20 +116,75 @@ class BaseStandHandler:
         Returns:
             bool: 是否有权限
         """
+        if not self.is_group_allowed(event):
+            logger.info(
+                UITexts.GROUP_NOT_IN_WHITELIST.format(group_id=event.get_group_id())
+            )
+            return False
+        return True
+
+    def is_group_allowed(self, event: AstrMessageEvent) -> bool:
+        """
+        判断消息所在群聊是否允许使用插件（不记录日志）
+
+        Args:
+            event: 消息事件
+
+        Returns:
+            bool: 是否允许
+        """
         # 如果白名单功能被禁用，则允许所有群聊使用
         if not self.config_manager.is_whitelist_enabled():
             return True
 
         if event.get_message_type() == MessageType.GROUP_MESSAGE:
-            if event.get_group_id() not in self.group_white_list:
-                logger.info(
-                    UITexts.GROUP_NOT_IN_WHITELIST.format(group_id=event.get_group_id())
-                )
-                return False
+            return event.get_group_id() in self.group_white_list
         return True
 
+    def record_activity(self, event: AstrMessageEvent) -> None:
+        """
+        记录用户活跃（用于今日替身预计算等功能）
+
+        Args:
+            event: 消息事件
+        """
+        group_id = None
+        if event.get_message_type() == MessageType.GROUP_MESSAGE:
+            group_id = event.get_group_id()
+        self.activity_tracker.touch(
+            event.get_sender_id(), event.get_sender_name(), group_id
+        )
+
+    def check_rate_limit(self, command: str, event: AstrMessageEvent) -> Optional[str]:
+        """
+        检查指令使用频率（不在白名单中的群聊不计数，由指令自身的权限检查处理）
+
+        Args:
+            command: 指令名称
+            event: 消息事件
+
+        Returns:
+            Optional[str]: 超出限制时返回等待提示，否则返回None
+        """
+        if not self.is_group_allowed(event):
+            return None
+        group_id = None
+        if event.get_message_type() == MessageType.GROUP_MESSAGE:
+            group_id = event.get_group_id()
+        allowed, remaining, by_group = self.rate_limiter.check(
+            command, event.get_sender_id(), group_id
+        )
+        if allowed:
+            return None
+        return self.rate_limiter.format_wait_message(command, remaining, by_group)
+
     async def send_response(
-        self, event: AstrMessageEvent, text: str, image_url: Optional[str] = None
+        self,
+        event: AstrMessageEvent,
+        text: str,
+        image_url: Optional[str] = None,
+        panel: Optional[PanelRequest] = None,
+        command: Optional[str] = None,
     ):
         """
         发送响应消息
@@ -66,9 +193,80 @@ class BaseStandHandler:
             event: 消息事件
             text: 文本消息
             image_url: 图片URL（可选）
+            panel: 替身面板绘制请求（可选），按配置的面板生成方式生成图片
+            command: 指令名称（可选），用于判断是否对该指令启用渐进式发送
         """
+        if (
+            panel is not None
+            and command in self.config_manager.get_progressive_commands()
+        ):
+            async for result in self._send_progressive(event, text, panel):
+                yield result
+            return
+
+        image = None
+        if panel is not None:
+            image, notice = await self._resolve_panel(panel)
+            if notice:
+                text = f"{text}\n\n{notice}"
+
         chain = []
         chain.append(Comp.Plain(text))
-        if image_url:
+        if image is not None:
+            chain.append(self._to_image_component(image))
+        elif image_url:
             chain.append(Comp.Image.fromURL(image_url))
         yield event.chain_result(chain)
+
+    async def _send_progressive(
+        self, event: AstrMessageEvent, text: str, panel: PanelRequest
+    ):
+        """
+        渐进式发送：先立即发送文字，面板图片生成后再单独发送
+
+        超过期限仍未生成的图片不再发送，改为发送一条提示。
+        """
+        yield event.chain_result([Comp.Plain(text)])
+
+        deadline = self.config_manager.get_progressive_deadline()
+        try:
+            image, notice = await asyncio.wait_for(
+                self._resolve_panel(panel), timeout=deadline
+            )
+        except asyncio.TimeoutError:
+            # 被取消的只是等待，面板仍会在后台生成并写入缓存
+            self.metrics.inc("panel.progressive_timeouts")
+            image, notice = None, UITexts.PANEL_TIMEOUT
+
+        if image is not None:
+            yield event.chain_result([self._to_image_component(image)])
+        elif notice:
+            yield event.chain_result([Comp.Plain(notice)])
+
+    async def _resolve_panel(
+        self, panel: PanelRequest
+    ) -> Tuple[Optional[PanelImage], Optional[str]]:
+        """
+        生成面板图片
+
+        Returns:
+            Tuple[Optional[PanelImage], Optional[str]]: (面板图片, 无法生成图片时的提示)
+        """
+        try:
+            image = await self.panel_service.get_panel(panel)
+        except RenderQueueFullError:
+            # 面板生成繁忙，不排队等待，只回复文字
+            return None, UITexts.PANEL_BUSY
+        if image is None:
+            # 面板服务暂时不可用，只回复文字
+            return None, UITexts.PANEL_UNAVAILABLE
+        return image, None
+
+    @staticmethod
+    def _to_image_component(image: PanelImage) -> Comp.Image:
+        """将面板图片转换为消息组件"""
+        if image.path:
+            return Comp.Image.fromFileSystem(image.path)
+        if image.data is not None:
+            return Comp.Image.fromBytes(image.data)
+        return Comp.Image.fromURL(image.url)
@@ -7,15 +7,18 @@
 from astrbot.api.event import AstrMessageEvent
 import astrbot.api.message_components as Comp
 
-from .base_handler import BaseStandHandler
+from .base_handler import BaseStandHandler, rate_limited, single_flight
 from ..utils.ability_utils import AbilityUtils
 from ..utils.ability_display_utils import AbilityDisplayUtils
+from ..models.stand_models import PanelRequest
 from ..resources import UITexts
 
 
 class CustomStandHandler(BaseStandHandler):
     """自定义替身指令处理器"""
 
+    @single_flight("替身面板")
+    @rate_limited("替身面板")
     async def handle_create_stand(self, event: AstrMessageEvent):
         """处理创建替身指令"""
         if not self.check_group_permission(event):
@@ -66,8 +69,8 @@ class CustomStandHandler(BaseStandHandler):
         else:
             display_name = custom_name
 
-        # 生成替身面板URL，包含新的desc和h参数
-        image_url = self.api_service.get_image_url(
+        # 替身面板绘制请求，包含desc和h参数
+        panel = PanelRequest(
             name=display_name, ability=ability_str, desc=desc, h=h
         )
 
@@ -87,5 +90,7 @@ class CustomStandHandler(BaseStandHandler):
                 abilities=formatted_abilities
             )
 
-        async for result in self.send_response(event, response_text, image_url):
+        async for result in self.send_response(
+            event, response_text, panel=panel, command="替身面板"
+        ):
             yield result
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+替身图鉴指令处理器
+"""
+
+from astrbot.api.event import AstrMessageEvent
+from astrbot.api.platform import MessageType
+import astrbot.api.message_components as Comp
+
+from .base_handler import BaseStandHandler, rate_limited, single_flight
+from ..resources import UITexts
+from ..services.render_queue import RenderQueueFullError
+from ..utils.ability_utils import AbilityUtils
+
+
+class GalleryHandler(BaseStandHandler):
+    """替身图鉴指令处理器"""
+
+    @single_flight("替身图鉴")
+    @rate_limited("替身图鉴")
+    async def handle_gallery(self, event: AstrMessageEvent):
+        """处理替身图鉴指令：/替身图鉴 [游标]"""
+        if not self.check_group_permission(event):
+            return
+
+        if event.get_message_type() != MessageType.GROUP_MESSAGE:
+            yield event.chain_result([Comp.Plain(UITexts.GALLERY_GROUP_ONLY)])
+            return
+
+        # 解析命令参数（游标为上一页最后一位成员的用户ID）
+        message_parts = event.message_str.strip().split()
+        cursor = message_parts[1] if len(message_parts) > 1 else None
+
+        page = await self.gallery_service.get_page(event.get_group_id(), cursor)
+        if not page.entries:
+            if cursor is None:
+                yield event.chain_result([Comp.Plain(UITexts.GALLERY_EMPTY)])
+                return
+            text = UITexts.GALLERY_PAGE_EMPTY
+        else:
+            entries = "\n".join(
+                UITexts.GALLERY_ENTRY.format(
+                    index=index,
+                    name=entry.name,
+                    abilities=AbilityUtils.convert_abilities_to_letters(
+                        entry.abilities
+                    ),
+                )
+                for index, entry in enumerate(page.entries, 1)
+            )
+            text = UITexts.GALLERY_RESULT.format(entries=entries)
+
+        if page.next_cursor:
+            text += UITexts.GALLERY_NEXT_PAGE.format(cursor=page.next_cursor)
+        else:
+            text += UITexts.GALLERY_LAST_PAGE
+
+        image = None
+        if page.entries:
+            try:
+                image = await self.gallery_service.render_page(
+                    UITexts.GALLERY_TITLE, page
+                )
+            except RenderQueueFullError:
+                # 面板生成繁忙，不排队等待，只回复文字
+                text = f"{text}\n\n{UITexts.PANEL_BUSY}"
+
+        chain = [Comp.Plain(text)]
+        if image is not None:
+            chain.append(self._to_image_component(image))
+        yield event.chain_result(chain)
@@ -2,20 +2,22 @@
 随机替身指令处理器
 """
 
-import datetime
-import random
 from astrbot.api.event import AstrMessageEvent
+from astrbot.api.platform import MessageType
 import astrbot.api.message_components as Comp
 
-from .base_handler import BaseStandHandler
+from .base_handler import BaseStandHandler, rate_limited, single_flight
 from ..utils.ability_utils import AbilityUtils
 from ..utils.ability_display_utils import AbilityDisplayUtils
+from ..models.stand_models import PanelRequest
 from ..resources import UITexts
 
 
 class RandomStandHandler(BaseStandHandler):
     """随机替身指令处理器"""
 
+    @single_flight("随机替身")
+    @rate_limited("随机替身")
     async def handle_random_stand(self, event: AstrMessageEvent):
         """处理随机替身指令"""
         if not self.check_group_permission(event):
@@ -24,12 +26,18 @@ class RandomStandHandler(BaseStandHandler):
         user_id = event.get_sender_id()
         user_name = event.get_sender_name()
 
-        # 检查冷却时间
-        can_proceed, remaining_cooldown = self.cooldown_manager.check_cooldown(user_id)
+        # 检查冷却时间（自适应冷却按所在群的使用频率调整）
+        group_id = None
+        if event.get_message_type() == MessageType.GROUP_MESSAGE:
+            group_id = event.get_group_id()
+        can_proceed, remaining_cooldown = await self.cooldown_manager.acheck_cooldown(
+            user_id, group_id
+        )
         if not can_proceed:
             cooldown_message = UITexts.RANDOM_STAND_COOLDOWN.format(
                 cooldown_info=self.cooldown_manager.format_cooldown_message(
-                    remaining_cooldown
+                    remaining_cooldown,
+                    self.cooldown_manager.effective_cooldown(group_id),
                 )
             )
             yield event.chain_result([Comp.Plain(cooldown_message)])
@@ -38,8 +46,8 @@ class RandomStandHandler(BaseStandHandler):
         # 生成随机能力值
         ability_str = AbilityUtils.generate_random_abilities()
 
-        # 生成图片
-        image_url = self.api_service.get_image_url(name=user_name, ability=ability_str)
+        # 替身面板绘制请求
+        panel = PanelRequest(name=user_name, ability=ability_str)
 
         # 格式化能力值显示
         ability_letters = AbilityUtils.convert_abilities_to_letters(ability_str)
@@ -51,9 +59,13 @@ class RandomStandHandler(BaseStandHandler):
             abilities=formatted_abilities
         )
 
-        async for result in self.send_response(event, response_text, image_url):
+        async for result in self.send_response(
+            event, response_text, panel=panel, command="随机替身"
+        ):
             yield result
 
+    @single_flight("今日替身")
+    @rate_limited("今日替身")
     async def handle_today_stand(self, event: AstrMessageEvent):
         """处理今日替身指令"""
         if not self.check_group_permission(event):
@@ -61,22 +73,16 @@ class RandomStandHandler(BaseStandHandler):
 
         user_id = event.get_sender_id()
         user_name = event.get_sender_name()
-        current_date = datetime.datetime.now(self.timezone).strftime("%Y%m%d")
-        seed = f"{user_id}{current_date}"
-        person_random = random.Random(seed)
-
-        # 生成基于种子的随机能力值
-        ability_arr = [str(person_random.randint(1, 5)) for _ in range(6)]
-        ability_str = ",".join(ability_arr)
 
-        # 格式化能力值显示
-        ability_letters = AbilityUtils.convert_abilities_to_letters(ability_str)
-        formatted_abilities = AbilityDisplayUtils.format_abilities_compact(
-            ability_letters
+        # 今日替身由用户ID和日期决定，通常已在零点后预计算
+        ability_str, formatted_abilities = self.today_stand_service.get_today_stand(
+            user_id
         )
 
-        image_url = self.api_service.get_image_url(name=user_name, ability=ability_str)
+        panel = PanelRequest(name=user_name, ability=ability_str)
         response_text = UITexts.TODAY_STAND_RESULT.format(abilities=formatted_abilities)
 
-        async for result in self.send_response(event, response_text, image_url):
+        async for result in self.send_response(
+            event, response_text, panel=panel, command="今日替身"
+        ):
             yield result
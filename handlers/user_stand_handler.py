@@ -6,16 +6,19 @@ from typing import Optional, Tuple
 from astrbot.api.event import AstrMessageEvent
 import astrbot.api.message_components as Comp
 
-from .base_handler import BaseStandHandler
+from .base_handler import BaseStandHandler, rate_limited, single_flight
 from ..utils.ability_utils import AbilityUtils
 from ..utils.ability_display_utils import AbilityDisplayUtils
 from ..utils.acquisition_method_utils import AcquisitionMethodUtils
+from ..models.stand_models import PanelRequest
 from ..resources import UITexts
 
 
 class UserStandHandler(BaseStandHandler):
     """用户替身管理指令处理器"""
 
+    @single_flight("设置替身")
+    @rate_limited("设置替身")
     async def handle_set_stand(self, event: AstrMessageEvent):
         """处理设置替身指令"""
         if not self.check_group_permission(event):
@@ -46,7 +49,9 @@ class UserStandHandler(BaseStandHandler):
 
         # 保存用户替身数据
         user_id = event.get_sender_id()
-        self.data_service.save_user_stand(user_id, ability_str, custom_name, "manual")
+        await self.data_service.asave_user_stand(
+            user_id, ability_str, custom_name, "manual"
+        )
 
         # 构建确认消息
         ability_display = abilities_input.upper()
@@ -61,6 +66,8 @@ class UserStandHandler(BaseStandHandler):
 
         yield event.chain_result([Comp.Plain(success_text)])
 
+    @single_flight("我的替身")
+    @rate_limited("我的替身")
     async def handle_my_stand(self, event: AstrMessageEvent):
         """处理我的替身指令"""
         if not self.check_group_permission(event):
@@ -70,7 +77,7 @@ class UserStandHandler(BaseStandHandler):
         user_name = event.get_sender_name()
 
         # 获取用户替身数据
-        stand_data = self.data_service.get_user_stand(user_id)
+        stand_data = await self.data_service.aget_user_stand(user_id)
 
         if stand_data is None:
             # 用户还没有设置替身
@@ -83,10 +90,8 @@ class UserStandHandler(BaseStandHandler):
         else:
             display_name = user_name
 
-        # 生成替身面板URL
-        image_url = self.api_service.get_image_url(
-            name=display_name, ability=stand_data.abilities
-        )
+        # 替身面板绘制请求
+        panel = PanelRequest(name=display_name, ability=stand_data.abilities)
 
         # 将数字能力值转换回字母显示
         ability_letters = AbilityUtils.convert_abilities_to_letters(
@@ -118,7 +123,9 @@ class UserStandHandler(BaseStandHandler):
                 created_at=stand_data.created_at,
             )
 
-        async for result in self.send_response(event, response_text, image_url):
+        async for result in self.send_response(
+            event, response_text, panel=panel, command="我的替身"
+        ):
             yield result
 
     def _parse_target_user(
@@ -161,6 +168,8 @@ class UserStandHandler(BaseStandHandler):
 
         return target_user_id, target_user_name
 
+    @single_flight("他的替身")
+    @rate_limited("他的替身")
     async def handle_view_stand(self, event: AstrMessageEvent):
         """处理查看他人替身指令"""
         if not self.check_group_permission(event):
@@ -180,7 +189,7 @@ class UserStandHandler(BaseStandHandler):
             return
 
         # 获取目标用户的替身数据
-        stand_data = self.data_service.get_user_stand(target_user_id)
+        stand_data = await self.data_service.aget_user_stand(target_user_id)
 
         if stand_data is None:
             # 目标用户还没有设置替身
@@ -196,10 +205,8 @@ class UserStandHandler(BaseStandHandler):
         else:
             display_name = target_user_name
 
-        # 生成替身面板URL
-        image_url = self.api_service.get_image_url(
-            name=display_name, ability=stand_data.abilities
-        )
+        # 替身面板绘制请求
+        panel = PanelRequest(name=display_name, ability=stand_data.abilities)
 
         # 将数字能力值转换回字母显示
         ability_letters = AbilityUtils.convert_abilities_to_letters(
@@ -233,5 +240,7 @@ class UserStandHandler(BaseStandHandler):
                 created_at=stand_data.created_at,
             )
 
-        async for result in self.send_response(event, response_text, image_url):
+        async for result in self.send_response(
+            event, response_text, panel=panel, command="他的替身"
+        ):
             yield result
@@ -12,6 +12,8 @@ from .handlers.random_stand_handler import RandomStandHandler
 from .handlers.custom_stand_handler import CustomStandHandler
 from .handlers.user_stand_handler import UserStandHandler
 from .handlers.awaken_stand_handler import AwakenStandHandler
+from .handlers.gallery_handler import GalleryHandler
+from .handlers.admin_handler import AdminHandler
 
 
 class MyPlugin(Star):
@@ -46,9 +48,14 @@ class MyPlugin(Star):
         self.custom_handler = CustomStandHandler(self.service_container)
         self.user_handler = UserStandHandler(self.service_container)
         self.awaken_handler = AwakenStandHandler(self.service_container)
+        self.gallery_handler = GalleryHandler(self.service_container)
+        self.admin_handler = AdminHandler(self.service_container)
 
     async def initialize(self):
         """插件初始化方法"""
+        # 创建面板API的共享长连接池
+        await self.service_container.start()
+        self.service_container.start_background_tasks()
         # 插件初始化完成
         logger.info("🎆 JOJO替身面板插件初始化完成")
 
@@ -102,6 +109,31 @@ class MyPlugin(Star):
         async for result in self.awaken_handler.handle_reawaken_stand(event):
             yield result
 
+    @filter.command("十连觉醒")
+    async def batch_awaken_stand(self, event: AstrMessageEvent):
+        """十连觉醒指令"""
+        async for result in self.awaken_handler.handle_batch_awaken(event):
+            yield result
+
+    @filter.command("选择替身")
+    async def choose_stand(self, event: AstrMessageEvent):
+        """选择十连觉醒候选替身指令"""
+        async for result in self.awaken_handler.handle_choose_stand(event):
+            yield result
+
+    @filter.command("替身图鉴")
+    async def stand_gallery(self, event: AstrMessageEvent):
+        """群替身图鉴指令"""
+        async for result in self.gallery_handler.handle_gallery(event):
+            yield result
+
+    @filter.permission_type(filter.PermissionType.ADMIN)
+    @filter.command("替身统计")
+    async def stand_metrics(self, event: AstrMessageEvent):
+        """查看插件运行指标（管理员）"""
+        async for result in self.admin_handler.handle_metrics(event):
+            yield result
+
     async def terminate(self):
         """插件销毁方法"""
-        pass
+        await self.service_container.shutdown()
@@ -2,6 +2,8 @@
 替身数据模型
 """
 
+import hashlib
+import json
 from dataclasses import dataclass
 from typing import Optional
 
@@ -63,3 +65,60 @@ class AwakenRecord:
             count=data.get("count", 0),
             last_awaken_time=data.get("last_awaken_time"),
         )
+
+
+@dataclass(frozen=True)
+class PanelRequest:
+    """替身面板绘制请求，字段与面板API的参数一一对应"""
+
+    name: Optional[str] = None  # 替身名字
+    ability: Optional[str] = None  # 能力值字符串，如 "5,4,3,2,1,5"
+    desc: Optional[str] = None  # 替身描述
+    h: Optional[str] = None  # 画布高度
+
+    def to_params(self) -> dict:
+        """转换为API参数字典（省略未设置的字段）"""
+        params = {}
+        if self.name is not None:
+            params["name"] = self.name
+        if self.ability is not None:
+            params["ability"] = self.ability
+        if self.desc is not None:
+            params["desc"] = self.desc
+        if self.h is not None:
+            params["h"] = self.h
+        return params
+
+    def cache_key(self, namespace: str = "") -> str:
+        """
+        生成面板图片的内容寻址缓存键
+
+        Args:
+            namespace: 生成方式标识（如远程API地址或本地渲染器版本），不同来源的图片互不混用
+
+        Returns:
+            str: 参数的SHA-256十六进制摘要
+        """
+        payload = json.dumps(
+            [namespace, self.to_params()], ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class PanelImage:
+    """替身面板图片，url/data/path 三者之一有值"""
+
+    url: Optional[str] = None  # 远程图片地址
+    data: Optional[bytes] = None  # PNG图片内容
+    path: Optional[str] = None  # 本地图片文件路径
+
+
+@dataclass
+class GalleryEntry:
+    """替身图鉴中的一格"""
+
+    user_id: str
+    name: str  # 显示名字（替身名字或用户昵称）
+    abilities: str  # 能力值字符串，如 "5,4,3,2,1,5"
+    panel_path: Optional[str] = None  # 已缓存的单人面板图片路径（可选）
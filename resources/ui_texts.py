@@ -48,6 +48,45 @@ class UITexts:
 🎆 你的替身已经进化，获得了全新的力量！
 {limit_hint}"""
 
+    # 批量觉醒相关文本
+    BATCH_AWAKEN_DISABLED = "❌ 十连觉醒已被管理员禁用！"
+
+    BATCH_AWAKEN_HELP = """📚 十连觉醒使用方法：
+/十连觉醒 [数量]
+
+💡 说明：
+- 一次觉醒多个候选替身（默认 {default} 个，最多 {max_amount} 个）
+- 每个候选替身消耗一次今日觉醒次数
+- 发送 /选择替身 <序号> 保留其中一个，其余候选作废"""
+
+    BATCH_AWAKEN_RESULT = """🌟 十连觉醒完成！共觉醒 {amount} 个候选替身：
+
+{candidates}
+
+👉 发送 /选择替身 <序号> 保留其中一个（{ttl_minutes} 分钟内有效）
+{limit_hint}"""
+
+    BATCH_AWAKEN_CANDIDATE = "{index}. {stand_name}：{abilities}"
+
+    AWAKEN_BATCH_INSUFFICIENT = (
+        "❌ 今日剩余觉醒次数不足！\n\n还可以觉醒 {remaining} 次，本次需要 {amount} 次"
+    )
+
+    CHOOSE_STAND_HELP = "📚 选择替身使用方法：/选择替身 <序号>\n\n💡 先使用 /十连觉醒 获得候选替身"
+
+    CHOOSE_STAND_NO_CANDIDATES = (
+        "❌ 你没有待选择的候选替身（可能已过期），请先使用 /十连觉醒"
+    )
+
+    CHOOSE_STAND_INVALID_INDEX = "❌ 序号无效，请输入候选替身前面的序号"
+
+    CHOOSE_STAND_SUCCESS = """✅ 已选择替身：{stand_name}
+
+能力值：
+{abilities}
+
+🎆 你的替身已经更新！"""
+
     # 基础处理器相关文本
     GROUP_NOT_IN_WHITELIST = "群聊不在白名单中: {group_id}"
 
@@ -180,3 +219,24 @@ class UITexts:
 
 你今天已经重新觉醒过了（{last_awaken_time}）
 每天只能重新觉醒 {daily_limit} 次，请明天（{tomorrow}）再来尝试！"""
+
+    # 管理员指令相关文本
+    METRICS_REPORT = "📊 替身插件运行指标：\n\n{metrics}"
+
+    # 重复指令相关文本
+    DUPLICATE_COMMAND = "⏳ 上一条相同的指令正在处理，请勿重复发送~"
+
+    # 面板相关文本
+    PANEL_UNAVAILABLE = "⚠️ 面板服务暂时不可用，本次只显示文字信息"
+    PANEL_BUSY = "⏳ 当前生成面板的人太多，本次只显示文字信息"
+    PANEL_TIMEOUT = "⌛ 面板图片生成超时，本次未能发送图片"
+
+    # 替身图鉴相关文本
+    GALLERY_GROUP_ONLY = "❌ 替身图鉴只能在群聊中使用！"
+    GALLERY_EMPTY = "📭 本群还没有成员设置替身！\n\n💡 使用 /觉醒替身 或 /设置替身 获得你的替身"
+    GALLERY_PAGE_EMPTY = "📭 这一页没有更多替身了"
+    GALLERY_TITLE = "本群替身图鉴"
+    GALLERY_RESULT = "🖼️ 本群替身图鉴：\n\n{entries}"
+    GALLERY_ENTRY = "{index}. {name}：{abilities}"
+    GALLERY_NEXT_PAGE = "\n\n➡️ 发送 /替身图鉴 {cursor} 查看下一页"
+    GALLERY_LAST_PAGE = "\n\n✅ 已经是最后一页了"
@@ -0,0 +1,188 @@
+"""
+活跃用户记录服务
+
+记录每个用户最近一次使用插件指令的日期、昵称和所在群聊，
+用于零点预计算今日替身、群替身图鉴等功能。数据保存在数据目录的 activity.json。
+"""
+
+import datetime
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from astrbot.api import logger
+
+from ..utils.atomic_file import AtomicFileWriter
+from ..utils.io_executor import IOExecutor
+
+
+class ActivityTracker:
+    """活跃用户记录"""
+
+    FILE_NAME = "activity.json"
+
+    def __init__(
+        self,
+        data_dir: Union[str, Path],
+        timezone: Any,
+        retention_days: int = 30,
+        fsync_policy: str = "batched",
+        io_executor: Optional[IOExecutor] = None,
+    ):
+        """
+        初始化活跃用户记录
+
+        Args:
+            data_dir: 数据目录
+            timezone: 时区（用于计算日期）
+            retention_days: 超过该天数未活跃的用户会被清理
+            fsync_policy: 落盘策略
+            io_executor: 执行文件写入的I/O线程池（可选）
+        """
+        self.file_path = Path(data_dir) / self.FILE_NAME
+        self.timezone = timezone
+        self.retention_days = max(1, retention_days)
+        self._writer = AtomicFileWriter(fsync_policy)
+        self.io_executor = io_executor or IOExecutor()
+        self._lock = threading.Lock()
+        self._dirty = False
+        # {user_id: {"name": 昵称, "date": 最近活跃日期YYYYMMDD}}
+        self._users: Dict[str, Dict[str, str]] = {}
+        # {group_id: {user_id: 最近在该群活跃的日期YYYYMMDD}}
+        self._groups: Dict[str, Dict[str, str]] = {}
+
+        self._load()
+
+    def _today(self) -> str:
+        """当前日期"""
+        return datetime.datetime.now(self.timezone).strftime("%Y%m%d")
+
+    def _cutoff(self, days: int) -> str:
+        """最近 days 天的起始日期（包含当天）"""
+        start = datetime.datetime.now(self.timezone) - datetime.timedelta(
+            days=max(1, days) - 1
+        )
+        return start.strftime("%Y%m%d")
+
+    def _load(self) -> None:
+        """从文件加载记录"""
+        if not self.file_path.exists():
+            return
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (IOError, OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ 读取活跃用户记录失败，将重新记录: {e}")
+            return
+        self._users = data.get("users", {})
+        self._groups = data.get("groups", {})
+
+    def touch(
+        self, user_id: str, user_name: Optional[str], group_id: Optional[str] = None
+    ) -> None:
+        """
+        记录一次用户活跃（只更新内存，由定时任务写入文件）
+
+        Args:
+            user_id: 用户ID
+            user_name: 用户昵称
+            group_id: 群聊ID（私聊时为None）
+        """
+        today = self._today()
+        with self._lock:
+            user = self._users.get(user_id)
+            if (
+                user is None
+                or user.get("date") != today
+                or user.get("name") != user_name
+            ):
+                self._users[user_id] = {"name": user_name, "date": today}
+                self._dirty = True
+            if group_id:
+                members = self._groups.setdefault(group_id, {})
+                if members.get(user_id) != today:
+                    members[user_id] = today
+                    self._dirty = True
+
+    def get_user_name(self, user_id: str) -> Optional[str]:
+        """获取用户最近使用的昵称"""
+        with self._lock:
+            user = self._users.get(user_id)
+            return user.get("name") if user else None
+
+    def recent_users(self, days: int) -> List[Tuple[str, Optional[str]]]:
+        """
+        获取最近 days 天内活跃过的用户，最近活跃的排在前面
+
+        Args:
+            days: 天数（包含当天）
+
+        Returns:
+            List[Tuple[str, Optional[str]]]: [(用户ID, 昵称)]
+        """
+        cutoff = self._cutoff(days)
+        with self._lock:
+            users = [
+                (user.get("date", ""), user_id, user.get("name"))
+                for user_id, user in self._users.items()
+                if user.get("date", "") >= cutoff
+            ]
+        users.sort(reverse=True)
+        return [(user_id, name) for _, user_id, name in users]
+
+    def group_members(self, group_id: str) -> List[str]:
+        """
+        获取在群聊中使用过插件的用户，按用户ID排序（便于分页）
+
+        Args:
+            group_id: 群聊ID
+
+        Returns:
+            List[str]: 用户ID列表
+        """
+        with self._lock:
+            return sorted(self._groups.get(group_id, {}))
+
+    def save(self) -> bool:
+        """
+        清理过期记录并写入文件（没有变化时跳过）
+
+        Returns:
+            bool: 是否写入了文件
+        """
+        cutoff = self._cutoff(self.retention_days)
+        with self._lock:
+            if not self._dirty:
+                return False
+            self._users = {
+                user_id: user
+                for user_id, user in self._users.items()
+                if user.get("date", "") >= cutoff
+            }
+            groups = {}
+            for group_id, members in self._groups.items():
+                members = {u: d for u, d in members.items() if d >= cutoff}
+                if members:
+                    groups[group_id] = members
+            self._groups = groups
+            # 在锁内复制到成员一级：touch() 会原地修改群成员字典，序列化在锁外进行
+            data = {
+                "users": dict(self._users),
+                "groups": {g: dict(members) for g, members in self._groups.items()},
+            }
+            self._dirty = False
+
+        try:
+            self._writer.write_json(self.file_path, data)
+        except Exception as e:
+            # 任何失败都恢复未保存标记，由下一次定时保存重试
+            logger.error(f"❌ 保存活跃用户记录失败: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+        return True
+
+    async def asave(self) -> None:
+        """在I/O线程池中保存记录"""
+        await self.io_executor.run(self.save)
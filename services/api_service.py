@@ -1,18 +1,201 @@
+import asyncio
+import random
+import time
 from urllib.parse import urlencode
-from typing import Optional
+from typing import List, Optional, Union
+
+from astrbot.api import logger
+
+from .endpoint_pool import Endpoint, EndpointPool
+from ..utils.circuit_breaker import CircuitBreaker
+from ..utils.metrics import MetricsRegistry
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 未安装时无法使用拉取模式
+    aiohttp = None
+
+
+class APIUnavailableError(Exception):
+    """面板API暂时不可用（熔断中、超时或多次重试失败）"""
 
 
 class StandAPIService:
     """替身API服务"""
 
-    def __init__(self, api_server: str):
+    # 下载面板图片的大小上限
+    MAX_IMAGE_BYTES = 5 * 1024 * 1024
+    # 重试退避的基础时间（秒），第n次重试最多等待 base * 2^n
+    RETRY_BACKOFF_BASE = 0.2
+    # 健康检查请求的超时时间（秒）和使用的面板参数
+    PROBE_TIMEOUT = 3.0
+    PROBE_PARAMS = {"name": "probe", "ability": "3,3,3,3,3,3"}
+
+    def __init__(
+        self,
+        api_server: Union[str, List[str]],
+        timeout: float = 5.0,
+        max_retries: int = 2,
+        pool_size: int = 16,
+        metrics: Optional[MetricsRegistry] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
         """
         初始化API服务
 
         Args:
-            api_server: API服务器地址
+            api_server: API服务器地址，或多个镜像节点地址的列表
+            timeout: 拉取一张面板图片的总期限（秒，包含重试）
+            max_retries: 失败后的最大重试次数
+            pool_size: 连接池最大连接数
+            metrics: 指标注册表（可选）
+            breaker: 熔断器（可选）
+        """
+        servers = [api_server] if isinstance(api_server, str) else list(api_server)
+        # 第一个节点作为主地址（用于面板缓存的命名空间）
+        self.api_server = servers[0]
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.pool_size = max(1, pool_size)
+        self.metrics = metrics or MetricsRegistry()
+        self.breaker = breaker or CircuitBreaker(metrics=self.metrics, name="api")
+        self.endpoint_pool = EndpointPool(servers, metrics=self.metrics)
+        self._session = None
+
+    @staticmethod
+    def fetch_supported() -> bool:
+        """检查 aiohttp 是否可用"""
+        return aiohttp is not None
+
+    async def start(self) -> None:
+        """创建共享的长连接池（需要在事件循环中调用）"""
+        if aiohttp is None:
+            return
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self) -> None:
+        """关闭连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch_image(self, **params) -> bytes:
+        """
+        通过连接池拉取面板图片
+
+        在总期限内按指数退避（带随机抖动）重试；连接错误、超时和5xx视为失败并计入熔断器。
+
+        Args:
+            **params: 面板参数，与 get_image_url 相同
+
+        Returns:
+            bytes: 图片内容
+
+        Raises:
+            APIUnavailableError: 连接池未创建、熔断中或重试后仍然失败
         """
-        self.api_server = api_server
+        if self._session is None:
+            raise APIUnavailableError("连接池未初始化")
+        if not self.breaker.allow_request():
+            self.metrics.inc("api.fetch.rejected")
+            raise APIUnavailableError("面板API熔断中")
+
+        deadline = time.monotonic() + self.timeout
+        last_error: Optional[Exception] = None
+        endpoint: Optional[Endpoint] = None
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if attempt > 0:
+                self.metrics.inc("api.fetch.retries")
+
+            # 重试时尽量换一个节点
+            endpoint = self.endpoint_pool.choose(exclude=endpoint)
+            url = self._build_url(endpoint.url, params)
+            start = time.monotonic()
+            endpoint.in_flight += 1
+            try:
+                data = await self._fetch_once(url, remaining)
+            except _RetryableError as e:
+                last_error = e
+                self.endpoint_pool.record(
+                    endpoint, (time.monotonic() - start) * 1000, False
+                )
+            except APIUnavailableError:
+                # 服务能正常响应，只是请求本身无效，不计入熔断
+                self.endpoint_pool.record(
+                    endpoint, (time.monotonic() - start) * 1000, True
+                )
+                self.breaker.record_success()
+                self.metrics.inc("api.fetch.errors")
+                raise
+            else:
+                elapsed_ms = (time.monotonic() - start) * 1000
+                self.endpoint_pool.record(endpoint, elapsed_ms, True)
+                self.breaker.record_success()
+                self.metrics.observe("api.fetch", elapsed_ms)
+                return data
+            finally:
+                endpoint.in_flight -= 1
+
+            # 全抖动退避，避免大量请求同时重试
+            backoff = random.uniform(0, self.RETRY_BACKOFF_BASE * (2**attempt))
+            if time.monotonic() + backoff >= deadline:
+                break
+            await asyncio.sleep(backoff)
+
+        self.breaker.record_failure()
+        self.metrics.inc("api.fetch.errors")
+        raise APIUnavailableError(f"拉取面板图片失败: {last_error or '超时'}")
+
+    async def _fetch_once(self, url: str, timeout: float) -> bytes:
+        """发起一次请求，可重试的错误包装为 _RetryableError"""
+        try:
+            async with self._session.get(
+                url, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                if response.status >= 500:
+                    raise _RetryableError(f"HTTP {response.status}")
+                if response.status != 200:
+                    # 4xx 是请求参数问题，重试没有意义，也不代表服务不健康
+                    raise APIUnavailableError(f"HTTP {response.status}")
+                data = await response.content.read(self.MAX_IMAGE_BYTES + 1)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise _RetryableError(repr(e)) from e
+
+        if len(data) > self.MAX_IMAGE_BYTES:
+            raise APIUnavailableError("面板图片过大")
+        return data
+
+    async def probe_endpoints(self) -> None:
+        """对所有节点发起一次健康检查，结果计入节点统计（被剔除的节点成功后重新加入）"""
+        if self._session is None:
+            return
+        await asyncio.gather(
+            *(self._probe(endpoint) for endpoint in self.endpoint_pool.endpoints)
+        )
+
+    async def _probe(self, endpoint: Endpoint) -> None:
+        """检查单个节点"""
+        url = self._build_url(endpoint.url, self.PROBE_PARAMS)
+        start = time.monotonic()
+        try:
+            await self._fetch_once(url, self.PROBE_TIMEOUT)
+            success = True
+        except (_RetryableError, APIUnavailableError):
+            success = False
+        self.endpoint_pool.record(endpoint, (time.monotonic() - start) * 1000, success)
+
+    @staticmethod
+    def _build_url(base_url: str, params: dict) -> str:
+        """拼接面板图片URL"""
+        if not params:
+            return base_url
+        return f"{base_url}?{urlencode(params)}"
 
     def get_image_url(
         self, 
@@ -42,7 +225,9 @@ class StandAPIService:
             params["desc"] = desc
         if h is not None:
             params["h"] = h
-        if not params:
-            return self.api_server
-        query_string = urlencode(params)
-        return f"{self.api_server}?{query_string}"
\ No newline at end of file
+        endpoint = self.endpoint_pool.choose()
+        return self._build_url(endpoint.url, params)
+
+
+class _RetryableError(Exception):
+    """可以重试的请求错误"""
@@ -0,0 +1,302 @@
+"""
+批量觉醒服务
+
+一次生成多个候选替身（十连觉醒），觉醒次数在一次存储操作中整体扣除，
+候选替身按用户保存在数据目录的 batch_awaken/ 下（记录生成日期和过期时间），
+插件重载后仍然有效，共用数据目录的多个进程也能看到；用户在有效期内选择其中一个保存为自己的替身。
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Tuple, Union
+
+from astrbot.api import logger
+
+from .panel_service import PanelService
+from .stand_data_service import StandDataService
+from ..models.stand_models import GalleryEntry, PanelImage
+from ..utils.ability_utils import AbilityUtils
+from ..utils.atomic_file import AtomicFileWriter
+from ..utils.io_executor import IOExecutor
+from ..utils.metrics import MetricsRegistry
+from ..utils.stand_name_generator import StandNameGenerator
+
+
+@dataclass
+class StandCandidate:
+    """批量觉醒生成的候选替身"""
+
+    name: str
+    abilities: str  # 能力值字符串，如 "5,4,3,2,1,5"
+
+
+class BatchAwakenService:
+    """批量觉醒服务"""
+
+    DIR_NAME = "batch_awaken"
+
+    def __init__(
+        self,
+        data_service: StandDataService,
+        stand_name_generator: StandNameGenerator,
+        panel_service: PanelService,
+        data_dir: Union[str, Path],
+        timezone: Any,
+        metrics: Optional[MetricsRegistry] = None,
+        candidate_ttl: float = 600,
+        fsync_policy: str = "batched",
+        io_executor: Optional[IOExecutor] = None,
+    ):
+        """
+        初始化批量觉醒服务
+
+        Args:
+            data_service: 替身数据服务
+            stand_name_generator: 替身名生成器
+            panel_service: 面板服务（绘制候选替身的组合图片）
+            data_dir: 数据目录，候选替身保存在其中的 batch_awaken/ 下
+            timezone: 时区（用于记录候选替身的生成日期）
+            metrics: 指标注册表（可选）
+            candidate_ttl: 候选替身的有效期（秒）
+            fsync_policy: 落盘策略
+            io_executor: 执行文件读写的I/O线程池（可选）
+        """
+        self.data_service = data_service
+        self.stand_name_generator = stand_name_generator
+        self.panel_service = panel_service
+        self.pending_dir = Path(data_dir) / self.DIR_NAME
+        self.timezone = timezone
+        self.metrics = metrics or MetricsRegistry()
+        self.candidate_ttl = candidate_ttl
+        self._writer = AtomicFileWriter(fsync_policy)
+        self.io_executor = io_executor or IOExecutor()
+        self.pending_dir.mkdir(parents=True, exist_ok=True)
+
+    async def awaken(
+        self, user_id: str, amount: int, daily_limit: int
+    ) -> Tuple[Optional[List[StandCandidate]], int, str]:
+        """
+        扣除 amount 次觉醒次数并生成 amount 个候选替身（覆盖该用户之前未选择的候选）
+
+        Args:
+            user_id: 用户ID
+            amount: 候选替身数量（即扣除的觉醒次数）
+            daily_limit: 每日觉醒次数限制
+
+        Returns:
+            Tuple[Optional[List[StandCandidate]], int, str]:
+                (候选替身列表，次数不足时为None, 今日已觉醒次数, 次数不足时的提示消息)
+        """
+        allowed, count, _, message = await self.data_service.atry_consume_awaken(
+            user_id, daily_limit, amount
+        )
+        if not allowed:
+            return None, count, message
+
+        candidates = [
+            StandCandidate(
+                name=self.stand_name_generator.generate_random_stand_name(),
+                abilities=AbilityUtils.generate_random_abilities(),
+            )
+            for _ in range(amount)
+        ]
+        await self.io_executor.run(self._store, user_id, candidates)
+
+        self.metrics.inc("batch_awaken.batches")
+        self.metrics.inc("batch_awaken.candidates", amount)
+        return candidates, count, ""
+
+    async def render_candidates(
+        self, user_id: str, title: str, candidates: List[StandCandidate]
+    ) -> Optional[PanelImage]:
+        """
+        把候选替身绘制为一张组合图片（不写入面板缓存）
+
+        Args:
+            user_id: 用户ID
+            title: 图片标题
+            candidates: 候选替身
+
+        Returns:
+            Optional[PanelImage]: 组合图片；无法绘制时返回None
+
+        Raises:
+            RenderQueueFullError: 渲染队列已满
+        """
+        entries = [
+            GalleryEntry(user_id, f"{index}. {c.name}", c.abilities)
+            for index, c in enumerate(candidates, 1)
+        ]
+        payload = json.dumps(
+            [
+                "batch_awaken",
+                user_id,
+                title,
+                [[c.name, c.abilities] for c in candidates],
+            ],
+            ensure_ascii=False,
+        )
+        key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        renderer = self.panel_service.renderer
+        return await self.panel_service.get_composite(
+            key, lambda: renderer.render_grid(title, entries), cacheable=False
+        )
+
+    async def has_pending(self, user_id: str) -> bool:
+        """用户是否有未过期的候选替身"""
+        return await self.io_executor.run(self._load, user_id) is not None
+
+    async def choose(self, user_id: str, index: int) -> Optional[StandCandidate]:
+        """
+        选择一个候选替身保存为用户的替身，其余候选作废
+
+        Args:
+            user_id: 用户ID
+            index: 候选序号（从1开始）
+
+        Returns:
+            Optional[StandCandidate]: 选中的候选替身；没有候选或序号无效时返回None
+        """
+        candidates = await self.io_executor.run(self._load, user_id)
+        if candidates is None or not 1 <= index <= len(candidates):
+            return None
+
+        # 先认领候选文件，避免并发的选择指令（包括其他进程）重复保存
+        claim_path = await self.io_executor.run(self._claim, user_id)
+        if claim_path is None:
+            return None
+        candidates = await self.io_executor.run(self._read, claim_path)
+        if candidates is None or not 1 <= index <= len(candidates):
+            await self.io_executor.run(self._release, user_id, claim_path)
+            return None
+
+        candidate = candidates[index - 1]
+        try:
+            await self.data_service.asave_user_stand(
+                user_id, candidate.abilities, candidate.name, "awaken"
+            )
+        except Exception:
+            # 保存失败时归还候选，用户可以重新选择
+            await self.io_executor.run(self._release, user_id, claim_path)
+            raise
+        await self.io_executor.run(self._discard, claim_path)
+        self.metrics.inc("batch_awaken.chosen")
+        return candidate
+
+    async def prune(self) -> int:
+        """在I/O线程池中清理过期的候选替身，参见 prune_expired"""
+        return await self.io_executor.run(self.prune_expired)
+
+    def prune_expired(self) -> int:
+        """
+        删除过期的候选文件，以及进程中断后遗留的认领文件
+
+        Returns:
+            int: 删除的文件数
+        """
+        now = time.time()
+        removed = 0
+        with os.scandir(self.pending_dir) as entries:
+            paths = [Path(entry.path) for entry in entries if entry.is_file()]
+        for path in paths:
+            if path.name.endswith(".claim"):
+                expired = self._mtime(path) + self.candidate_ttl <= now
+            else:
+                record = self._read_record(path)
+                expired = record is None or record.get("expires_at", 0) <= now
+            if expired:
+                removed += self._discard(path)
+        return removed
+
+    def _today(self) -> str:
+        """当前日期"""
+        return datetime.datetime.now(self.timezone).strftime("%Y-%m-%d")
+
+    def _pending_file(self, user_id: str) -> Path:
+        """用户候选替身文件路径"""
+        return self.pending_dir / f"{user_id}.json"
+
+    def _store(self, user_id: str, candidates: List[StandCandidate]) -> None:
+        """写入候选替身，记录生成日期（扣除次数的那一天）和过期时间（系统时间，重启和跨进程后仍然有效）"""
+        self._writer.write_json(
+            self._pending_file(user_id),
+            {
+                "user_id": user_id,
+                "date": self._today(),
+                "expires_at": time.time() + self.candidate_ttl,
+                "candidates": [asdict(candidate) for candidate in candidates],
+            },
+        )
+
+    def _load(self, user_id: str) -> Optional[List[StandCandidate]]:
+        """读取用户未过期的候选替身"""
+        return self._read(self._pending_file(user_id))
+
+    def _read(self, path: Path) -> Optional[List[StandCandidate]]:
+        """读取候选文件，过期的候选视为不存在（跨过零点不影响有效期，次数已在生成当天扣除）"""
+        record = self._read_record(path)
+        if record is None or record.get("expires_at", 0) <= time.time():
+            return None
+        return [StandCandidate(**candidate) for candidate in record["candidates"]]
+
+    @staticmethod
+    def _read_record(path: Path) -> Optional[dict]:
+        """读取候选文件内容，文件不存在或已损坏时返回None"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ 读取十连觉醒候选失败: {e}")
+            return None
+
+    def _claim(self, user_id: str) -> Optional[Path]:
+        """
+        把候选文件重命名为只属于本次选择的认领文件（重命名是原子操作，只有一个选择能成功）
+
+        Returns:
+            Optional[Path]: 认领文件路径；候选已被其他选择认领时返回None
+        """
+        claim_path = self.pending_dir / f".{user_id}.{uuid.uuid4().hex}.claim"
+        try:
+            os.rename(self._pending_file(user_id), claim_path)
+        except FileNotFoundError:
+            return None
+        return claim_path
+
+    def _release(self, user_id: str, claim_path: Path) -> None:
+        """归还认领的候选；期间用户已经生成了新的候选时以新的为准"""
+        try:
+            os.link(claim_path, self._pending_file(user_id))
+        except FileExistsError:
+            pass
+        except OSError:
+            # 文件系统不支持硬链接时退化为检查后重命名
+            if not self._pending_file(user_id).exists():
+                os.replace(claim_path, self._pending_file(user_id))
+                return
+        self._discard(claim_path)
+
+    @staticmethod
+    def _discard(path: Path) -> int:
+        """删除文件，返回实际删除的文件数"""
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return 0
+        return 1
+
+    @staticmethod
+    def _mtime(path: Path) -> float:
+        """文件修改时间，文件不存在时返回0"""
+        try:
+            return os.stat(path).st_mtime
+        except FileNotFoundError:
+            return 0.0
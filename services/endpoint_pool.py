@@ -0,0 +1,191 @@
+"""
+面板API多节点池
+
+维护每个节点最近的请求耗时和成功率，按"二选一"（power of two choices）策略选择节点：
+随机取两个可用节点，选择得分（耗时分位数 × 并发数 × 错误率惩罚）更低的一个。
+连续失败或错误率过高的节点会被暂时剔除，由健康检查或剔除到期后重新加入。
+"""
+
+import random
+import time
+from collections import deque
+from typing import List, Optional
+from urllib.parse import urlparse
+
+from ..utils.metrics import MetricsRegistry
+
+
+class Endpoint:
+    """单个面板API节点及其滚动统计"""
+
+    # 滚动窗口大小
+    LATENCY_WINDOW = 100
+    OUTCOME_WINDOW = 50
+    # 没有耗时数据时假设的耗时（毫秒），让新节点有机会被选中
+    DEFAULT_LATENCY_MS = 200.0
+
+    def __init__(self, url: str):
+        """
+        初始化节点
+
+        Args:
+            url: 节点地址
+        """
+        self.url = url
+        self.name = urlparse(url).netloc or url
+        self.latencies: deque = deque(maxlen=self.LATENCY_WINDOW)
+        self.outcomes: deque = deque(maxlen=self.OUTCOME_WINDOW)  # True 表示成功
+        self.consecutive_failures = 0
+        self.in_flight = 0
+        self.ejected_until = 0.0
+        self.total_requests = 0
+        self.total_failures = 0
+
+    @property
+    def ejected(self) -> bool:
+        """是否处于剔除状态"""
+        return time.monotonic() < self.ejected_until
+
+    def latency_percentile(self, percentile: float) -> float:
+        """
+        计算耗时分位数
+
+        Args:
+            percentile: 分位数（0-100）
+
+        Returns:
+            float: 耗时（毫秒），没有数据时返回默认值
+        """
+        if not self.latencies:
+            return self.DEFAULT_LATENCY_MS
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+    @property
+    def error_rate(self) -> float:
+        """滚动窗口内的错误率"""
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def score(self) -> float:
+        """选择得分，越低越好"""
+        return (
+            self.latency_percentile(90)
+            * (1 + self.in_flight)
+            / max(0.05, 1 - self.error_rate)
+        )
+
+
+class EndpointPool:
+    """面板API多节点池"""
+
+    def __init__(
+        self,
+        urls: List[str],
+        metrics: Optional[MetricsRegistry] = None,
+        eject_consecutive_failures: int = 3,
+        eject_error_rate: float = 0.5,
+        eject_min_samples: int = 10,
+        eject_duration: float = 30.0,
+    ):
+        """
+        初始化节点池
+
+        Args:
+            urls: 节点地址列表（至少一个）
+            metrics: 指标注册表（可选）
+            eject_consecutive_failures: 连续失败多少次后剔除节点
+            eject_error_rate: 滚动错误率达到多少时剔除节点
+            eject_min_samples: 按错误率剔除所需的最少样本数
+            eject_duration: 剔除时长（秒），到期后自动重新加入
+        """
+        if not urls:
+            raise ValueError("面板API节点列表不能为空")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.metrics = metrics or MetricsRegistry()
+        self.eject_consecutive_failures = max(1, eject_consecutive_failures)
+        self.eject_error_rate = eject_error_rate
+        self.eject_min_samples = max(1, eject_min_samples)
+        self.eject_duration = eject_duration
+
+        for endpoint in self.endpoints:
+            self._register_gauges(endpoint)
+
+    def _register_gauges(self, endpoint: Endpoint) -> None:
+        """注册节点的统计指标"""
+        prefix = f"api.endpoint[{endpoint.name}]"
+        self.metrics.register_gauge(
+            f"{prefix}.p50_ms", lambda: round(endpoint.latency_percentile(50), 2)
+        )
+        self.metrics.register_gauge(
+            f"{prefix}.p90_ms", lambda: round(endpoint.latency_percentile(90), 2)
+        )
+        self.metrics.register_gauge(
+            f"{prefix}.error_rate", lambda: round(endpoint.error_rate, 3)
+        )
+        self.metrics.register_gauge(f"{prefix}.ejected", lambda: int(endpoint.ejected))
+        self.metrics.register_gauge(
+            f"{prefix}.requests", lambda: endpoint.total_requests
+        )
+
+    def choose(self, exclude: Optional[Endpoint] = None) -> Endpoint:
+        """
+        按二选一策略选择节点
+
+        Args:
+            exclude: 尽量避开的节点（如刚失败的节点，用于重试）
+
+        Returns:
+            Endpoint: 选中的节点
+        """
+        candidates = [e for e in self.endpoints if not e.ejected and e is not exclude]
+        if not candidates:
+            candidates = [e for e in self.endpoints if not e.ejected]
+        if not candidates:
+            # 所有节点都被剔除时，选择最早到期的节点，不至于完全不可用
+            return min(self.endpoints, key=lambda e: e.ejected_until)
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = random.sample(candidates, 2)
+        return first if first.score() <= second.score() else second
+
+    def record(self, endpoint: Endpoint, latency_ms: float, success: bool) -> None:
+        """
+        记录一次请求结果
+
+        Args:
+            endpoint: 节点
+            latency_ms: 请求耗时（毫秒）
+            success: 是否成功
+        """
+        endpoint.total_requests += 1
+        endpoint.outcomes.append(success)
+        if success:
+            endpoint.latencies.append(latency_ms)
+            endpoint.consecutive_failures = 0
+            if endpoint.ejected_until:
+                self._readmit(endpoint)
+            return
+
+        endpoint.total_failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.ejected:
+            return
+        if endpoint.consecutive_failures >= self.eject_consecutive_failures or (
+            len(endpoint.outcomes) >= self.eject_min_samples
+            and endpoint.error_rate >= self.eject_error_rate
+        ):
+            self._eject(endpoint)
+
+    def _eject(self, endpoint: Endpoint) -> None:
+        """剔除节点"""
+        endpoint.ejected_until = time.monotonic() + self.eject_duration
+        self.metrics.inc("api.endpoint_ejections")
+
+    def _readmit(self, endpoint: Endpoint) -> None:
+        """重新加入节点，清空旧的失败记录，避免立即被再次剔除"""
+        endpoint.ejected_until = 0.0
+        endpoint.outcomes.clear()
+        self.metrics.inc("api.endpoint_readmissions")
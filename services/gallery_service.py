@@ -0,0 +1,140 @@
+"""
+替身图鉴服务
+
+把群聊中使用过插件的成员的替身绘制为一张网格图，按游标分页：
+游标是上一页最后检查到的用户ID，每页只按需分批读取替身数据，
+单页的读取量和绘制量都有上限，与群人数无关。
+"""
+
+import bisect
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from .activity_service import ActivityTracker
+from .panel_service import PanelService
+from .stand_data_service import StandDataService
+from ..models.stand_models import GalleryEntry, PanelImage, PanelRequest
+from ..utils.metrics import MetricsRegistry
+
+
+@dataclass
+class GalleryPage:
+    """替身图鉴的一页"""
+
+    entries: List[GalleryEntry] = field(default_factory=list)
+    next_cursor: Optional[str] = None  # 下一页的游标，None表示已是最后一页
+
+
+class GalleryService:
+    """替身图鉴服务"""
+
+    # 每页最多检查的成员数 = 每页格数 × 该倍数，避免大量成员没有替身时单页耗时过长
+    MAX_SCAN_FACTOR = 4
+
+    def __init__(
+        self,
+        data_service: StandDataService,
+        activity_tracker: ActivityTracker,
+        panel_service: PanelService,
+        metrics: Optional[MetricsRegistry] = None,
+        page_size: int = 9,
+    ):
+        """
+        初始化替身图鉴服务
+
+        Args:
+            data_service: 替身数据服务
+            activity_tracker: 活跃用户记录（提供群成员列表）
+            panel_service: 面板服务（查找已缓存的单人面板、绘制组合图片）
+            metrics: 指标注册表（可选）
+            page_size: 每页的替身数量
+        """
+        self.data_service = data_service
+        self.activity_tracker = activity_tracker
+        self.panel_service = panel_service
+        self.metrics = metrics or MetricsRegistry()
+        self.page_size = max(1, min(30, page_size))
+
+    async def get_page(
+        self, group_id: str, cursor: Optional[str] = None
+    ) -> GalleryPage:
+        """
+        读取一页替身
+
+        Args:
+            group_id: 群聊ID
+            cursor: 游标（上一页返回的 next_cursor），None表示第一页
+
+        Returns:
+            GalleryPage: 本页的替身和下一页游标
+        """
+        members = self.activity_tracker.group_members(group_id)
+        position = bisect.bisect_right(members, cursor) if cursor else 0
+        scan_limit = position + self.page_size * self.MAX_SCAN_FACTOR
+        page = GalleryPage()
+
+        while len(page.entries) < self.page_size and position < len(members):
+            if position >= scan_limit:
+                break
+            chunk = members[position : position + self.page_size]
+            stands = await self.data_service.aget_user_stands(chunk)
+            for user_id in chunk:
+                position += 1
+                stand_data = stands.get(user_id)
+                if stand_data is None:
+                    continue
+                name = (
+                    stand_data.name
+                    or self.activity_tracker.get_user_name(user_id)
+                    or user_id
+                )
+                page.entries.append(GalleryEntry(user_id, name, stand_data.abilities))
+                if len(page.entries) >= self.page_size:
+                    break
+
+        if position < len(members):
+            page.next_cursor = members[position - 1] if position else None
+        self.metrics.inc("gallery.pages")
+        return page
+
+    async def render_page(self, title: str, page: GalleryPage) -> Optional[PanelImage]:
+        """
+        绘制一页替身图鉴，已缓存的单人面板直接复用
+
+        Args:
+            title: 图片标题
+            page: 替身图鉴的一页
+
+        Returns:
+            Optional[PanelImage]: 组合图片；无法绘制时返回None
+
+        Raises:
+            RenderQueueFullError: 渲染队列已满
+        """
+        for entry in page.entries:
+            cached = await self.panel_service.get_cached_panel(
+                PanelRequest(name=entry.name, ability=entry.abilities)
+            )
+            entry.panel_path = cached.path if cached else None
+        reused = sum(1 for entry in page.entries if entry.panel_path)
+        self.metrics.inc("gallery.panels_reused", reused)
+
+        key = self._composite_key(title, page.entries)
+        renderer = self.panel_service.renderer
+        return await self.panel_service.get_composite(
+            key, lambda: renderer.render_grid(title, page.entries)
+        )
+
+    def _composite_key(self, title: str, entries: List[GalleryEntry]) -> str:
+        """组合图片缓存键：包含影响绘制结果的全部内容（是否复用了单人面板也会改变外观）"""
+        payload = json.dumps(
+            [
+                f"gallery:v{self.panel_service.renderer.VERSION}",
+                title,
+                [[e.name, e.abilities, bool(e.panel_path)] for e in entries],
+            ],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
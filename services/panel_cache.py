@@ -0,0 +1,185 @@
+"""
+替身面板图片磁盘缓存
+
+按面板参数的哈希（内容寻址）把生成好的PNG保存到数据目录下的 panel_cache/，
+相同参数的面板直接从本地文件发送，不再重复渲染或下载。
+缓存有总字节数上限，超出时按最近最少使用（LRU）淘汰。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+from astrbot.api import logger
+
+from ..utils.atomic_file import AtomicFileWriter
+from ..utils.metrics import MetricsRegistry
+
+
+class PanelImageCache:
+    """内容寻址的面板图片缓存"""
+
+    SUFFIX = ".png"
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        max_bytes: int,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        初始化缓存，并扫描缓存目录重建内存索引
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总字节数上限，小于等于0时禁用缓存
+            metrics: 指标注册表（可选）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.metrics = metrics or MetricsRegistry()
+        # 缓存可以随时重建，不需要fsync
+        self._writer = AtomicFileWriter("never")
+        self._lock = threading.Lock()
+        # {缓存键: 文件大小}，按最近使用时间从旧到新排列
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+
+        self.metrics.register_gauge("panel_cache.bytes", lambda: self._total_bytes)
+        self.metrics.register_gauge("panel_cache.entries", lambda: len(self._index))
+
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._rebuild_index()
+
+    @property
+    def enabled(self) -> bool:
+        """缓存是否启用"""
+        return self.max_bytes > 0
+
+    def _path_for(self, key: str) -> Path:
+        """缓存文件路径：按键的前两位分目录，避免单个目录文件过多"""
+        return self.cache_dir / key[:2] / f"{key}{self.SUFFIX}"
+
+    def _rebuild_index(self) -> None:
+        """扫描缓存目录重建索引，按文件修改时间恢复LRU顺序"""
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    # 写入中途崩溃残留的临时文件
+                    self._unlink(entry.path)
+                    continue
+                if not entry.name.endswith(self.SUFFIX) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                entries.append(
+                    (stat.st_mtime, entry.name[: -len(self.SUFFIX)], stat.st_size)
+                )
+
+        entries.sort()
+        with self._lock:
+            for _, key, size in entries:
+                self._index[key] = size
+                self._total_bytes += size
+            evicted = self._evict_locked()
+        self._remove_files(evicted)
+        if entries:
+            logger.info(
+                f"🖼️ 面板缓存已加载：{len(self._index)} 张，"
+                f"{self._total_bytes / 1024 / 1024:.1f} MB"
+            )
+
+    def get(self, key: str) -> Optional[Path]:
+        """
+        查找缓存的面板图片
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Path]: 图片文件路径，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            hit = key in self._index
+            if hit:
+                self._index.move_to_end(key)
+
+        path = self._path_for(key)
+        if hit:
+            try:
+                # 更新修改时间，重启后重建索引时保持LRU顺序
+                os.utime(path)
+            except FileNotFoundError:
+                # 文件被外部删除，同步清理索引
+                with self._lock:
+                    size = self._index.pop(key, None)
+                    if size is not None:
+                        self._total_bytes -= size
+                hit = False
+
+        self.metrics.inc("panel_cache.hits" if hit else "panel_cache.misses")
+        return path if hit else None
+
+    def put(self, key: str, data: bytes) -> Optional[Path]:
+        """
+        写入缓存，超出容量时淘汰最久未使用的图片
+
+        Args:
+            key: 缓存键
+            data: PNG图片内容
+
+        Returns:
+            Optional[Path]: 图片文件路径，缓存禁用或写入失败时返回None
+        """
+        if not self.enabled or len(data) > self.max_bytes:
+            return None
+
+        path = self._path_for(key)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            self._writer.write_bytes(path, data)
+        except OSError as e:
+            logger.warning(f"⚠️ 写入面板缓存失败: {e}")
+            return None
+
+        with self._lock:
+            old_size = self._index.pop(key, None)
+            if old_size is not None:
+                self._total_bytes -= old_size
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            evicted = self._evict_locked()
+        self._remove_files(evicted)
+        return path
+
+    def _evict_locked(self) -> list:
+        """从索引中淘汰超出容量的条目（调用方需持有锁），返回被淘汰的键"""
+        evicted = []
+        while self._total_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(key)
+        return evicted
+
+    def _remove_files(self, keys: list) -> None:
+        """删除被淘汰的缓存文件"""
+        for key in keys:
+            self._unlink(self._path_for(key))
+        if keys:
+            self.metrics.inc("panel_cache.evictions", len(keys))
+
+    @staticmethod
+    def _unlink(path) -> None:
+        """删除文件，文件不存在时忽略"""
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,391 @@
+"""
+本地替身面板渲染器
+
+在进程内绘制JOJO风格的六边形能力雷达图并输出PNG，不依赖远程面板API。
+依赖 Pillow（可选依赖），未安装时 is_available() 返回 False，调用方应回退到远程API。
+"""
+
+import io
+import math
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from astrbot.api import logger
+
+from ..models.stand_models import GalleryEntry, PanelRequest
+from ..utils.ability_display_utils import AbilityDisplayUtils
+from ..utils.ability_utils import AbilityUtils
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # Pillow 未安装时禁用本地渲染
+    Image = ImageDraw = ImageFont = None
+
+
+class LocalPanelRenderer:
+    """本地替身面板渲染器"""
+
+    # 绘制样式变化时递增，使旧样式的缓存图片失效
+    VERSION = 1
+
+    WIDTH = 600
+    DEFAULT_HEIGHT = 700
+    MIN_HEIGHT = 500
+    MAX_HEIGHT = 1600
+    # 先按倍数放大绘制再缩小，获得抗锯齿效果
+    SCALE = 2
+
+    BACKGROUND = (250, 247, 240, 255)
+    GRID_COLOR = (180, 170, 190, 255)
+    AXIS_COLOR = (150, 140, 160, 255)
+    FILL_COLOR = (142, 68, 173, 140)
+    OUTLINE_COLOR = (108, 52, 131, 255)
+    TEXT_COLOR = (40, 30, 50, 255)
+    GRADE_COLOR = (192, 57, 43, 255)
+
+    # 替身图鉴网格布局（缩放前的像素）
+    GRID_COLUMNS = 3
+    GRID_CELL_WIDTH = 240
+    GRID_CELL_HEIGHT = 280
+    GRID_CAPTION_HEIGHT = 32
+    GRID_PADDING = 12
+    GRID_HEADER_HEIGHT = 60
+
+    # 常见的中文字体路径，按顺序尝试
+    FALLBACK_FONTS = [
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+        "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+        "/usr/share/fonts/wenquanyi/wqy-microhei/wqy-microhei.ttc",
+        "/System/Library/Fonts/PingFang.ttc",
+        "C:/Windows/Fonts/msyh.ttc",
+        "C:/Windows/Fonts/simhei.ttf",
+    ]
+
+    def __init__(self, font_path: Optional[str] = None):
+        """
+        初始化渲染器
+
+        Args:
+            font_path: 自定义字体文件路径（可选），需支持中文
+        """
+        self.font_path = font_path
+        # 字体对象不保证线程安全，每个渲染线程各自缓存一份
+        self._local = threading.local()
+        self._resolved_font_path: Optional[str] = None
+        self._font_resolved = False
+
+    @staticmethod
+    def is_available() -> bool:
+        """检查 Pillow 是否可用"""
+        return Image is not None
+
+    def render(self, request: PanelRequest) -> bytes:
+        """
+        绘制替身面板
+
+        Args:
+            request: 面板绘制请求
+
+        Returns:
+            bytes: PNG图片内容
+        """
+        if not self.is_available():
+            raise RuntimeError("Pillow 未安装，无法使用本地面板渲染")
+
+        s = self.SCALE
+        width = self.WIDTH * s
+        height = self._parse_height(request.h) * s
+        image = Image.new("RGB", (width, height), self.BACKGROUND[:3])
+
+        # 标题区域
+        title = request.name or "替身"
+        title_font = self._get_font(36 * s)
+        title_height = self._draw_centered(
+            image, title, title_font, width // 2, 30 * s, self.TEXT_COLOR
+        )
+        top = 30 * s + title_height + 20 * s
+
+        # 描述区域（底部）
+        desc_lines: List[str] = []
+        desc_font = self._get_font(22 * s)
+        if request.desc:
+            desc_lines = self._wrap_text(request.desc, desc_font, width - 80 * s)[:4]
+        line_height = 32 * s
+        bottom = height - 30 * s - len(desc_lines) * line_height
+
+        # 雷达图区域
+        label_margin = 70 * s
+        radius = max(
+            40 * s, min(width // 2 - label_margin, (bottom - top) // 2 - label_margin)
+        )
+        center = (width // 2, top + (bottom - top) // 2)
+        self._draw_radar(image, center, radius, self._parse_abilities(request.ability))
+
+        for i, line in enumerate(desc_lines):
+            self._draw_centered(
+                image,
+                line,
+                desc_font,
+                width // 2,
+                bottom + i * line_height,
+                self.TEXT_COLOR,
+            )
+
+        image = image.reduce(s)
+        buffer = io.BytesIO()
+        # 面板以纯色块为主，低压缩级别即可得到较小的文件，且编码更快
+        image.save(buffer, format="PNG", compress_level=1)
+        return buffer.getvalue()
+
+    def render_grid(self, title: str, entries: List[GalleryEntry]) -> bytes:
+        """
+        把多个替身绘制为一张网格图（替身图鉴）
+
+        已缓存单人面板的替身直接缩放粘贴面板图片，其余替身在格子中绘制小号雷达图。
+
+        Args:
+            title: 标题
+            entries: 各格的替身
+
+        Returns:
+            bytes: PNG图片内容
+        """
+        if not self.is_available():
+            raise RuntimeError("Pillow 未安装，无法绘制替身图鉴")
+
+        s = self.SCALE
+        columns = max(1, min(self.GRID_COLUMNS, len(entries)))
+        rows = max(1, math.ceil(len(entries) / columns))
+        pad = self.GRID_PADDING * s
+        cell_width = self.GRID_CELL_WIDTH * s
+        cell_height = self.GRID_CELL_HEIGHT * s
+        caption_height = self.GRID_CAPTION_HEIGHT * s
+        header_height = self.GRID_HEADER_HEIGHT * s
+        width = pad + columns * (cell_width + pad)
+        height = header_height + rows * (cell_height + caption_height + pad) + pad
+        image = Image.new("RGB", (width, height), self.BACKGROUND[:3])
+
+        self._draw_centered(
+            image, title, self._get_font(28 * s), width // 2, 16 * s, self.TEXT_COLOR
+        )
+
+        caption_font = self._get_font(18 * s)
+        draw = ImageDraw.Draw(image)
+        for index, entry in enumerate(entries):
+            row, column = divmod(index, columns)
+            left = pad + column * (cell_width + pad)
+            top = header_height + row * (cell_height + caption_height + pad)
+            draw.rectangle(
+                [left, top, left + cell_width, top + cell_height],
+                fill=(255, 255, 255),
+                outline=self.GRID_COLOR[:3],
+                width=s,
+            )
+            if not self._paste_panel(image, entry.panel_path, left, top):
+                radius = cell_width // 2 - 45 * s
+                center = (left + cell_width // 2, top + cell_height // 2)
+                self._draw_radar(
+                    image,
+                    center,
+                    radius,
+                    self._parse_abilities(entry.abilities),
+                    text_scale=0.5,
+                )
+            caption = self._truncate(entry.name, caption_font, cell_width)
+            self._draw_centered(
+                image,
+                caption,
+                caption_font,
+                left + cell_width // 2,
+                top + cell_height + 6 * s,
+                self.TEXT_COLOR,
+            )
+
+        image = image.reduce(s)
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", compress_level=1)
+        return buffer.getvalue()
+
+    def _paste_panel(
+        self, image, panel_path: Optional[str], left: int, top: int
+    ) -> bool:
+        """把已缓存的面板图片缩放后居中粘贴到格子中，图片不可用时返回False"""
+        if not panel_path:
+            return False
+        s = self.SCALE
+        box = (self.GRID_CELL_WIDTH * s - 4 * s, self.GRID_CELL_HEIGHT * s - 4 * s)
+        try:
+            with Image.open(panel_path) as panel:
+                panel.draft("RGB", box)
+                thumbnail = panel.convert("RGB")
+        except (OSError, ValueError):
+            # 缓存文件可能刚被淘汰，改为直接绘制
+            return False
+        thumbnail.thumbnail(box)
+        image.paste(
+            thumbnail,
+            (
+                left + (self.GRID_CELL_WIDTH * s - thumbnail.width) // 2,
+                top + (self.GRID_CELL_HEIGHT * s - thumbnail.height) // 2,
+            ),
+        )
+        return True
+
+    def _truncate(self, text: str, font, max_width: int) -> str:
+        """文本超出宽度时截断并添加省略号"""
+        if self._text_size(text, font)[0] <= max_width:
+            return text
+        while text and self._text_size(text + "…", font)[0] > max_width:
+            text = text[:-1]
+        return text + "…"
+
+    def _draw_radar(
+        self,
+        image,
+        center: Tuple[int, int],
+        radius: int,
+        values: List[int],
+        text_scale: float = 1.0,
+    ) -> None:
+        """绘制六边形网格、能力多边形和能力标签（text_scale 缩放标签字号和间距）"""
+        s = self.SCALE
+        draw = ImageDraw.Draw(image)
+
+        # 同心六边形网格，从内到外依次为 E、D、C、B、A
+        for level in range(1, 6):
+            ring = self._hexagon(center, radius * level / 5)
+            draw.polygon(ring, outline=self.GRID_COLOR, width=s)
+        for x, y in self._hexagon(center, radius):
+            draw.line([center, (x, y)], fill=self.AXIS_COLOR, width=s)
+
+        # 能力多边形使用半透明填充（RGBA模式的画笔会与底色混合）
+        points = [
+            self._axis_point(center, radius * value / 5, i)
+            for i, value in enumerate(values)
+        ]
+        ImageDraw.Draw(image, "RGBA").polygon(points, fill=self.FILL_COLOR)
+        draw.polygon(points, outline=self.OUTLINE_COLOR, width=3 * s)
+
+        # 能力名称和等级
+        label_font = self._get_font(round(22 * s * text_scale))
+        grade_font = self._get_font(round(30 * s * text_scale))
+        for i, name in enumerate(AbilityDisplayUtils.ABILITY_NAMES):
+            x, y = self._axis_point(center, radius + 40 * s * text_scale, i)
+            grade = AbilityUtils.NUMBER_TO_ABILITY.get(str(values[i]), "-")
+            name_height = self._text_size(name, label_font)[1]
+            grade_height = self._text_size(grade, grade_font)[1]
+            y -= (name_height + grade_height + 4 * s) // 2
+            self._draw_centered(image, name, label_font, x, y, self.TEXT_COLOR)
+            self._draw_centered(
+                image,
+                grade,
+                grade_font,
+                x,
+                y + name_height + 4 * s,
+                self.GRADE_COLOR,
+            )
+
+    @staticmethod
+    def _axis_point(
+        center: Tuple[int, int], distance: float, index: int
+    ) -> Tuple[float, float]:
+        """计算第 index 条轴上距中心 distance 的点（第0条轴朝上，顺时针排列）"""
+        angle = math.radians(-90 + index * 60)
+        return (
+            center[0] + distance * math.cos(angle),
+            center[1] + distance * math.sin(angle),
+        )
+
+    def _hexagon(
+        self, center: Tuple[int, int], distance: float
+    ) -> List[Tuple[float, float]]:
+        """计算六边形的六个顶点"""
+        return [self._axis_point(center, distance, i) for i in range(6)]
+
+    def _draw_centered(
+        self, image, text: str, font, center_x: int, top: int, color
+    ) -> int:
+        """水平居中绘制文本，返回文本高度"""
+        text_width, text_height = self._text_size(text, font)
+        ImageDraw.Draw(image).text(
+            (center_x - text_width / 2, top), text, font=font, fill=color
+        )
+        return text_height
+
+    @staticmethod
+    def _text_size(text: str, font) -> Tuple[int, int]:
+        """测量文本宽高"""
+        left, top, right, bottom = font.getbbox(text)
+        return right - left, bottom - top
+
+    def _wrap_text(self, text: str, font, max_width: int) -> List[str]:
+        """按像素宽度逐字换行（中文没有空格分词）"""
+        lines = []
+        current = ""
+        for char in text:
+            if font.getlength(current + char) > max_width and current:
+                lines.append(current)
+                current = char
+            else:
+                current += char
+        if current:
+            lines.append(current)
+        return lines
+
+    def _parse_height(self, h: Optional[str]) -> int:
+        """解析画布高度，无效时使用默认值，超出范围时截断"""
+        try:
+            height = int(h) if h is not None else self.DEFAULT_HEIGHT
+        except (TypeError, ValueError):
+            height = self.DEFAULT_HEIGHT
+        return max(self.MIN_HEIGHT, min(self.MAX_HEIGHT, height))
+
+    @staticmethod
+    def _parse_abilities(ability: Optional[str]) -> List[int]:
+        """解析能力值字符串为6个1-5的整数，无效的项按0处理"""
+        values = []
+        for part in (ability or "").split(",")[:6]:
+            try:
+                values.append(max(0, min(5, int(part))))
+            except ValueError:
+                values.append(0)
+        return values + [0] * (6 - len(values))
+
+    def _get_font(self, size: int):
+        """获取指定字号的字体（按线程缓存）"""
+        fonts: Dict[int, object] = getattr(self._local, "fonts", None)
+        if fonts is None:
+            fonts = self._local.fonts = {}
+        font = fonts.get(size)
+        if font is None:
+            font = fonts[size] = self._load_font(size)
+        return font
+
+    def _load_font(self, size: int):
+        """加载字体：优先使用配置的字体，其次尝试常见中文字体，最后使用Pillow默认字体"""
+        if not self._font_resolved:
+            self._font_resolved = True
+            candidates = ([self.font_path] if self.font_path else []) + list(
+                self.FALLBACK_FONTS
+            )
+            for path in candidates:
+                try:
+                    ImageFont.truetype(path, 12)
+                except OSError:
+                    continue
+                self._resolved_font_path = path
+                break
+            else:
+                logger.warning(
+                    "⚠️ 未找到可用的中文字体，面板中的中文可能无法正常显示，"
+                    "请在配置中设置 panel_font_path"
+                )
+
+        if self._resolved_font_path:
+            return ImageFont.truetype(self._resolved_font_path, size)
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:  # Pillow < 10.1 不支持指定默认字体字号
+            return ImageFont.load_default()
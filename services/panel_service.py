@@ -0,0 +1,239 @@
+"""
+替身面板服务
+
+根据配置选择面板图片的生成方式：
+- remote: 使用远程面板API生成图片
+- local: 使用 LocalPanelRenderer 在本地绘制PNG
+
+remote 方式下开启拉取模式时，由插件通过连接池下载图片后发送（可配合面板缓存），
+面板API不可用时回复纯文字；关闭拉取模式时直接返回图片URL，由平台适配器下载。
+"""
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+from astrbot.api import logger
+
+from .api_service import APIUnavailableError, StandAPIService
+from .panel_cache import PanelImageCache
+from .panel_renderer import LocalPanelRenderer
+from .render_queue import RenderQueue
+from ..models.stand_models import PanelImage, PanelRequest
+from ..utils.io_executor import IOExecutor
+from ..utils.metrics import MetricsRegistry
+from ..utils.single_flight import AsyncSingleFlight
+
+
+class PanelService:
+    """替身面板服务"""
+
+    BACKENDS = ("remote", "local")
+
+    def __init__(
+        self,
+        api_service: StandAPIService,
+        backend: str = "remote",
+        renderer: Optional[LocalPanelRenderer] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        cache: Optional[PanelImageCache] = None,
+        fetch_enabled: bool = False,
+        render_queue: Optional[RenderQueue] = None,
+        io_executor: Optional[IOExecutor] = None,
+    ):
+        """
+        初始化面板服务
+
+        Args:
+            api_service: 远程面板API服务
+            backend: 面板生成方式："remote" 或 "local"
+            renderer: 本地渲染器（可选，默认使用系统字体）
+            metrics: 指标注册表（可选）
+            cache: 面板图片缓存（可选）
+            fetch_enabled: remote 方式下是否由插件拉取图片
+            render_queue: 渲染队列（可选），限制同时进行的渲染/下载数量
+            io_executor: 执行面板缓存读写的I/O线程池（可选）
+        """
+        self.api_service = api_service
+        self.renderer = renderer or LocalPanelRenderer()
+        self.metrics = metrics or MetricsRegistry()
+        self.cache = cache
+        self.render_queue = render_queue or RenderQueue(metrics=self.metrics)
+        self.io_executor = io_executor or IOExecutor(metrics=self.metrics)
+        # 并发的相同面板请求共享同一次渲染/下载
+        self._flights = AsyncSingleFlight(self.metrics, name="panel.flight")
+        if fetch_enabled and not api_service.fetch_supported():
+            logger.warning("⚠️ 未安装 aiohttp，无法拉取面板图片，改为直接发送图片地址")
+            fetch_enabled = False
+        self.fetch_enabled = fetch_enabled
+
+        if backend not in self.BACKENDS:
+            logger.warning(f"⚠️ 未知的面板生成方式 {backend}，使用 remote")
+            backend = "remote"
+        if backend == "local" and not self.renderer.is_available():
+            logger.warning("⚠️ 未安装 Pillow，无法使用本地面板渲染，改用远程API")
+            backend = "remote"
+        self.backend = backend
+
+    @property
+    def cache_enabled(self) -> bool:
+        """面板缓存是否启用"""
+        return self.cache is not None and self.cache.enabled
+
+    @property
+    def can_prewarm(self) -> bool:
+        """能否提前生成面板写入缓存（直接发送图片地址时没有可预热的内容）"""
+        return self.cache_enabled and (self.backend == "local" or self.fetch_enabled)
+
+    async def get_panel(self, request: PanelRequest) -> Optional[PanelImage]:
+        """
+        获取替身面板图片
+
+        Args:
+            request: 面板绘制请求
+
+        Returns:
+            Optional[PanelImage]: 面板图片；拉取模式下面板API不可用时返回None（只回复文字）
+
+        Raises:
+            RenderQueueFullError: 渲染队列已满（调用方应只回复文字）
+        """
+        if self.backend == "remote" and not self.fetch_enabled:
+            return PanelImage(url=self.get_remote_url(request))
+
+        key = self.cache_key(request)
+        return await self._flights.run(key, lambda: self._produce(request, key))
+
+    async def get_cached_panel(self, request: PanelRequest) -> Optional[PanelImage]:
+        """
+        只查找面板缓存，不渲染或下载
+
+        Args:
+            request: 面板绘制请求
+
+        Returns:
+            Optional[PanelImage]: 已缓存的面板图片（本地文件），未缓存时返回None
+        """
+        if not self.cache_enabled:
+            return None
+        path = await self.io_executor.run(self.cache.get, self.cache_key(request))
+        return PanelImage(path=str(path)) if path is not None else None
+
+    async def get_composite(
+        self, key: str, render: Callable[[], bytes], cacheable: bool = True
+    ) -> Optional[PanelImage]:
+        """
+        获取由本地渲染器绘制的组合图片（如替身图鉴），与面板共享缓存、合并和渲染队列
+
+        Args:
+            key: 组合图片的缓存键（需包含所有影响绘制结果的内容）
+            render: 在线程中执行的绘制函数，返回PNG图片内容
+            cacheable: 是否写入面板缓存（一次性的图片不缓存，避免挤占缓存空间）
+
+        Returns:
+            Optional[PanelImage]: 组合图片；未安装 Pillow 或绘制失败时返回None
+
+        Raises:
+            RenderQueueFullError: 渲染队列已满（调用方应只回复文字）
+        """
+        if not self.renderer.is_available():
+            return None
+        return await self._flights.run(
+            key, lambda: self._produce_composite(key, render, cacheable)
+        )
+
+    async def _produce_composite(
+        self, key: str, render: Callable[[], bytes], cacheable: bool
+    ) -> Optional[PanelImage]:
+        """查找缓存，未命中时绘制组合图片并写入缓存"""
+        cacheable = cacheable and self.cache_enabled
+        if cacheable:
+            path = await self.io_executor.run(self.cache.get, key)
+            if path is not None:
+                return PanelImage(path=str(path))
+
+        async def generate() -> Optional[bytes]:
+            start = time.monotonic()
+            try:
+                return await asyncio.to_thread(render)
+            except Exception as e:
+                logger.error(f"❌ 组合图片绘制失败: {e}")
+                self.metrics.inc("panel.render_errors")
+                return None
+            finally:
+                self.metrics.observe(
+                    "panel.composite", (time.monotonic() - start) * 1000
+                )
+
+        data = await self.render_queue.submit(generate)
+        if data is None:
+            return None
+        if cacheable:
+            path = await self.io_executor.run(self.cache.put, key, data)
+            if path is not None:
+                return PanelImage(path=str(path))
+        return PanelImage(data=data)
+
+    async def _produce(self, request: PanelRequest, key: str) -> Optional[PanelImage]:
+        """查找缓存，未命中时渲染或下载面板并写入缓存"""
+        if self.cache_enabled:
+            path = await self.io_executor.run(self.cache.get, key)
+            if path is not None:
+                return PanelImage(path=str(path))
+
+        data = await self.render_queue.submit(lambda: self._generate(request))
+        if data is None:
+            if self.backend == "local":
+                # 本地渲染失败时改用远程API的图片地址
+                return PanelImage(url=self.get_remote_url(request))
+            return None
+
+        if self.cache_enabled:
+            path = await self.io_executor.run(self.cache.put, key, data)
+            if path is not None:
+                return PanelImage(path=str(path))
+        return PanelImage(data=data)
+
+    async def _generate(self, request: PanelRequest) -> Optional[bytes]:
+        """渲染或下载面板图片，失败时返回None"""
+        if self.backend == "local":
+            try:
+                return await asyncio.to_thread(self.render_local, request)
+            except Exception as e:
+                logger.error(f"❌ 本地面板渲染失败，改用远程API: {e}")
+                self.metrics.inc("panel.render_errors")
+                return None
+
+        try:
+            return await self.api_service.fetch_image(**request.to_params())
+        except APIUnavailableError as e:
+            logger.warning(f"⚠️ 面板API不可用，只回复文字: {e}")
+            self.metrics.inc("panel.degraded")
+            return None
+
+    def cache_key(self, request: PanelRequest) -> str:
+        """面板缓存键：远程图片以API地址区分，本地图片以渲染器版本区分"""
+        if self.backend == "local":
+            namespace = f"local:v{self.renderer.VERSION}"
+        else:
+            namespace = f"remote:{self.api_service.api_server}"
+        return request.cache_key(namespace)
+
+    def get_remote_url(self, request: PanelRequest) -> str:
+        """生成远程面板API的图片URL"""
+        return self.api_service.get_image_url(**request.to_params())
+
+    def render_local(self, request: PanelRequest) -> bytes:
+        """
+        在当前线程中本地绘制面板，并记录渲染耗时
+
+        Args:
+            request: 面板绘制请求
+
+        Returns:
+            bytes: PNG图片内容
+        """
+        start = time.monotonic()
+        data = self.renderer.render(request)
+        self.metrics.observe("panel.render", (time.monotonic() - start) * 1000)
+        return data
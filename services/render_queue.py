@@ -0,0 +1,97 @@
+"""
+面板渲染队列
+
+限制同时进行的面板渲染/下载数量，并限制排队长度。
+队列已满时立即拒绝新的请求（削峰），由调用方降级为只回复文字，避免图片任务无限堆积。
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from ..utils.metrics import MetricsRegistry
+from ..utils.sliding_window import SlidingWindow
+
+
+class RenderQueueFullError(Exception):
+    """渲染队列已满，请求被拒绝"""
+
+
+class RenderQueue:
+    """有界的面板渲染队列"""
+
+    # 统计近期延迟的窗口长度（秒）
+    LATENCY_WINDOW = 60.0
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_queue: int = 32,
+        metrics: Optional[MetricsRegistry] = None,
+        name: str = "render_queue",
+    ):
+        """
+        初始化渲染队列
+
+        Args:
+            max_concurrency: 最多同时执行的渲染/下载数
+            max_queue: 最多排队等待的请求数，超过时拒绝新请求
+            metrics: 指标注册表（可选）
+            name: 指标名前缀
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.metrics = metrics or MetricsRegistry()
+        self.name = name
+
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._waiting = 0  # 排队等待的请求数
+        self._running = 0  # 正在执行的请求数
+        self._latency = SlidingWindow(self.LATENCY_WINDOW)  # 排队+执行的总耗时
+
+        self.metrics.register_gauge(f"{name}.waiting", lambda: self._waiting)
+        self.metrics.register_gauge(f"{name}.running", lambda: self._running)
+
+    def is_saturated(self) -> bool:
+        """执行槽已占满且排队已达上限"""
+        return self._slots.locked() and self._waiting >= self.max_queue
+
+    def recent_latency(self) -> float:
+        """最近一分钟内完成的任务从提交到完成的平均耗时（毫秒），没有任务时返回0"""
+        return self._latency.mean()
+
+    async def submit(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        排队执行一个渲染/下载任务
+
+        Args:
+            func: 返回要执行的协程的函数
+
+        Returns:
+            Any: 任务结果
+
+        Raises:
+            RenderQueueFullError: 队列已满
+        """
+        if self.is_saturated():
+            self.metrics.inc(f"{self.name}.shed")
+            raise RenderQueueFullError("面板渲染队列已满")
+
+        enqueued_at = time.monotonic()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        started_at = time.monotonic()
+        self.metrics.observe(f"{self.name}.wait", (started_at - enqueued_at) * 1000)
+        self._running += 1
+        try:
+            return await func()
+        finally:
+            self._running -= 1
+            self._slots.release()
+            finished_at = time.monotonic()
+            self.metrics.observe(f"{self.name}.exec", (finished_at - started_at) * 1000)
+            self._latency.add((finished_at - enqueued_at) * 1000, finished_at)
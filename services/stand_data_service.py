@@ -2,57 +2,154 @@
 替身数据服务
 """
 
+import asyncio
 import json
+import sqlite3
 import datetime
-from typing import Optional, Tuple, Union
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 from pathlib import Path
 from astrbot.api import logger
 
 from ..models.stand_models import StandData
+from .stand_storage import BaseStandStorage, JsonStandStorage, SQLiteStandStorage
+from .storage_migrator import ImportingStandStorage, JsonToSQLiteMigrator
+from ..utils.io_executor import IOExecutor
+from .write_behind_storage import WriteBehindStorage
+from ..utils.lru_cache import LRUCache
+from ..utils.metrics import MetricsRegistry
+from ..utils.shared_state import SharedStateBackend, SharedStateError
+from ..utils.striped_lock import StripedLock
 
 
 class StandDataService:
     """替身数据服务"""
 
-    def __init__(self, timezone, data_dir_path: Union[str, Path]):
+    # 支持的存储引擎
+    STORAGE_ENGINES = ("json", "sqlite")
+
+    # 用户写操作分段锁的数量
+    USER_LOCK_STRIPES = 256
+
+    # 共享状态中每日觉醒次数计数器的键前缀
+    AWAKEN_COUNTER_PREFIX = "awaken:"
+
+    def __init__(
+        self,
+        timezone,
+        data_dir_path: Union[str, Path],
+        storage_engine: str = "json",
+        io_executor: Optional[IOExecutor] = None,
+        stand_cache: Optional[LRUCache] = None,
+        awaken_retention_days: int = 30,
+        write_behind_max_pending: int = 0,
+        metrics: Optional[MetricsRegistry] = None,
+        fsync_policy: str = "batched",
+        shared_state: Optional[SharedStateBackend] = None,
+    ):
         """
         初始化服务
 
         Args:
             timezone: 时区对象
             data_dir_path: 数据目录路径（必需）
+            storage_engine: 存储引擎："json"(每用户一个文件)、"sqlite"(单数据库)
+            io_executor: 执行阻塞读写的I/O线程池，异步接口（a开头的方法）使用
+            stand_cache: 替身数据的LRU缓存，缓存 {user_id: (版本标识, StandData)}
+            awaken_retention_days: 觉醒记录保留的历史天数，0为只保留累计值
+            write_behind_max_pending: 大于0时启用延迟写入，积压达到该数量时立即批量刷新
+            metrics: 指标注册表（可选）
+            fsync_policy: 落盘策略："always"(每次写入fsync)、"batched"(定时fsync)、"never"
+            shared_state: 跨进程共享状态后端（可选），配置后每日觉醒次数以其中的计数为准
         """
         self.timezone = timezone
+        self.awaken_retention_days = awaken_retention_days
+        self.fsync_policy = fsync_policy
+        self.shared_state = shared_state
         # 转换为Path对象
         self.data_dir_path = Path(data_dir_path)
 
-        # 创建必要的目录
-        self._ensure_data_dirs()
+        # 创建存储引擎（从JSON切换到SQLite时，旧数据由后台任务导入）
+        self._importing_storage: Optional[ImportingStandStorage] = None
+        self.storage = self._create_storage(storage_engine)
+        if write_behind_max_pending > 0:
+            self.storage = WriteBehindStorage(
+                self.storage, write_behind_max_pending, metrics
+            )
+        self.io_executor = io_executor or IOExecutor()
+        self.stand_cache = stand_cache if stand_cache is not None else LRUCache(0)
+        # 按用户分段的异步锁：同一用户的写操作串行执行，不同用户互不阻塞
+        self.user_locks = StripedLock(self.USER_LOCK_STRIPES)
+        # 压缩、布局迁移等长时间运行的维护任务在单独的线程中执行，
+        # 插件卸载时通过停止信号让它们在当前批次结束后返回，并在关闭存储前等待线程结束
+        self.stop_event = threading.Event()
+        self._maintenance_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="stand_maintenance"
+        )
 
-    def _ensure_data_dirs(self):
-        """确保数据目录存在"""
-        try:
-            stands_dir = self.data_dir_path / "stands"
-            awaken_dir = self.data_dir_path / "awaken_records"
+    def _create_storage(self, storage_engine: str) -> BaseStandStorage:
+        """
+        根据配置创建存储引擎
 
-            stands_dir.mkdir(parents=True, exist_ok=True)
-            awaken_dir.mkdir(parents=True, exist_ok=True)
-        except (PermissionError, OSError) as e:
-            logger.error(f"❌ 无法创建数据目录: {e}")
-            raise
+        Args:
+            storage_engine: 存储引擎名称
 
-    def _get_user_stand_file(self, user_id: str) -> Path:
-        """获取用户替身数据文件路径"""
-        return self.data_dir_path / "stands" / f"{user_id}.json"
+        Returns:
+            BaseStandStorage: 存储引擎实例
+        """
+        if storage_engine not in self.STORAGE_ENGINES:
+            logger.warning(f"⚠️ 未知的存储引擎 {storage_engine}，使用默认的json存储")
+            storage_engine = "json"
+
+        if storage_engine == "json":
+            return JsonStandStorage(
+                self.data_dir_path, self.awaken_retention_days, self.fsync_policy
+            )
 
-    def _get_awaken_records_file(self, user_id: str) -> Path:
+        sqlite_storage = SQLiteStandStorage(
+            self.data_dir_path / "stands.db",
+            self.awaken_retention_days,
+            self.fsync_policy,
+        )
+        # 只有存在未导入的旧JSON数据时才创建JSON存储引擎（它会创建目录和锁文件）
+        if (
+            not JsonToSQLiteMigrator.has_legacy_data(self.data_dir_path)
+            or sqlite_storage.get_meta(JsonToSQLiteMigrator.META_DONE) == "1"
+        ):
+            return sqlite_storage
+
+        json_storage = JsonStandStorage(
+            self.data_dir_path, self.awaken_retention_days, self.fsync_policy
+        )
+        self._importing_storage = ImportingStandStorage(sqlite_storage, json_storage)
+        return self._importing_storage
+
+    def stop_background_work(self) -> None:
+        """通知后台维护任务（压缩、布局迁移、SQLite导入）尽快停止"""
+        self.stop_event.set()
+
+    def close(self) -> None:
         """
-        获取觉醒记录文件路径
+        关闭存储引擎（延迟写入模式下会先把积压的写入全部落盘）
 
-        Args:
-            user_id: 用户ID
+        先停止并等待后台维护线程，避免其在存储关闭后继续读写。
         """
-        return self.data_dir_path / "awaken_records" / f"user_{user_id}.json"
+        self.stop_background_work()
+        self._maintenance_executor.shutdown(wait=True)
+        self.storage.close()
+
+    def flush_writes(self) -> int:
+        """
+        把延迟写入的积压数据落盘
+
+        Returns:
+            int: 写入的条目数，未启用延迟写入时为0
+        """
+        if isinstance(self.storage, WriteBehindStorage):
+            return self.storage.flush()
+        return 0
 
     def save_user_stand(
         self,
@@ -81,15 +178,15 @@ class StandDataService:
             acquisition_method=acquisition_method,
         )
 
-        # 保存到文件
-        file_path = self._get_user_stand_file(user_id)
+        # 保存到存储引擎，并使缓存失效
+        # （不写穿透：保存和读取版本号之间可能有其他进程写入，缓存会对应错误的版本）
         try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(stand_data.to_dict(), f, ensure_ascii=False, indent=2)
-        except (IOError, PermissionError, OSError) as e:
+            self.storage.save_stand(user_id, stand_data.to_dict())
+            self.stand_cache.invalidate(user_id)
+        except (IOError, PermissionError, OSError, sqlite3.Error) as e:
             logger.error(f"❌ 文件保存失败: {e}")
             raise
-        except json.JSONDecodeError as e:
+        except (TypeError, ValueError) as e:
             logger.error(f"❌ JSON序列化失败: {e}")
             raise
 
@@ -103,22 +200,51 @@ class StandDataService:
         Returns:
             StandData: 替身数据对象，如果不存在返回None
         """
-        file_path = self._get_user_stand_file(user_id)
-
-        if not file_path.exists():
-            return None
-
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                user_data = json.load(f)
-            return StandData.from_dict(user_id, user_data)
-        except (IOError, PermissionError, OSError) as e:
+            # 先用廉价的版本检查（如文件mtime）确认缓存仍然有效。
+            # 版本号必须在读取数据之前获取：读取期间发生的写入会让版本号变化，
+            # 与旧数据一起缓存的旧版本号在下次读取时不会命中
+            if self.stand_cache.enabled:
+                version = self.storage.stand_version(user_id)
+                cached = self.stand_cache.get(user_id)
+                if cached is not LRUCache.MISSING and cached[0] == version:
+                    self.stand_cache.record_hit()
+                    return cached[1]
+                self.stand_cache.record_miss()
+
+            user_data = self.storage.load_stand(user_id)
+        except (IOError, PermissionError, OSError, sqlite3.Error) as e:
             logger.error(f"❌ 读取替身数据失败: {e}")
             return None
         except json.JSONDecodeError as e:
             logger.error(f"❌ JSON解析失败: {e}")
             return None
 
+        stand_data = (
+            StandData.from_dict(user_id, user_data) if user_data is not None else None
+        )
+        if self.stand_cache.enabled:
+            # 不存在的替身同样缓存，避免反复查询没有替身的用户
+            self.stand_cache.put(user_id, (version, stand_data))
+        return stand_data
+
+    def get_user_stands(self, user_ids: List[str]) -> Dict[str, StandData]:
+        """
+        批量获取多个用户的替身数据（在一次线程池调用中完成）
+
+        Args:
+            user_ids: 用户ID列表
+
+        Returns:
+            Dict[str, StandData]: {用户ID: 替身数据}，没有替身的用户不包含在内
+        """
+        stands = {}
+        for user_id in user_ids:
+            stand_data = self.get_user_stand(user_id)
+            if stand_data is not None:
+                stands[user_id] = stand_data
+        return stands
+
     def save_awaken_record(self, user_id: str) -> None:
         """
         记录用户今日觉醒记录
@@ -128,29 +254,22 @@ class StandDataService:
         """
         today = datetime.datetime.now(self.timezone).strftime("%Y-%m-%d")
 
-        file_path = self._get_awaken_records_file(user_id)
-
         try:
-            # 读取用户的觉醒记录
-            user_awaken_records = {}
-            if file_path.exists():
-                with open(file_path, "r", encoding="utf-8") as f:
-                    user_awaken_records = json.load(f)
+            # 读取用户今日的觉醒记录
+            current_record = self.storage.load_awaken_record(user_id, today) or {
+                "count": 0
+            }
 
             # 更新今日记录
-            current_record = user_awaken_records.get(today, {"count": 0})
-            current_record["count"] += 1
+            current_record["count"] = current_record.get("count", 0) + 1
             current_record["last_awaken_time"] = datetime.datetime.now(
                 self.timezone
             ).strftime("%Y-%m-%d %H:%M:%S")
 
-            user_awaken_records[today] = current_record
-
-            # 保存到文件
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(user_awaken_records, f, ensure_ascii=False, indent=2)
+            # 保存到存储引擎
+            self.storage.save_awaken_record(user_id, today, current_record)
 
-        except (IOError, PermissionError, OSError) as e:
+        except (IOError, PermissionError, OSError, sqlite3.Error) as e:
             logger.error(f"❌ 保存觉醒记录失败: {e}")
             raise
         except json.JSONDecodeError as e:
@@ -179,40 +298,147 @@ class StandDataService:
             return True, ""
 
         today = datetime.datetime.now(self.timezone).strftime("%Y-%m-%d")
-        file_path = self._get_awaken_records_file(user_id)
-
-        # 读取用户觉醒记录
-        user_awaken_records = {}
-        if file_path.exists():
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    user_awaken_records = json.load(f)
-            except (IOError, PermissionError, OSError, json.JSONDecodeError) as e:
-                logger.error(f"❌ 读取觉醒记录失败: {e}")
-                # 读取失败时拒绝觉醒，保证限制功能的健壮性
-                return False, "❌ 系统错误，暂时无法觉醒，请稍后再试"
+
+        # 读取用户今日觉醒记录
+        try:
+            today_record = self.storage.load_awaken_record(user_id, today) or {}
+        except (
+            IOError,
+            PermissionError,
+            OSError,
+            json.JSONDecodeError,
+            sqlite3.Error,
+        ) as e:
+            logger.error(f"❌ 读取觉醒记录失败: {e}")
+            # 读取失败时拒绝觉醒，保证限制功能的健壮性
+            return False, "❌ 系统错误，暂时无法觉醒，请稍后再试"
 
         # 检查今日记录
-        today_record = user_awaken_records.get(today, {})
         today_count = today_record.get("count", 0)
 
         if today_count >= daily_limit:
             last_awaken_time = today_record.get("last_awaken_time", "未知时间")
-            tomorrow = (
-                datetime.datetime.now(self.timezone) + datetime.timedelta(days=1)
-            ).strftime("%Y-%m-%d")
-            # 使用资源文件中的文本
-            from ..resources import UITexts
-
-            error_message = UITexts.AWAKEN_LIMIT_EXCEEDED.format(
-                last_awaken_time=last_awaken_time,
-                daily_limit=daily_limit,
-                tomorrow=tomorrow,
-            )
-            return (False, error_message)
+            return (False, self._format_limit_message(last_awaken_time, daily_limit))
 
         return True, ""
 
+    def try_consume_awaken(
+        self, user_id: str, daily_limit: int = 1, amount: int = 1
+    ) -> Tuple[bool, int, Optional[str], str]:
+        """
+        原子地检查并消耗今日觉醒次数
+
+        只读取和写入一次觉醒记录，代替 check_awaken_limit + save_awaken_record +
+        get_today_awaken_count 的组合调用，检查和计数之间不会被其他写入打断。
+        批量觉醒时 amount 次一起扣除，剩余次数不足时一次也不扣除。
+
+        Args:
+            user_id: 用户ID
+            daily_limit: 每日限制次数，-1为不限次数，0为禁用
+            amount: 本次消耗的次数
+
+        Returns:
+            tuple[bool, int, Optional[str], str]:
+                (是否可以觉醒, 今日已觉醒次数（含本次）, 最后觉醒时间, 提示消息)
+        """
+        # 如果设置为0，禁用觉醒功能
+        if daily_limit == 0:
+            return False, 0, None, "❌ 觉醒功能已被管理员禁用！"
+
+        now = datetime.datetime.now(self.timezone)
+        today = now.strftime("%Y-%m-%d")
+        awaken_time = now.strftime("%Y-%m-%d %H:%M:%S")
+
+        try:
+            if self.shared_state is not None:
+                allowed, count, last_awaken_time = self._consume_shared_awaken(
+                    user_id, today, awaken_time, daily_limit, amount
+                )
+            else:
+                allowed, count, last_awaken_time = self.storage.consume_awaken(
+                    user_id, today, awaken_time, daily_limit, amount
+                )
+        except (
+            IOError,
+            PermissionError,
+            OSError,
+            json.JSONDecodeError,
+            sqlite3.Error,
+            SharedStateError,
+        ) as e:
+            logger.error(f"❌ 更新觉醒记录失败: {e}")
+            # 失败时拒绝觉醒，保证限制功能的健壮性
+            return False, 0, None, "❌ 系统错误，暂时无法觉醒，请稍后再试"
+
+        if not allowed:
+            if count < daily_limit:
+                # 还有剩余次数，但不足本次批量消耗的数量
+                from ..resources import UITexts
+
+                message = UITexts.AWAKEN_BATCH_INSUFFICIENT.format(
+                    remaining=daily_limit - count, amount=amount
+                )
+            else:
+                message = self._format_limit_message(
+                    last_awaken_time or "未知时间", daily_limit
+                )
+            return False, count, last_awaken_time, message
+
+        return True, count, last_awaken_time, ""
+
+    def _consume_shared_awaken(
+        self,
+        user_id: str,
+        date: str,
+        awaken_time: str,
+        daily_limit: int,
+        amount: int,
+    ) -> Tuple[bool, int, Optional[str]]:
+        """
+        在共享状态中原子地检查并消耗觉醒次数，再把结果写入本地觉醒记录
+
+        多个进程共用数据目录时，次数限制以共享状态中的计数为准；觉醒记录只用于显示和统计。
+        当天的计数器不存在时（如刚启用共享状态）以觉醒记录中的今日次数为初始值。
+        """
+        record = self.storage.load_awaken_record(user_id, date) or {}
+        allowed, count = self.shared_state.consume_counter(
+            self.AWAKEN_COUNTER_PREFIX + user_id,
+            date,
+            daily_limit,
+            amount,
+            initial=record.get("count", 0),
+        )
+        if not allowed:
+            return False, count, record.get("last_awaken_time")
+
+        self.storage.save_awaken_record(
+            user_id, date, {"count": count, "last_awaken_time": awaken_time}
+        )
+        return True, count, awaken_time
+
+    def _format_limit_message(self, last_awaken_time: str, daily_limit: int) -> str:
+        """
+        生成觉醒次数已用完的提示消息
+
+        Args:
+            last_awaken_time: 最后一次觉醒时间
+            daily_limit: 每日限制次数
+
+        Returns:
+            str: 提示消息
+        """
+        tomorrow = (
+            datetime.datetime.now(self.timezone) + datetime.timedelta(days=1)
+        ).strftime("%Y-%m-%d")
+        # 使用资源文件中的文本
+        from ..resources import UITexts
+
+        return UITexts.AWAKEN_LIMIT_EXCEEDED.format(
+            last_awaken_time=last_awaken_time,
+            daily_limit=daily_limit,
+            tomorrow=tomorrow,
+        )
+
     def get_today_awaken_count(self, user_id: str) -> int:
         """
         获取用户今日已使用的觉醒次数
@@ -224,16 +450,126 @@ class StandDataService:
             int: 今日已使用的觉醒次数
         """
         today = datetime.datetime.now(self.timezone).strftime("%Y-%m-%d")
-        file_path = self._get_awaken_records_file(user_id)
-
-        if not file_path.exists():
-            return 0
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                user_awaken_records = json.load(f)
-            today_record = user_awaken_records.get(today, {})
-            return today_record.get("count", 0)
-        except (IOError, PermissionError, OSError, json.JSONDecodeError) as e:
+            today_record = self.storage.load_awaken_record(user_id, today) or {}
+            count = today_record.get("count", 0)
+            if self.shared_state is not None:
+                # 其他进程的觉醒可能还没有写入本地记录，以共享计数为准
+                count = max(
+                    count,
+                    self.shared_state.get_counter(
+                        self.AWAKEN_COUNTER_PREFIX + user_id, today
+                    ),
+                )
+            return count
+        except (
+            IOError,
+            PermissionError,
+            OSError,
+            json.JSONDecodeError,
+            sqlite3.Error,
+            SharedStateError,
+        ) as e:
             logger.error(f"❌ 读取觉醒记录失败: {e}")
             return 0
+
+    def compact_awaken_records(self) -> int:
+        """
+        按保留策略压缩所有用户的觉醒记录
+
+        Returns:
+            int: 被压缩的文件数（json）或被归档的记录数（sqlite）
+        """
+        today = datetime.datetime.now(self.timezone).strftime("%Y-%m-%d")
+        return self.storage.compact_awaken_records(today, self.stop_event)
+
+    async def run_awaken_compaction(self) -> None:
+        """后台批量压缩觉醒记录"""
+        start = time.monotonic()
+        compacted = await self._run_maintenance(self.compact_awaken_records)
+        logger.info(
+            f"🧹 觉醒记录压缩完成：{compacted} 项，耗时 {time.monotonic() - start:.1f} 秒"
+        )
+
+    async def run_sqlite_import(self) -> None:
+        """后台把旧的JSON数据导入SQLite（可中断后继续），导入完成前读取回退到JSON"""
+        if self._importing_storage is None or not self._importing_storage.importing:
+            return
+        start = time.monotonic()
+        await self.io_executor.run(self._importing_storage.run_import, self.stop_event)
+        if self._importing_storage.importing:
+            return
+        logger.info(f"🗄️ 旧JSON数据导入SQLite耗时 {time.monotonic() - start:.1f} 秒")
+
+    async def _run_maintenance(self, func, *args):
+        """在维护线程中执行阻塞函数（不占用I/O线程池，由存储引擎内部限速）"""
+        return await asyncio.wrap_future(self._maintenance_executor.submit(func, *args))
+
+    async def run_layout_migration(self) -> None:
+        """后台把旧版平铺目录中的文件迁移到分片目录（存储引擎内部分批限速）"""
+        start = time.monotonic()
+        moved = await self._run_maintenance(
+            self.storage.migrate_layout, self.stop_event
+        )
+        if moved:
+            logger.info(
+                f"📂 数据目录布局迁移：移动 {moved} 个文件，耗时 {time.monotonic() - start:.1f} 秒"
+            )
+
+    # ==================== 异步接口 ====================
+    # 以下方法在专用I/O线程池中执行对应的同步方法，供指令处理器在事件循环中调用。
+    # 所有写操作都持有该用户的分段锁，保证同一用户的"读-改-写"不会交错执行。
+
+    async def aget_user_stand(self, user_id: str) -> Optional[StandData]:
+        """异步获取用户的替身数据，参见 get_user_stand"""
+        return await self.io_executor.run(self.get_user_stand, user_id)
+
+    async def aget_user_stands(self, user_ids: List[str]) -> Dict[str, StandData]:
+        """异步批量获取替身数据，参见 get_user_stands"""
+        return await self.io_executor.run(self.get_user_stands, user_ids)
+
+    async def asave_user_stand(
+        self,
+        user_id: str,
+        abilities: str,
+        name: Optional[str] = None,
+        acquisition_method: str = "unknown",
+    ) -> None:
+        """异步保存用户的替身数据，参见 save_user_stand"""
+        async with self.user_locks.for_key(user_id):
+            await self.io_executor.run(
+                self.save_user_stand, user_id, abilities, name, acquisition_method
+            )
+
+    async def asave_awaken_record(self, user_id: str) -> None:
+        """异步记录用户今日觉醒记录，参见 save_awaken_record"""
+        async with self.user_locks.for_key(user_id):
+            await self.io_executor.run(self.save_awaken_record, user_id)
+
+    async def acheck_awaken_limit(
+        self, user_id: str, daily_limit: int = 1
+    ) -> Tuple[bool, str]:
+        """异步检查用户今日觉醒次数限制，参见 check_awaken_limit"""
+        return await self.io_executor.run(self.check_awaken_limit, user_id, daily_limit)
+
+    async def atry_consume_awaken(
+        self, user_id: str, daily_limit: int = 1, amount: int = 1
+    ) -> Tuple[bool, int, Optional[str], str]:
+        """异步检查并消耗今日觉醒次数，参见 try_consume_awaken"""
+        async with self.user_locks.for_key(user_id):
+            return await self.io_executor.run(
+                self.try_consume_awaken, user_id, daily_limit, amount
+            )
+
+    async def aflush_writes(self) -> int:
+        """异步把延迟写入的积压数据落盘，参见 flush_writes"""
+        return await self.io_executor.run(self.flush_writes)
+
+    async def afsync_pending(self) -> int:
+        """异步把尚未落盘的写入同步到磁盘（batched 落盘策略的定时任务）"""
+        return await self.io_executor.run(self.storage.fsync_pending)
+
+    async def aget_today_awaken_count(self, user_id: str) -> int:
+        """异步获取用户今日已使用的觉醒次数，参见 get_today_awaken_count"""
+        return await self.io_executor.run(self.get_today_awaken_count, user_id)
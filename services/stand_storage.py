@@ -0,0 +1,1023 @@
+"""
+替身数据存储引擎
+
+StandDataService 只负责业务逻辑，具体的读写由存储引擎完成：
+- JsonStandStorage: 每个用户一个JSON文件（旧版默认方式）
+- SQLiteStandStorage: 单个SQLite数据库（WAL模式），适合大量用户
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Hashable, Iterator, Optional, Set, Tuple
+
+from astrbot.api import logger
+
+from ..utils.atomic_file import AtomicFileWriter
+from ..utils.file_lock import FileLock
+
+
+class BaseStandStorage:
+    """存储引擎基类"""
+
+    def load_stand(self, user_id: str) -> Optional[dict]:
+        """
+        读取用户替身数据
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            dict: 替身数据字典，不存在时返回None
+        """
+        raise NotImplementedError
+
+    def save_stand(self, user_id: str, data: dict) -> None:
+        """
+        保存用户替身数据
+
+        Args:
+            user_id: 用户ID
+            data: 替身数据字典（StandData.to_dict()）
+        """
+        raise NotImplementedError
+
+    def stand_version(self, user_id: str) -> Hashable:
+        """
+        获取用户替身数据的版本标识，用于判断缓存是否仍然有效
+
+        版本标识必须能廉价地获取（不读取数据内容），数据在进程外被修改时应发生变化。
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            Hashable: 版本标识，数据不存在时返回None
+        """
+        raise NotImplementedError
+
+    def load_awaken_record(self, user_id: str, date: str) -> Optional[dict]:
+        """
+        读取用户某一天的觉醒记录
+
+        Args:
+            user_id: 用户ID
+            date: 日期（YYYY-MM-DD）
+
+        Returns:
+            dict: {"count": int, "last_awaken_time": str}，不存在时返回None
+        """
+        raise NotImplementedError
+
+    def save_awaken_record(self, user_id: str, date: str, record: dict) -> None:
+        """
+        保存用户某一天的觉醒记录
+
+        Args:
+            user_id: 用户ID
+            date: 日期（YYYY-MM-DD）
+            record: {"count": int, "last_awaken_time": str}
+        """
+        raise NotImplementedError
+
+    def consume_awaken(
+        self,
+        user_id: str,
+        date: str,
+        awaken_time: str,
+        daily_limit: int,
+        amount: int = 1,
+    ) -> Tuple[bool, int, Optional[str]]:
+        """
+        检查并消耗觉醒次数，只读取和写入一次记录
+
+        剩余次数不足 amount 时一次也不消耗。
+
+        Args:
+            user_id: 用户ID
+            date: 日期（YYYY-MM-DD）
+            awaken_time: 本次觉醒时间
+            daily_limit: 每日限制次数，小于0为不限次数
+            amount: 本次消耗的次数（批量觉醒时大于1）
+
+        Returns:
+            tuple[bool, int, Optional[str]]:
+                (是否允许, 今日次数（允许时含本次）, 最后觉醒时间)
+        """
+        raise NotImplementedError
+
+    def write_batch(
+        self,
+        stands: Dict[str, dict],
+        awaken_records: Dict[Tuple[str, str], dict],
+    ) -> None:
+        """
+        批量写入替身数据和觉醒记录
+
+        Args:
+            stands: {user_id: 替身数据字典}
+            awaken_records: {(user_id, date): 觉醒记录}
+        """
+        for user_id, data in stands.items():
+            self.save_stand(user_id, data)
+        for (user_id, date), record in awaken_records.items():
+            self.save_awaken_record(user_id, date, record)
+
+    def compact_awaken_records(
+        self, date: str, stop_event: Optional[threading.Event] = None
+    ) -> int:
+        """
+        按保留策略批量压缩觉醒记录（后台任务调用）
+
+        Args:
+            date: 今日日期（YYYY-MM-DD），早于保留期限的记录会被归档
+            stop_event: 停止信号（可选），设置后在当前批次结束时返回
+
+        Returns:
+            int: 被压缩的用户数或记录数
+        """
+        raise NotImplementedError
+
+    def migrate_layout(self, stop_event: Optional[threading.Event] = None) -> int:
+        """
+        在后台把旧版数据布局迁移到新布局（不需要迁移的存储引擎直接返回0）
+
+        Args:
+            stop_event: 停止信号（可选），设置后尽快返回，下次启动时继续迁移
+
+        Returns:
+            int: 本次迁移的文件数
+        """
+        return 0
+
+    def fsync_pending(self) -> int:
+        """
+        把尚未落盘的写入同步到磁盘（batched 落盘策略下由定时任务调用）
+
+        Returns:
+            int: 本次落盘的文件数或页数
+        """
+        return 0
+
+    def close(self) -> None:
+        """释放存储引擎持有的资源"""
+
+
+def is_stopped(stop_event: Optional[threading.Event]) -> bool:
+    """后台批处理是否收到了停止信号（插件卸载时设置）"""
+    return stop_event is not None and stop_event.is_set()
+
+
+def pause_batch(stop_event: Optional[threading.Event], pause: float) -> None:
+    """批次之间暂停，收到停止信号时立即结束等待"""
+    if stop_event is None:
+        time.sleep(pause)
+    else:
+        stop_event.wait(pause)
+
+
+def retention_cutoff(date: str, retention_days: int) -> str:
+    """
+    计算觉醒记录的保留截止日期，早于该日期的逐日记录只保留累计值
+
+    Args:
+        date: 今日日期（YYYY-MM-DD）
+        retention_days: 保留的历史天数，0为只保留累计值
+
+    Returns:
+        str: 截止日期（YYYY-MM-DD）
+    """
+    today = datetime.date.fromisoformat(date)
+    return (today - datetime.timedelta(days=max(0, retention_days))).isoformat()
+
+
+class JsonStandStorage(BaseStandStorage):
+    """
+    JSON文件存储引擎，每个用户一个文件
+
+    觉醒记录使用紧凑格式，今日计数固定保存在 "today" 字段中：
+    {
+        "version": 2,
+        "today": {"date": "2024-01-01", "count": 1, "last_awaken_time": "..."},
+        "history": {"2023-12-31": 2},   # 保留期内的逐日次数
+        "archived_total": 10             # 超出保留期的累计次数
+    }
+    旧版按日期索引的文件会在下次写入时自动转换为紧凑格式。
+
+    文件按用户ID的哈希前缀分目录存放（stands/ab/cd/{user_id}.json），
+    避免单个目录下文件过多。旧版平铺目录中的文件在迁移完成前仍然可以读取，
+    数据目录下的 layout_version.json 记录当前的目录布局版本。
+    """
+
+    AWAKEN_RECORDS_VERSION = 2
+
+    # 目录布局版本：1为平铺目录（旧版），2为哈希分片目录
+    LAYOUT_FLAT = 1
+    LAYOUT_SHARDED = 2
+
+    # 觉醒记录文件锁的数量，用户按ID哈希分配到其中一把
+    AWAKEN_LOCK_STRIPES = 64
+
+    def __init__(
+        self,
+        data_dir_path: Path,
+        retention_days: int = 30,
+        fsync_policy: str = "batched",
+    ):
+        """
+        初始化JSON存储引擎
+
+        Args:
+            data_dir_path: 数据目录路径
+            retention_days: 觉醒记录保留的历史天数，0为只保留累计值
+            fsync_policy: 落盘策略："always"、"batched"、"never"
+        """
+        self.data_dir_path = Path(data_dir_path)
+        self.retention_days = retention_days
+        self.file_writer = AtomicFileWriter(fsync_policy)
+        self.stands_dir = self.data_dir_path / "stands"
+        self.awaken_dir = self.data_dir_path / "awaken_records"
+        self.layout_file = self.data_dir_path / "layout_version.json"
+        # 觉醒记录是"读-改-写"，同一用户在多个I/O线程以及共用数据目录的多个进程中的操作需要互斥
+        self.lock_dir = self.data_dir_path / "locks"
+        self._awaken_file_locks = [
+            FileLock(self.lock_dir / f"awaken_{stripe}.lock")
+            for stripe in range(self.AWAKEN_LOCK_STRIPES)
+        ]
+        # 已确认存在的分片目录，避免每次写入都调用 mkdir
+        self._known_dirs: Set[Path] = set()
+
+        try:
+            self.stands_dir.mkdir(parents=True, exist_ok=True)
+            self.awaken_dir.mkdir(parents=True, exist_ok=True)
+            self.lock_dir.mkdir(parents=True, exist_ok=True)
+            self.layout_version = self._load_layout_version()
+        except (PermissionError, OSError) as e:
+            logger.error(f"❌ 无法创建数据目录: {e}")
+            raise
+
+    def _load_layout_version(self) -> int:
+        """读取目录布局版本，新的数据目录直接使用分片布局"""
+        data = self._read_json(self.layout_file)
+        if data is not None:
+            return data.get("layout_version", self.LAYOUT_FLAT)
+
+        if self._has_flat_files():
+            logger.info("📂 检测到旧版平铺目录布局，将在后台迁移到分片目录")
+            return self.LAYOUT_FLAT
+
+        self._write_layout_version(self.LAYOUT_SHARDED)
+        return self.LAYOUT_SHARDED
+
+    def _write_layout_version(self, version: int) -> None:
+        """写入目录布局版本标记"""
+        self.file_writer.write_json(self.layout_file, {"layout_version": version})
+
+    def _has_flat_files(self) -> bool:
+        """检查平铺目录中是否还有旧版文件"""
+        for _ in self._iter_flat_files(self.stands_dir, ""):
+            return True
+        for _ in self._iter_flat_files(self.awaken_dir, "user_"):
+            return True
+        return False
+
+    @property
+    def _reads_legacy(self) -> bool:
+        """迁移完成前，读取时需要回退到平铺目录"""
+        return self.layout_version < self.LAYOUT_SHARDED
+
+    def _awaken_lock(self, user_id: str) -> FileLock:
+        """获取用户觉醒记录对应的文件锁"""
+        stripe = zlib.crc32(user_id.encode("utf-8")) % self.AWAKEN_LOCK_STRIPES
+        return self._awaken_file_locks[stripe]
+
+    @staticmethod
+    def _shard(user_id: str) -> Tuple[str, str]:
+        """根据用户ID的哈希计算两级分片目录名"""
+        digest = hashlib.md5(user_id.encode("utf-8")).hexdigest()
+        return digest[:2], digest[2:4]
+
+    def _get_user_stand_file(self, user_id: str) -> Path:
+        """获取用户替身数据文件路径（分片布局）"""
+        first, second = self._shard(user_id)
+        return self.stands_dir / first / second / f"{user_id}.json"
+
+    def _get_awaken_records_file(self, user_id: str) -> Path:
+        """获取觉醒记录文件路径（分片布局）"""
+        first, second = self._shard(user_id)
+        return self.awaken_dir / first / second / f"user_{user_id}.json"
+
+    def _get_legacy_stand_file(self, user_id: str) -> Path:
+        """获取旧版平铺布局下的替身数据文件路径"""
+        return self.stands_dir / f"{user_id}.json"
+
+    def _get_legacy_awaken_records_file(self, user_id: str) -> Path:
+        """获取旧版平铺布局下的觉醒记录文件路径"""
+        return self.awaken_dir / f"user_{user_id}.json"
+
+    def _read_json(self, file_path: Path) -> Optional[dict]:
+        """读取JSON文件，文件不存在时返回None"""
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _read_stand_json(self, user_id: str) -> Optional[dict]:
+        """读取替身数据文件，迁移期间回退到平铺目录"""
+        data = self._read_json(self._get_user_stand_file(user_id))
+        if data is None and self._reads_legacy:
+            data = self._read_json(self._get_legacy_stand_file(user_id))
+        return data
+
+    def _read_awaken_json(self, user_id: str) -> Optional[dict]:
+        """读取觉醒记录文件，迁移期间回退到平铺目录"""
+        data = self._read_json(self._get_awaken_records_file(user_id))
+        if data is None and self._reads_legacy:
+            data = self._read_json(self._get_legacy_awaken_records_file(user_id))
+        return data
+
+    def _write_json(self, file_path: Path, data: dict) -> None:
+        """原子地写入JSON文件（临时文件 + os.replace），崩溃时不会留下半个文件"""
+        self._ensure_parent(file_path)
+        self.file_writer.write_json(file_path, data)
+
+    def _ensure_parent(self, file_path: Path) -> None:
+        """确保分片目录存在"""
+        parent = file_path.parent
+        if parent not in self._known_dirs:
+            parent.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(parent)
+
+    def fsync_pending(self) -> int:
+        return self.file_writer.sync_pending()
+
+    def close(self) -> None:
+        for lock in self._awaken_file_locks:
+            lock.close()
+
+    def load_stand(self, user_id: str) -> Optional[dict]:
+        return self._read_stand_json(user_id)
+
+    def save_stand(self, user_id: str, data: dict) -> None:
+        self._write_json(self._get_user_stand_file(user_id), data)
+
+    def stand_version(self, user_id: str) -> Hashable:
+        # 使用 (mtime, inode, size) 识别文件被进程外修改或替换
+        try:
+            stat = self._get_user_stand_file(user_id).stat()
+        except FileNotFoundError:
+            if not self._reads_legacy:
+                return None
+            try:
+                stat = self._get_legacy_stand_file(user_id).stat()
+            except FileNotFoundError:
+                return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def load_awaken_records(self, user_id: str) -> dict:
+        """读取用户的全部觉醒记录（按日期索引）"""
+        return self.expand_awaken_records(self._read_awaken_json(user_id))
+
+    def load_awaken_record(self, user_id: str, date: str) -> Optional[dict]:
+        data = self._read_awaken_json(user_id)
+        if data is None:
+            return None
+        if data.get("version") != self.AWAKEN_RECORDS_VERSION:
+            # 旧版格式：按日期索引
+            return data.get(date)
+
+        today = data.get("today")
+        if today and today.get("date") == date:
+            return {
+                "count": today.get("count", 0),
+                "last_awaken_time": today.get("last_awaken_time"),
+            }
+        if date in data.get("history", {}):
+            return {"count": data["history"][date]}
+        return None
+
+    def save_awaken_record(self, user_id: str, date: str, record: dict) -> None:
+        file_path = self._get_awaken_records_file(user_id)
+        with self._awaken_lock(user_id):
+            data = self._compact(self._read_awaken_json(user_id), date)
+            data["today"] = {
+                "date": date,
+                "count": record.get("count", 0),
+                "last_awaken_time": record.get("last_awaken_time"),
+            }
+            self._write_json(file_path, data)
+
+    def consume_awaken(
+        self,
+        user_id: str,
+        date: str,
+        awaken_time: str,
+        daily_limit: int,
+        amount: int = 1,
+    ) -> Tuple[bool, int, Optional[str]]:
+        file_path = self._get_awaken_records_file(user_id)
+        with self._awaken_lock(user_id):
+            data = self._compact(self._read_awaken_json(user_id), date)
+            today = data["today"] or {"date": date, "count": 0}
+            count = today.get("count", 0)
+            last_awaken_time = today.get("last_awaken_time")
+
+            if 0 <= daily_limit < count + amount:
+                return False, count, last_awaken_time
+
+            count += amount
+            data["today"] = {
+                "date": date,
+                "count": count,
+                "last_awaken_time": awaken_time,
+            }
+            self._write_json(file_path, data)
+        return True, count, awaken_time
+
+    def compact_awaken_records(
+        self,
+        date: str,
+        stop_event: Optional[threading.Event] = None,
+        batch_size: int = 200,
+        pause: float = 0.05,
+    ) -> int:
+        """
+        批量压缩所有觉醒记录文件
+
+        Args:
+            date: 今日日期（YYYY-MM-DD）
+            stop_event: 停止信号（可选），设置后在当前文件处理完时返回
+            batch_size: 每处理多少个文件暂停一次
+            pause: 每批之间的暂停时间（秒），避免长时间占用磁盘
+
+        Returns:
+            int: 实际被改写的文件数
+        """
+        compacted = 0
+        processed = 0
+        for user_id, file_path in self.iter_awaken_files(sort=False):
+            if is_stopped(stop_event):
+                break
+            try:
+                with self._awaken_lock(user_id):
+                    data = self._read_json(file_path)
+                    if data is None:
+                        continue
+                    new_data = self._compact(data, date)
+                    if new_data != data:
+                        self._write_json(file_path, new_data)
+                        compacted += 1
+            except (IOError, PermissionError, OSError, json.JSONDecodeError) as e:
+                logger.warning(f"⚠️ 压缩觉醒记录失败 {file_path}: {e}")
+
+            processed += 1
+            if processed % batch_size == 0:
+                pause_batch(stop_event, pause)
+        return compacted
+
+    def _compact(self, data: Optional[dict], date: str) -> dict:
+        """
+        将觉醒记录转换为紧凑格式，并按保留策略归档过期的记录
+
+        Args:
+            data: 文件中的原始数据（旧版或紧凑格式），None表示文件不存在
+            date: 今日日期（YYYY-MM-DD）
+
+        Returns:
+            dict: 紧凑格式的觉醒记录（新对象，不修改传入的数据）
+        """
+        result = {
+            "version": self.AWAKEN_RECORDS_VERSION,
+            "today": None,
+            "history": {},
+            "archived_total": 0,
+        }
+        if data is None:
+            return result
+
+        if data.get("version") == self.AWAKEN_RECORDS_VERSION:
+            result["today"] = data.get("today")
+            result["history"] = dict(data.get("history", {}))
+            result["archived_total"] = data.get("archived_total", 0)
+        else:
+            # 旧版格式：{date: {"count": int, "last_awaken_time": str}}
+            for record_date, record in data.items():
+                if not isinstance(record, dict):
+                    continue
+                if record_date == date:
+                    result["today"] = {
+                        "date": record_date,
+                        "count": record.get("count", 0),
+                        "last_awaken_time": record.get("last_awaken_time"),
+                    }
+                else:
+                    result["history"][record_date] = record.get("count", 0)
+
+        # 日期已经变化，把"今日"记录移入历史
+        today = result["today"]
+        if today and today.get("date") != date:
+            result["history"][today["date"]] = today.get("count", 0)
+            result["today"] = None
+
+        # 超出保留期的逐日记录只保留累计值
+        cutoff = retention_cutoff(date, self.retention_days)
+        for record_date in [d for d in result["history"] if d < cutoff]:
+            result["archived_total"] += result["history"].pop(record_date)
+
+        return result
+
+    @classmethod
+    def expand_awaken_records(cls, data: Optional[dict]) -> dict:
+        """
+        将文件中的觉醒记录（旧版或紧凑格式）展开为按日期索引的字典
+
+        Args:
+            data: 文件中的原始数据
+
+        Returns:
+            dict: {date: {"count": int, "last_awaken_time": str}}，不包含已归档的累计值
+        """
+        if not data:
+            return {}
+        if data.get("version") != cls.AWAKEN_RECORDS_VERSION:
+            return data
+
+        records = {
+            record_date: {"count": count}
+            for record_date, count in data.get("history", {}).items()
+        }
+        today = data.get("today")
+        if today:
+            records[today["date"]] = {
+                "count": today.get("count", 0),
+                "last_awaken_time": today.get("last_awaken_time"),
+            }
+        return records
+
+    def migrate_layout(
+        self,
+        stop_event: Optional[threading.Event] = None,
+        batch_size: int = 500,
+        pause: float = 0.1,
+    ) -> int:
+        """
+        把平铺目录中的旧版文件分批移动到分片目录，全部完成后写入布局版本标记
+
+        Args:
+            stop_event: 停止信号（可选），设置后在当前文件移动完时返回，下次启动时继续
+            batch_size: 每移动多少个文件暂停一次
+            pause: 每批之间的暂停时间（秒），避免长时间占用磁盘
+
+        Returns:
+            int: 本次移动的文件数
+        """
+        if not self._reads_legacy:
+            return 0
+
+        moved = 0
+        for user_id, file_path in self._iter_flat_files(self.stands_dir, ""):
+            if is_stopped(stop_event):
+                return moved
+            moved += self._move_legacy_file(
+                file_path, self._get_user_stand_file(user_id)
+            )
+            if moved and moved % batch_size == 0:
+                pause_batch(stop_event, pause)
+
+        for user_id, file_path in self._iter_flat_files(self.awaken_dir, "user_"):
+            if is_stopped(stop_event):
+                return moved
+            # 与觉醒记录的读写互斥，避免移动覆盖刚写入的新数据
+            with self._awaken_lock(user_id):
+                moved += self._move_legacy_file(
+                    file_path, self._get_awaken_records_file(user_id)
+                )
+            if moved and moved % batch_size == 0:
+                pause_batch(stop_event, pause)
+
+        # 新的写入只会进入分片目录，平铺目录清空后即可停止回退读取
+        if not self._has_flat_files():
+            self._write_layout_version(self.LAYOUT_SHARDED)
+            self.layout_version = self.LAYOUT_SHARDED
+            logger.info("✅ 数据目录已全部迁移到分片布局")
+        return moved
+
+    def _move_legacy_file(self, source: Path, target: Path) -> int:
+        """
+        把旧文件移动到分片目录；目标已存在时说明已有更新的数据，直接删除旧文件
+
+        Returns:
+            int: 实际移动的文件数（0或1）
+        """
+        self._ensure_parent(target)
+        try:
+            # os.link 在目标已存在时失败，不会覆盖并发写入的新数据
+            os.link(source, target)
+        except FileExistsError:
+            os.unlink(source)
+            return 0
+        except OSError:
+            # 文件系统不支持硬链接时退化为检查后重命名
+            if target.exists():
+                os.unlink(source)
+                return 0
+            os.replace(source, target)
+            return 1
+        os.unlink(source)
+        return 1
+
+    @staticmethod
+    def _iter_flat_files(root: Path, prefix: str) -> Iterator[Tuple[str, Path]]:
+        """遍历平铺目录中的旧版文件"""
+        with os.scandir(root) as entries:
+            for entry in entries:
+                name = entry.name
+                if (
+                    name.startswith(prefix)
+                    and name.endswith(".json")
+                    and entry.is_file()
+                ):
+                    yield name[len(prefix) : -len(".json")], Path(entry.path)
+
+    @classmethod
+    def _iter_sharded_files(cls, root: Path, prefix: str) -> Iterator[Tuple[str, Path]]:
+        """遍历分片目录中的文件"""
+        with os.scandir(root) as first_level:
+            first_dirs = [
+                e.path for e in first_level if len(e.name) == 2 and e.is_dir()
+            ]
+        for first_dir in first_dirs:
+            with os.scandir(first_dir) as second_level:
+                second_dirs = [e.path for e in second_level if e.is_dir()]
+            for second_dir in second_dirs:
+                yield from cls._iter_flat_files(Path(second_dir), prefix)
+
+    def _iter_files(
+        self, root: Path, prefix: str, sort: bool
+    ) -> Iterator[Tuple[str, Path]]:
+        """遍历分片目录和平铺目录中的所有文件，同一用户两处都有时以分片目录为准"""
+        if not sort:
+            yield from self._iter_sharded_files(root, prefix)
+            if self._reads_legacy:
+                yield from self._iter_flat_files(root, prefix)
+            return
+
+        files = {}
+        if self._reads_legacy:
+            files.update(
+                (path.name, (user_id, path))
+                for user_id, path in self._iter_flat_files(root, prefix)
+            )
+        files.update(
+            (path.name, (user_id, path))
+            for user_id, path in self._iter_sharded_files(root, prefix)
+        )
+        for name in sorted(files):
+            yield files[name]
+
+    def iter_stand_files(self, sort: bool = True) -> Iterator[Tuple[str, Path]]:
+        """
+        遍历所有替身数据文件
+
+        Args:
+            sort: 是否按文件名排序（不排序时逐个读取目录，内存占用更小）
+
+        Yields:
+            tuple[str, Path]: (用户ID, 文件路径)
+        """
+        yield from self._iter_files(self.stands_dir, "", sort)
+
+    def iter_awaken_files(self, sort: bool = True) -> Iterator[Tuple[str, Path]]:
+        """
+        遍历所有觉醒记录文件
+
+        Args:
+            sort: 是否按文件名排序（不排序时逐个读取目录，内存占用更小）
+
+        Yields:
+            tuple[str, Path]: (用户ID, 文件路径)
+        """
+        yield from self._iter_files(self.awaken_dir, "user_", sort)
+
+
+class SQLiteStandStorage(BaseStandStorage):
+    """SQLite存储引擎（WAL模式）"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS stands (
+        user_id TEXT PRIMARY KEY,
+        abilities TEXT NOT NULL,
+        name TEXT,
+        created_at TEXT,
+        acquisition_method TEXT,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS awaken_records (
+        user_id TEXT NOT NULL,
+        date TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        last_awaken_time TEXT,
+        PRIMARY KEY (user_id, date)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_awaken_records_date ON awaken_records (date);
+
+    CREATE TABLE IF NOT EXISTS awaken_totals (
+        user_id TEXT PRIMARY KEY,
+        archived_total INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    ) WITHOUT ROWID;
+    """
+
+    # 替身数据的行版本号，由触发器维护，任何连接（包括其他进程或手动修改）写入后都会变化：
+    # 新插入的行（包括 INSERT OR REPLACE）取随机值，避免删除重建后与旧版本号相同；
+    # 没有修改版本号的 UPDATE 在原版本号上加一
+    STAND_VERSION_TRIGGERS = """
+    CREATE TRIGGER IF NOT EXISTS stands_version_insert AFTER INSERT ON stands
+    WHEN NEW.version = 0
+    BEGIN
+        UPDATE stands SET version = random() WHERE user_id = NEW.user_id;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stands_version_update AFTER UPDATE ON stands
+    WHEN NEW.version = OLD.version
+    BEGIN
+        UPDATE stands SET version = OLD.version + 1 WHERE user_id = NEW.user_id;
+    END;
+    """
+
+    # 落盘策略对应的 synchronous 设置：
+    # always 每次提交都 fsync；batched 在WAL模式下只在检查点时 fsync，
+    # 由定时任务执行检查点控制数据窗口；never 完全交给操作系统
+    SYNCHRONOUS_MODES = {"always": "FULL", "batched": "NORMAL", "never": "OFF"}
+
+    def __init__(
+        self,
+        db_path: Path,
+        retention_days: int = 30,
+        fsync_policy: str = "batched",
+    ):
+        """
+        初始化SQLite存储引擎
+
+        Args:
+            db_path: 数据库文件路径
+            retention_days: 觉醒记录保留的历史天数，0为只保留累计值
+            fsync_policy: 落盘策略："always"、"batched"、"never"
+        """
+        self.db_path = Path(db_path)
+        self.retention_days = retention_days
+        self.fsync_policy = fsync_policy
+        self.synchronous = self.SYNCHRONOUS_MODES.get(fsync_policy, "NORMAL")
+        # 每个线程使用独立连接，WAL模式下读写互不阻塞
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self._get_connection()
+            conn.executescript(self.SCHEMA)
+            self._ensure_stand_version_column(conn)
+            conn.executescript(self.STAND_VERSION_TRIGGERS)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"❌ 无法初始化SQLite数据库: {e}")
+            raise
+
+    @staticmethod
+    def _ensure_stand_version_column(conn: sqlite3.Connection) -> None:
+        """旧版数据库的 stands 表没有版本号列时补上"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(stands)")}
+        if "version" not in columns:
+            conn.execute(
+                "ALTER TABLE stands ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+            )
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None 使用自动提交，事务由 transaction() 显式控制
+            conn = sqlite3.connect(
+                str(self.db_path),
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def transaction(self) -> "_SQLiteTransaction":
+        """
+        开启一个写事务（BEGIN IMMEDIATE）
+
+        Returns:
+            _SQLiteTransaction: 上下文管理器，返回数据库连接
+        """
+        return _SQLiteTransaction(self._get_connection())
+
+    def load_stand(self, user_id: str) -> Optional[dict]:
+        row = (
+            self._get_connection()
+            .execute(
+                "SELECT abilities, name, created_at, acquisition_method "
+                "FROM stands WHERE user_id = ?",
+                (user_id,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return {
+            "abilities": row[0],
+            "name": row[1],
+            "created_at": row[2],
+            "acquisition_method": row[3],
+        }
+
+    def save_stand(self, user_id: str, data: dict) -> None:
+        self._get_connection().execute(
+            "INSERT OR REPLACE INTO stands "
+            "(user_id, abilities, name, created_at, acquisition_method) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                user_id,
+                data.get("abilities", ""),
+                data.get("name"),
+                data.get("created_at"),
+                data.get("acquisition_method"),
+            ),
+        )
+
+    def stand_version(self, user_id: str) -> Hashable:
+        # 只按主键读取版本号列，不需要解析整行数据
+        row = (
+            self._get_connection()
+            .execute("SELECT version FROM stands WHERE user_id = ?", (user_id,))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def load_awaken_record(self, user_id: str, date: str) -> Optional[dict]:
+        row = (
+            self._get_connection()
+            .execute(
+                "SELECT count, last_awaken_time FROM awaken_records "
+                "WHERE user_id = ? AND date = ?",
+                (user_id, date),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        return {"count": row[0], "last_awaken_time": row[1]}
+
+    def save_awaken_record(self, user_id: str, date: str, record: dict) -> None:
+        self._get_connection().execute(
+            "INSERT OR REPLACE INTO awaken_records "
+            "(user_id, date, count, last_awaken_time) VALUES (?, ?, ?, ?)",
+            (user_id, date, record.get("count", 0), record.get("last_awaken_time")),
+        )
+
+    def consume_awaken(
+        self,
+        user_id: str,
+        date: str,
+        awaken_time: str,
+        daily_limit: int,
+        amount: int = 1,
+    ) -> Tuple[bool, int, Optional[str]]:
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT count, last_awaken_time FROM awaken_records "
+                "WHERE user_id = ? AND date = ?",
+                (user_id, date),
+            ).fetchone()
+            count, last_awaken_time = row if row else (0, None)
+
+            if 0 <= daily_limit < count + amount:
+                return False, count, last_awaken_time
+
+            count += amount
+            conn.execute(
+                "INSERT OR REPLACE INTO awaken_records "
+                "(user_id, date, count, last_awaken_time) VALUES (?, ?, ?, ?)",
+                (user_id, date, count, awaken_time),
+            )
+        return True, count, awaken_time
+
+    def write_batch(
+        self,
+        stands: Dict[str, dict],
+        awaken_records: Dict[Tuple[str, str], dict],
+    ) -> None:
+        # 整批在同一个事务中提交
+        with self.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO stands "
+                "(user_id, abilities, name, created_at, acquisition_method) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        user_id,
+                        data.get("abilities", ""),
+                        data.get("name"),
+                        data.get("created_at"),
+                        data.get("acquisition_method"),
+                    )
+                    for user_id, data in stands.items()
+                ],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO awaken_records "
+                "(user_id, date, count, last_awaken_time) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        user_id,
+                        date,
+                        record.get("count", 0),
+                        record.get("last_awaken_time"),
+                    )
+                    for (user_id, date), record in awaken_records.items()
+                ],
+            )
+
+    def compact_awaken_records(
+        self, date: str, stop_event: Optional[threading.Event] = None
+    ) -> int:
+        # 归档和删除在同一个事务中完成，没有需要中途停止的批次
+        cutoff = retention_cutoff(date, self.retention_days)
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO awaken_totals (user_id, archived_total) "
+                "SELECT user_id, SUM(count) FROM awaken_records WHERE date < ? "
+                "GROUP BY user_id "
+                "ON CONFLICT (user_id) DO UPDATE SET "
+                "archived_total = archived_total + excluded.archived_total",
+                (cutoff,),
+            )
+            deleted = conn.execute(
+                "DELETE FROM awaken_records WHERE date < ?", (cutoff,)
+            ).rowcount
+        return deleted
+
+    def fsync_pending(self) -> int:
+        if self.fsync_policy != "batched":
+            return 0
+        # 被动检查点：把WAL中已提交的页写回数据库文件并 fsync，不阻塞读写
+        row = (
+            self._get_connection().execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        )
+        return row[2] if row else 0
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """读取元数据"""
+        row = (
+            self._get_connection()
+            .execute("SELECT value FROM meta WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ 关闭SQLite连接失败: {e}")
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class _SQLiteTransaction:
+    """SQLite写事务上下文管理器"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
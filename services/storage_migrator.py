@@ -0,0 +1,330 @@
+"""
+JSON -> SQLite 数据迁移工具
+
+将旧版 stands/ 与 awaken_records/ 目录下的JSON文件一次性导入SQLite。
+迁移按文件名顺序分批提交，每批都会在同一事务中记录进度游标，
+中途中断后再次启动会从上次的位置继续，已经迁移完成则直接跳过。
+
+导入在后台任务中执行，期间由 ImportingStandStorage 提供服务：
+写入直接进入SQLite，读取时SQLite中没有的数据回退到旧的JSON文件。
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Hashable, Optional, Tuple
+
+from astrbot.api import logger
+
+from .stand_storage import (
+    BaseStandStorage,
+    JsonStandStorage,
+    SQLiteStandStorage,
+    is_stopped,
+)
+
+
+class JsonToSQLiteMigrator:
+    """JSON到SQLite的可恢复迁移器"""
+
+    META_DONE = "json_migration_done"
+    META_STANDS_CURSOR = "json_migration_stands_cursor"
+    META_AWAKEN_CURSOR = "json_migration_awaken_cursor"
+
+    def __init__(
+        self,
+        json_storage: JsonStandStorage,
+        sqlite_storage: SQLiteStandStorage,
+        batch_size: int = 500,
+    ):
+        """
+        初始化迁移器
+
+        Args:
+            json_storage: 旧的JSON存储引擎（数据来源）
+            sqlite_storage: 新的SQLite存储引擎（迁移目标）
+            batch_size: 每批提交的文件数量
+        """
+        self.json_storage = json_storage
+        self.sqlite_storage = sqlite_storage
+        self.batch_size = max(1, batch_size)
+
+    @staticmethod
+    def has_legacy_data(data_dir_path: Path) -> bool:
+        """检查数据目录中是否有需要导入的旧JSON数据（不创建任何文件）"""
+        for name in ("stands", "awaken_records"):
+            try:
+                with os.scandir(Path(data_dir_path) / name) as entries:
+                    for _ in entries:
+                        return True
+            except FileNotFoundError:
+                continue
+        return False
+
+    def is_done(self) -> bool:
+        """检查迁移是否已经完成"""
+        return self.sqlite_storage.get_meta(self.META_DONE) == "1"
+
+    def run(self, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        执行迁移（已完成时直接返回）
+
+        Args:
+            stop_event: 停止信号（可选），设置后在当前批次提交后返回，下次启动时继续
+
+        Returns:
+            bool: 迁移是否已经全部完成
+        """
+        if self.is_done():
+            return True
+
+        logger.info("🔄 开始将JSON替身数据迁移到SQLite...")
+        stands = self._migrate_stands(stop_event)
+        records = self._migrate_awaken_records(stop_event)
+        if is_stopped(stop_event):
+            logger.info(
+                f"⏸️ 数据迁移已暂停：替身 {stands} 条，觉醒记录 {records} 条，下次启动时继续"
+            )
+            return False
+
+        with self.sqlite_storage.transaction() as conn:
+            self._set_meta(conn, self.META_DONE, "1")
+
+        logger.info(f"✅ 数据迁移完成：替身 {stands} 条，觉醒记录 {records} 条")
+        return True
+
+    def _migrate_stands(self, stop_event: Optional[threading.Event]) -> int:
+        """迁移替身数据，返回本次导入的条数"""
+        cursor = self.sqlite_storage.get_meta(self.META_STANDS_CURSOR)
+        batch = []
+        migrated = 0
+
+        for user_id, file_path in self.json_storage.iter_stand_files():
+            if is_stopped(stop_event):
+                break
+            if cursor is not None and file_path.name <= cursor:
+                continue
+            data = self._read_file(file_path)
+            batch.append((file_path.name, user_id, data))
+            if len(batch) >= self.batch_size:
+                migrated += self._commit_stands(batch)
+                batch = []
+
+        if batch:
+            migrated += self._commit_stands(batch)
+        return migrated
+
+    def _commit_stands(self, batch: list) -> int:
+        """提交一批替身数据"""
+        count = 0
+        with self.sqlite_storage.transaction() as conn:
+            for _, user_id, data in batch:
+                if not data:
+                    continue
+                # INSERT OR IGNORE：不覆盖迁移开始后已写入SQLite的新数据
+                conn.execute(
+                    "INSERT OR IGNORE INTO stands "
+                    "(user_id, abilities, name, created_at, acquisition_method) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        user_id,
+                        data.get("abilities", ""),
+                        data.get("name"),
+                        data.get("created_at"),
+                        data.get("acquisition_method", "unknown"),
+                    ),
+                )
+                count += 1
+            self._set_meta(conn, self.META_STANDS_CURSOR, batch[-1][0])
+        return count
+
+    def _migrate_awaken_records(self, stop_event: Optional[threading.Event]) -> int:
+        """迁移觉醒记录，返回本次导入的条数"""
+        cursor = self.sqlite_storage.get_meta(self.META_AWAKEN_CURSOR)
+        batch = []
+        migrated = 0
+
+        for user_id, file_path in self.json_storage.iter_awaken_files():
+            if is_stopped(stop_event):
+                break
+            if cursor is not None and file_path.name <= cursor:
+                continue
+            data = self._read_file(file_path)
+            batch.append((file_path.name, user_id, data))
+            if len(batch) >= self.batch_size:
+                migrated += self._commit_awaken_records(batch)
+                batch = []
+
+        if batch:
+            migrated += self._commit_awaken_records(batch)
+        return migrated
+
+    def _commit_awaken_records(self, batch: list) -> int:
+        """提交一批觉醒记录"""
+        count = 0
+        with self.sqlite_storage.transaction() as conn:
+            for _, user_id, data in batch:
+                if not data:
+                    continue
+                records = JsonStandStorage.expand_awaken_records(data)
+                for date, record in records.items():
+                    if not isinstance(record, dict):
+                        continue
+                    conn.execute(
+                        "INSERT OR IGNORE INTO awaken_records "
+                        "(user_id, date, count, last_awaken_time) VALUES (?, ?, ?, ?)",
+                        (
+                            user_id,
+                            date,
+                            record.get("count", 0),
+                            record.get("last_awaken_time"),
+                        ),
+                    )
+                    count += 1
+                # 紧凑格式中已归档的累计次数
+                archived_total = data.get("archived_total", 0)
+                if archived_total:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO awaken_totals "
+                        "(user_id, archived_total) VALUES (?, ?)",
+                        (user_id, archived_total),
+                    )
+            self._set_meta(conn, self.META_AWAKEN_CURSOR, batch[-1][0])
+        return count
+
+    def _read_file(self, file_path) -> Optional[dict]:
+        """读取单个JSON文件，损坏的文件记录日志后跳过"""
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (IOError, PermissionError, OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️ 跳过无法读取的文件 {file_path}: {e}")
+            return None
+
+    @staticmethod
+    def _set_meta(conn, key: str, value: str) -> None:
+        """在当前事务中写入元数据"""
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+
+class ImportingStandStorage(BaseStandStorage):
+    """
+    导入旧JSON数据期间使用的存储引擎
+
+    写入只进入SQLite；读取先查SQLite，没有时回退到JSON文件。
+    导入使用 INSERT OR IGNORE，不会覆盖期间写入SQLite的新数据。
+    导入完成后所有操作直接交给SQLite。
+    """
+
+    def __init__(
+        self, sqlite_storage: SQLiteStandStorage, json_storage: JsonStandStorage
+    ):
+        """
+        初始化导入期间的存储引擎
+
+        Args:
+            sqlite_storage: SQLite存储引擎（导入目标）
+            json_storage: 旧的JSON存储引擎（导入来源）
+        """
+        self.sqlite_storage = sqlite_storage
+        self.json_storage = json_storage
+        self.migrator = JsonToSQLiteMigrator(json_storage, sqlite_storage)
+        self.importing = not self.migrator.is_done()
+        # 导入期间持有，关闭存储时等待导入线程返回，避免关闭后仍在读写数据库
+        self._import_lock = threading.Lock()
+        self._closed = False
+
+    def run_import(self, stop_event: Optional[threading.Event] = None) -> None:
+        """执行导入（在后台线程中调用），完成后不再回退读取JSON"""
+        with self._import_lock:
+            if self._closed or is_stopped(stop_event):
+                return
+            if self.migrator.run(stop_event):
+                self.importing = False
+
+    def load_stand(self, user_id: str) -> Optional[dict]:
+        data = self.sqlite_storage.load_stand(user_id)
+        if data is None and self.importing:
+            data = self.json_storage.load_stand(user_id)
+        return data
+
+    def save_stand(self, user_id: str, data: dict) -> None:
+        self.sqlite_storage.save_stand(user_id, data)
+
+    def stand_version(self, user_id: str) -> Hashable:
+        version = self.sqlite_storage.stand_version(user_id)
+        if self.importing:
+            return (version, self.json_storage.stand_version(user_id))
+        return version
+
+    def load_awaken_record(self, user_id: str, date: str) -> Optional[dict]:
+        record = self.sqlite_storage.load_awaken_record(user_id, date)
+        if record is None and self.importing:
+            record = self.json_storage.load_awaken_record(user_id, date)
+        return record
+
+    def save_awaken_record(self, user_id: str, date: str, record: dict) -> None:
+        self.sqlite_storage.save_awaken_record(user_id, date, record)
+
+    def consume_awaken(
+        self,
+        user_id: str,
+        date: str,
+        awaken_time: str,
+        daily_limit: int,
+        amount: int = 1,
+    ) -> Tuple[bool, int, Optional[str]]:
+        if self.importing:
+            self._seed_awaken_record(user_id, date)
+        return self.sqlite_storage.consume_awaken(
+            user_id, date, awaken_time, daily_limit, amount
+        )
+
+    def _seed_awaken_record(self, user_id: str, date: str) -> None:
+        """把JSON中的当日觉醒记录先导入SQLite，保证次数限制基于完整的当日计数"""
+        if self.sqlite_storage.load_awaken_record(user_id, date) is not None:
+            return
+        record = self.json_storage.load_awaken_record(user_id, date)
+        if not record:
+            return
+        with self.sqlite_storage.transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO awaken_records "
+                "(user_id, date, count, last_awaken_time) VALUES (?, ?, ?, ?)",
+                (
+                    user_id,
+                    date,
+                    record.get("count", 0),
+                    record.get("last_awaken_time"),
+                ),
+            )
+
+    def write_batch(
+        self,
+        stands: Dict[str, dict],
+        awaken_records: Dict[Tuple[str, str], dict],
+    ) -> None:
+        self.sqlite_storage.write_batch(stands, awaken_records)
+
+    def compact_awaken_records(
+        self, date: str, stop_event: Optional[threading.Event] = None
+    ) -> int:
+        if self.importing:
+            # 导入完成前归档会让之后导入的累计次数被忽略，等下一次压缩
+            return 0
+        return self.sqlite_storage.compact_awaken_records(date, stop_event)
+
+    def fsync_pending(self) -> int:
+        return self.sqlite_storage.fsync_pending()
+
+    def close(self) -> None:
+        # 调用方应先设置停止信号，正在进行的导入会在当前批次提交后返回
+        with self._import_lock:
+            self._closed = True
+            try:
+                self.sqlite_storage.close()
+            finally:
+                self.json_storage.close()
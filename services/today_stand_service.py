@@ -0,0 +1,157 @@
+"""
+今日替身服务
+
+今日替身由用户ID和日期决定，同一天内结果不变。每天零点过后由后台任务为最近活跃的用户
+预先计算今日能力值和显示文字，并预热面板图片缓存，把早高峰的集中请求变成缓存命中。
+"""
+
+import asyncio
+import datetime
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from astrbot.api import logger
+
+from .activity_service import ActivityTracker
+from .panel_service import PanelService
+from .render_queue import RenderQueueFullError
+from ..models.stand_models import PanelRequest
+from ..utils.ability_display_utils import AbilityDisplayUtils
+from ..utils.ability_utils import AbilityUtils
+from ..utils.metrics import MetricsRegistry
+
+
+class TodayStandService:
+    """今日替身服务"""
+
+    # 渲染队列已满时，预计算暂停的时间（秒），优先让给用户的实时请求
+    BUSY_BACKOFF = 1.0
+
+    def __init__(
+        self,
+        timezone: Any,
+        panel_service: PanelService,
+        activity_tracker: ActivityTracker,
+        metrics: Optional[MetricsRegistry] = None,
+        precompute_days: int = 7,
+    ):
+        """
+        初始化今日替身服务
+
+        Args:
+            timezone: 时区（决定"今日"的日期）
+            panel_service: 面板服务，用于预热面板缓存
+            activity_tracker: 活跃用户记录
+            metrics: 指标注册表（可选）
+            precompute_days: 为最近多少天内活跃的用户预计算，0表示不预计算
+        """
+        self.timezone = timezone
+        self.panel_service = panel_service
+        self.activity_tracker = activity_tracker
+        self.metrics = metrics or MetricsRegistry()
+        self.precompute_days = max(0, precompute_days)
+
+        self._lock = threading.Lock()
+        self._date: Optional[str] = None
+        # 当天的结果 {user_id: (能力值字符串, 格式化的能力值文字)}，日期变化时清空
+        self._entries: Dict[str, Tuple[str, str]] = {}
+        # 当天被预计算过的用户
+        self._precomputed: set = set()
+
+        self.metrics.register_gauge("today_stand.hit_ratio", self._hit_ratio)
+        self.metrics.register_gauge(
+            "today_stand.precomputed", lambda: len(self._precomputed)
+        )
+
+    def today(self) -> str:
+        """当前日期（YYYYMMDD）"""
+        return datetime.datetime.now(self.timezone).strftime("%Y%m%d")
+
+    @staticmethod
+    def generate(user_id: str, date: str) -> Tuple[str, str]:
+        """
+        生成用户某一天的今日替身
+
+        Args:
+            user_id: 用户ID
+            date: 日期（YYYYMMDD）
+
+        Returns:
+            Tuple[str, str]: (能力值字符串, 格式化的能力值文字)
+        """
+        person_random = random.Random(f"{user_id}{date}")
+        ability_str = ",".join(str(person_random.randint(1, 5)) for _ in range(6))
+        ability_letters = AbilityUtils.convert_abilities_to_letters(ability_str)
+        formatted_abilities = AbilityDisplayUtils.format_abilities_compact(
+            ability_letters
+        )
+        return ability_str, formatted_abilities
+
+    def get_today_stand(self, user_id: str) -> Tuple[str, str]:
+        """
+        获取用户的今日替身，并记录是否命中预计算结果
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            Tuple[str, str]: (能力值字符串, 格式化的能力值文字)
+        """
+        entry, precomputed = self._get_or_generate(user_id, self.today())
+        self.metrics.inc("today_stand.hits" if precomputed else "today_stand.misses")
+        return entry
+
+    def _get_or_generate(self, user_id: str, date: str) -> Tuple[Tuple[str, str], bool]:
+        """读取当天的结果，没有时生成并保存；返回结果和该用户是否被预计算过"""
+        with self._lock:
+            if self._date != date:
+                self._date = date
+                self._entries = {}
+                self._precomputed = set()
+            entry = self._entries.get(user_id)
+            if entry is None:
+                entry = self.generate(user_id, date)
+                self._entries[user_id] = entry
+            return entry, user_id in self._precomputed
+
+    def _hit_ratio(self) -> float:
+        """今日替身请求命中预计算结果的比例"""
+        hits = self.metrics.get_counter("today_stand.hits")
+        total = hits + self.metrics.get_counter("today_stand.misses")
+        return round(hits / total, 3) if total else 0.0
+
+    async def precompute(self) -> None:
+        """为最近活跃的用户预计算今日替身并预热面板缓存（最近活跃的用户优先）"""
+        if self.precompute_days <= 0:
+            return
+
+        start = time.monotonic()
+        date = self.today()
+        users = self.activity_tracker.recent_users(self.precompute_days)
+        warm_panels = self.panel_service.can_prewarm
+        panels = 0
+
+        for user_id, user_name in users:
+            (ability_str, _), _ = self._get_or_generate(user_id, date)
+            if warm_panels and user_name:
+                try:
+                    image = await self.panel_service.get_panel(
+                        PanelRequest(name=user_name, ability=ability_str)
+                    )
+                    if image is not None:
+                        panels += 1
+                except RenderQueueFullError:
+                    await asyncio.sleep(self.BUSY_BACKOFF)
+            with self._lock:
+                if self._date == date:
+                    self._precomputed.add(user_id)
+
+        elapsed = time.monotonic() - start
+        self.metrics.observe("today_precompute", elapsed * 1000)
+        self.metrics.inc("today_precompute.users", len(users))
+        self.metrics.inc("today_precompute.panels", panels)
+        logger.info(
+            f"📅 今日替身预计算完成：{len(users)} 个用户，{panels} 张面板，耗时 {elapsed:.1f} 秒"
+        )
@@ -0,0 +1,219 @@
+"""
+延迟写入（write-behind）存储包装器
+
+把替身数据和觉醒记录的写入先合并在内存中，按时间间隔或积压数量批量写入底层存储引擎。
+同一个键在一个刷新周期内的多次写入只会落盘一次。进程崩溃时最多丢失一个刷新周期内的写入。
+"""
+
+import itertools
+import threading
+import time
+from typing import Dict, Hashable, Optional, Tuple
+
+from astrbot.api import logger
+
+from .stand_storage import BaseStandStorage
+from ..utils.metrics import MetricsRegistry
+
+
+class WriteBehindStorage(BaseStandStorage):
+    """延迟写入存储包装器"""
+
+    def __init__(
+        self,
+        inner: BaseStandStorage,
+        max_pending: int = 500,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        初始化延迟写入包装器
+
+        Args:
+            inner: 实际执行读写的存储引擎
+            max_pending: 积压的待写入条目达到该数量时立即批量刷新
+            metrics: 指标注册表（可选）
+        """
+        self.inner = inner
+        self.max_pending = max(1, max_pending)
+        self.metrics = metrics or MetricsRegistry()
+
+        self._lock = threading.RLock()
+        # 刷新过程互斥，保证同一个键的新旧数据按顺序落盘
+        self._flush_lock = threading.Lock()
+        self._pending_stands: Dict[str, dict] = {}
+        self._pending_awaken: Dict[Tuple[str, str], dict] = {}
+        # 正在刷新中的数据，写入底层存储完成前仍需对读取可见
+        self._flushing_stands: Dict[str, dict] = {}
+        self._flushing_awaken: Dict[Tuple[str, str], dict] = {}
+        # 待写入数据的版本号，供替身缓存判断数据是否变化
+        self._versions: Dict[str, int] = {}
+        self._version_seq = itertools.count(1)
+        # 每次刷新结束时加一，锁外读取底层存储的调用方据此判断读到的数据是否过期
+        self._flush_generation = 0
+
+        self.metrics.register_gauge("write_behind.pending", self.pending_count)
+
+    def pending_count(self) -> int:
+        """获取尚未落盘的条目数"""
+        with self._lock:
+            return len(self._pending_stands) + len(self._pending_awaken)
+
+    def load_stand(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            data = self._pending_stands.get(user_id)
+            if data is None:
+                data = self._flushing_stands.get(user_id)
+            if data is not None:
+                return dict(data)
+        return self.inner.load_stand(user_id)
+
+    def save_stand(self, user_id: str, data: dict) -> None:
+        with self._lock:
+            if user_id in self._pending_stands:
+                self.metrics.inc("write_behind.coalesced")
+            self._pending_stands[user_id] = dict(data)
+            self._versions[user_id] = next(self._version_seq)
+        self._flush_if_full()
+
+    def stand_version(self, user_id: str) -> Hashable:
+        with self._lock:
+            if user_id in self._pending_stands or user_id in self._flushing_stands:
+                return ("pending", self._versions.get(user_id))
+        return self.inner.stand_version(user_id)
+
+    def load_awaken_record(self, user_id: str, date: str) -> Optional[dict]:
+        with self._lock:
+            record = self._get_pending_awaken(user_id, date)
+            if record is not None:
+                return dict(record)
+        return self.inner.load_awaken_record(user_id, date)
+
+    def save_awaken_record(self, user_id: str, date: str, record: dict) -> None:
+        with self._lock:
+            self._put_pending_awaken(user_id, date, dict(record))
+        self._flush_if_full()
+
+    def consume_awaken(
+        self,
+        user_id: str,
+        date: str,
+        awaken_time: str,
+        daily_limit: int,
+        amount: int = 1,
+    ) -> Tuple[bool, int, Optional[str]]:
+        loaded, generation = None, None
+        while True:
+            with self._lock:
+                record = self._get_pending_awaken(user_id, date)
+                # 锁外读取期间没有刷新完成时，读到的底层记录仍然是最新的
+                if record is None and generation == self._flush_generation:
+                    record = loaded or {}
+                if record is not None:
+                    count = record.get("count", 0)
+                    last_awaken_time = record.get("last_awaken_time")
+                    if 0 <= daily_limit < count + amount:
+                        return False, count, last_awaken_time
+
+                    count += amount
+                    self._put_pending_awaken(
+                        user_id,
+                        date,
+                        {"count": count, "last_awaken_time": awaken_time},
+                    )
+                    break
+                generation = self._flush_generation
+            # 在锁外读取底层存储，磁盘I/O不阻塞其他用户
+            loaded = self.inner.load_awaken_record(user_id, date)
+
+        self._flush_if_full()
+        return True, count, awaken_time
+
+    def compact_awaken_records(
+        self, date: str, stop_event: Optional[threading.Event] = None
+    ) -> int:
+        # 先落盘，避免压缩时读到旧数据
+        self.flush()
+        return self.inner.compact_awaken_records(date, stop_event)
+
+    def fsync_pending(self) -> int:
+        return self.inner.fsync_pending()
+
+    def migrate_layout(self, stop_event: Optional[threading.Event] = None) -> int:
+        return self.inner.migrate_layout(stop_event)
+
+    def _get_pending_awaken(self, user_id: str, date: str) -> Optional[dict]:
+        """读取尚未落盘的觉醒记录（调用方需持有锁）"""
+        key = (user_id, date)
+        record = self._pending_awaken.get(key)
+        if record is None:
+            record = self._flushing_awaken.get(key)
+        return record
+
+    def _put_pending_awaken(self, user_id: str, date: str, record: dict) -> None:
+        """写入待落盘的觉醒记录（调用方需持有锁）"""
+        key = (user_id, date)
+        if key in self._pending_awaken:
+            self.metrics.inc("write_behind.coalesced")
+        self._pending_awaken[key] = record
+
+    def _flush_if_full(self) -> None:
+        """积压达到阈值时立即刷新（调用方的写入已经进入队列，刷新失败不影响调用方）"""
+        if self.pending_count() >= self.max_pending:
+            try:
+                self.flush()
+            except Exception:
+                # flush 已经记录日志并把数据放回待写入队列，下次刷新时重试
+                pass
+
+    def flush(self) -> int:
+        """
+        将积压的写入批量写入底层存储
+
+        Returns:
+            int: 本次写入的条目数
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending_stands and not self._pending_awaken:
+                    return 0
+                self._flushing_stands = self._pending_stands
+                self._flushing_awaken = self._pending_awaken
+                self._pending_stands = {}
+                self._pending_awaken = {}
+
+            start = time.monotonic()
+            written = 0
+            try:
+                self.inner.write_batch(self._flushing_stands, self._flushing_awaken)
+                written = len(self._flushing_stands) + len(self._flushing_awaken)
+            except Exception as e:
+                logger.error(f"❌ 批量写入失败，数据将在下次刷新时重试: {e}")
+                self.metrics.inc("write_behind.flush_errors")
+                with self._lock:
+                    # 放回待写入队列，期间产生的更新数据优先
+                    for user_id, data in self._flushing_stands.items():
+                        self._pending_stands.setdefault(user_id, data)
+                    for key, record in self._flushing_awaken.items():
+                        self._pending_awaken.setdefault(key, record)
+                raise
+            finally:
+                with self._lock:
+                    for user_id in self._flushing_stands:
+                        if user_id not in self._pending_stands:
+                            self._versions.pop(user_id, None)
+                    self._flushing_stands = {}
+                    self._flushing_awaken = {}
+                    self._flush_generation += 1
+
+            self.metrics.inc("write_behind.flushes")
+            self.metrics.inc("write_behind.written", written)
+            self.metrics.observe(
+                "write_behind.flush", (time.monotonic() - start) * 1000
+            )
+            return written
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self.inner.close()
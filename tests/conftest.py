@@ -0,0 +1,18 @@
+"""
+测试公共配置
+
+插件使用包内相对导入，测试前把仓库根目录注册为 stand_plugin 包，
+测试模块通过 stand_plugin.<模块> 导入。需要在安装了 AstrBot 的环境中运行。
+"""
+
+import sys
+import types
+from pathlib import Path
+
+PACKAGE_NAME = "stand_plugin"
+ROOT = Path(__file__).resolve().parent.parent
+
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [str(ROOT)]
+    sys.modules[PACKAGE_NAME] = package
@@ -0,0 +1,56 @@
+"""
+活跃用户记录：保存时的快照与并发的 touch() 互不影响，保存失败时保留未保存标记
+"""
+
+import datetime
+import json
+
+import pytest
+
+from stand_plugin.services.activity_service import ActivityTracker
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    return ActivityTracker(tmp_path, datetime.timezone.utc, fsync_policy="never")
+
+
+def test_touch_during_write_does_not_change_snapshot(tracker):
+    tracker.touch("1", "甲", "100")
+    original_write = tracker._writer.write_json
+
+    def write_while_touching(file_path, data):
+        # 序列化在锁外进行，期间其他线程继续记录同一群的活跃
+        tracker.touch("2", "乙", "100")
+        original_write(file_path, data)
+
+    tracker._writer.write_json = write_while_touching
+    assert tracker.save()
+
+    saved = json.loads(tracker.file_path.read_text(encoding="utf-8"))
+    assert list(saved["groups"]["100"]) == ["1"]
+    # 写入期间的变化留给下一次保存
+    tracker._writer.write_json = original_write
+    assert tracker.save()
+    saved = json.loads(tracker.file_path.read_text(encoding="utf-8"))
+    assert sorted(saved["groups"]["100"]) == ["1", "2"]
+    assert not tracker.save()
+
+
+def test_failed_save_keeps_changes_dirty(tracker):
+    tracker.touch("1", "甲", "100")
+
+    def failing_write(file_path, data):
+        raise RuntimeError("dictionary changed size during iteration")
+
+    original_write = tracker._writer.write_json
+    tracker._writer.write_json = failing_write
+    assert not tracker.save()
+
+    tracker._writer.write_json = original_write
+    assert tracker.save()
+    reloaded = ActivityTracker(
+        tracker.file_path.parent, datetime.timezone.utc, fsync_policy="never"
+    )
+    assert reloaded.group_members("100") == ["1"]
+    assert reloaded.get_user_name("1") == "甲"
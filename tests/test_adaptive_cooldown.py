@@ -0,0 +1,107 @@
+"""
+自适应冷却：冷清时缩短到下限，全局或单个群刷屏、面板生成变慢时延长，并限制在上下限之间
+"""
+
+import pytest
+
+from stand_plugin.utils import cooldown_manager
+from stand_plugin.utils.cooldown_manager import AdaptiveCooldownPolicy, CooldownManager
+
+POLICY = AdaptiveCooldownPolicy(
+    min_seconds=60,
+    max_seconds=900,
+    target_rate=30,
+    group_target_rate=10,
+    target_latency=2000,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        # 对齐到统计窗口的起点，窗口内的计数没有上一窗口的加权
+        self.now = 1_700_000_040.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cooldown_manager, "time", clock)
+    return clock
+
+
+def _use(manager, clock, count, group_id=None, start=0):
+    for user in range(start, start + count):
+        clock.now += 0.01
+        manager.check_cooldown(str(user), group_id)
+
+
+def test_quiet_period_uses_minimum(clock):
+    manager = CooldownManager(300, adaptive=POLICY)
+    assert manager.effective_cooldown() == POLICY.min_seconds
+    assert manager.check_cooldown("1") == (True, 0)
+    clock.now += POLICY.min_seconds - 1
+    assert manager.check_cooldown("1")[0] is False
+    clock.now += 1
+    assert manager.check_cooldown("1") == (True, 0)
+
+
+def test_global_burst_lengthens_cooldown(clock):
+    manager = CooldownManager(300, adaptive=POLICY)
+    first_use = clock.now + 0.01
+    _use(manager, clock, 60)
+    # 每分钟60次，是目标频率的2倍
+    assert manager.effective_cooldown() == 600
+
+    # 刷屏前开始的冷却不受影响，新的冷却从下一次使用开始生效
+    assert manager.user_cooldowns["0"] == pytest.approx(first_use + POLICY.min_seconds)
+    allowed, _ = manager.check_cooldown("new")
+    assert allowed
+    assert manager.user_cooldowns["new"] - clock.now >= 600
+
+    _use(manager, clock, 200, start=100)
+    assert manager.effective_cooldown() == POLICY.max_seconds
+
+
+def test_busy_group_only_tightens_that_group(clock):
+    manager = CooldownManager(300, adaptive=POLICY)
+    _use(manager, clock, 20, group_id="busy")
+    # 单个群每分钟20次，是群目标频率的2倍；全局频率仍低于目标
+    assert manager.effective_cooldown(group_id="busy") == 600
+    assert manager.effective_cooldown(group_id="quiet") < 600
+    assert manager.effective_cooldown() < 600
+
+
+def test_slow_panel_rendering_lengthens_cooldown(clock):
+    latency = {"ms": 0.0}
+    manager = CooldownManager(
+        300, adaptive=POLICY, latency_provider=lambda: latency["ms"]
+    )
+    assert manager.effective_cooldown() == POLICY.min_seconds
+    latency["ms"] = 3000
+    assert manager.effective_cooldown() == 450
+    latency["ms"] = 60_000
+    assert manager.effective_cooldown() == POLICY.max_seconds
+
+
+def test_load_decays_after_burst(clock):
+    manager = CooldownManager(300, adaptive=POLICY)
+    _use(manager, clock, 90, group_id="g")
+    assert manager.effective_cooldown(group_id="g") == POLICY.max_seconds
+    # 两个统计窗口后负载归零，不活跃的群计数器被清理
+    clock.now += 2 * CooldownManager.RATE_WINDOW
+    manager.check_cooldown("late", "other")
+    assert manager.effective_cooldown(group_id="g") == POLICY.min_seconds
+    assert list(manager._group_rates) == ["other"]
+
+
+def test_fixed_cooldown_without_policy(clock):
+    manager = CooldownManager(300)
+    _use(manager, clock, 100)
+    assert manager.effective_cooldown() == 300
+    assert manager.metrics.snapshot()["cooldown.effective"] == 300
@@ -0,0 +1,238 @@
+"""
+面板API拉取：用本地 aiohttp 测试服务器验证超时、带抖动的重试、熔断与半开恢复，
+以及面板API不可用时只回复文字
+"""
+
+import asyncio
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from stand_plugin.handlers.base_handler import BaseStandHandler
+from stand_plugin.models.stand_models import PanelRequest
+from stand_plugin.resources import UITexts
+from stand_plugin.services import api_service
+from stand_plugin.services.api_service import APIUnavailableError, StandAPIService
+from stand_plugin.services.panel_service import PanelService
+from stand_plugin.utils.circuit_breaker import CircuitBreaker
+
+PNG = b"\x89PNG\r\n\x1a\nstub"
+
+
+class StubPanelAPI:
+    """按预设的响应序列应答的面板API，序列用完后重复最后一个"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses) or ["ok"]
+        self.requests = 0
+
+    async def handle(self, request):
+        response = self.responses[min(self.requests, len(self.responses) - 1)]
+        self.requests += 1
+        if response == "slow":
+            await asyncio.sleep(2)
+        elif isinstance(response, int):
+            return web.Response(status=response)
+        return web.Response(body=PNG, content_type="image/png")
+
+
+async def start_stub(stub):
+    app = web.Application()
+    app.router.add_get("/", stub.handle)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+async def start_service(server, **kwargs):
+    service = StandAPIService(str(server.make_url("/")), **kwargs)
+    await service.start()
+    return service
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_request_timeout_counts_as_failure():
+    async def scenario():
+        stub = StubPanelAPI("slow")
+        server = await start_stub(stub)
+        service = await start_service(server, timeout=0.3, max_retries=0)
+        try:
+            start = time.monotonic()
+            with pytest.raises(APIUnavailableError):
+                await service.fetch_image(name="a")
+            elapsed = time.monotonic() - start
+        finally:
+            await service.close()
+            await server.close()
+        return elapsed, service
+
+    elapsed, service = run(scenario())
+    assert elapsed < 1.5
+    assert service.breaker._failures == 1
+    assert service.metrics.get_counter("api.fetch.errors") == 1
+
+
+def test_retries_with_jittered_backoff(monkeypatch):
+    backoffs = []
+
+    def fake_uniform(low, high):
+        backoffs.append((low, high))
+        return high / 2
+
+    monkeypatch.setattr(api_service.random, "uniform", fake_uniform)
+
+    async def scenario():
+        stub = StubPanelAPI(503, 500, "ok")
+        server = await start_stub(stub)
+        service = await start_service(server, timeout=5.0, max_retries=2)
+        try:
+            data = await service.fetch_image(name="a")
+        finally:
+            await service.close()
+            await server.close()
+        return data, stub, service
+
+    data, stub, service = run(scenario())
+    assert data == PNG
+    assert stub.requests == 3
+    assert service.metrics.get_counter("api.fetch.retries") == 2
+    # 全抖动退避：第n次重试在 [0, base * 2^n] 之间随机等待
+    base = StandAPIService.RETRY_BACKOFF_BASE
+    assert backoffs == [(0, base), (0, base * 2)]
+    assert service.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_error_is_not_retried():
+    async def scenario():
+        stub = StubPanelAPI(404)
+        server = await start_stub(stub)
+        service = await start_service(server, max_retries=2)
+        try:
+            with pytest.raises(APIUnavailableError):
+                await service.fetch_image(name="a")
+        finally:
+            await service.close()
+            await server.close()
+        return stub, service
+
+    stub, service = run(scenario())
+    assert stub.requests == 1
+    assert service.breaker._failures == 0
+
+
+def test_breaker_opens_and_recovers_through_half_open():
+    async def scenario():
+        stub = StubPanelAPI(500)
+        server = await start_stub(stub)
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+        service = await start_service(
+            server, timeout=2.0, max_retries=0, breaker=breaker
+        )
+        try:
+            for _ in range(2):
+                with pytest.raises(APIUnavailableError):
+                    await service.fetch_image(name="a")
+            assert breaker.state == CircuitBreaker.OPEN
+
+            # 熔断期间直接拒绝，不再请求面板API
+            with pytest.raises(APIUnavailableError, match="熔断"):
+                await service.fetch_image(name="a")
+            assert stub.requests == 2
+
+            # 恢复时间过后放行一个试探请求，失败则重新熔断
+            await asyncio.sleep(0.25)
+            with pytest.raises(APIUnavailableError):
+                await service.fetch_image(name="a")
+            assert stub.requests == 3
+            assert breaker.state == CircuitBreaker.OPEN
+
+            # 服务恢复后试探成功，熔断器关闭
+            stub.responses = ["ok"]
+            await asyncio.sleep(0.25)
+            assert await service.fetch_image(name="a") == PNG
+            assert breaker.state == CircuitBreaker.CLOSED
+            assert await service.fetch_image(name="a") == PNG
+        finally:
+            await service.close()
+            await server.close()
+
+    run(scenario())
+
+
+class StubConfig:
+    """send_response 只用到渐进式发送的配置"""
+
+    def get_progressive_commands(self):
+        return []
+
+
+class StubEvent:
+    def chain_result(self, chain):
+        return chain
+
+
+def _handler(panel_service):
+    handler = BaseStandHandler.__new__(BaseStandHandler)
+    handler.config_manager = StubConfig()
+    handler.panel_service = panel_service
+    handler.metrics = panel_service.metrics
+    return handler
+
+
+def test_unavailable_api_degrades_to_text_only():
+    async def scenario():
+        stub = StubPanelAPI(500)
+        server = await start_stub(stub)
+        service = await start_service(server, timeout=1.0, max_retries=1)
+        panel_service = PanelService(service, "remote", fetch_enabled=True)
+        request = PanelRequest(name="白金之星", ability="5,5,5,5,4,5")
+        try:
+            image = await panel_service.get_panel(request)
+            results = [
+                result
+                async for result in _handler(panel_service).send_response(
+                    StubEvent(), "替身信息", panel=request
+                )
+            ]
+        finally:
+            await service.close()
+            await server.close()
+        return image, results, panel_service
+
+    image, results, panel_service = run(scenario())
+    assert image is None
+    assert panel_service.metrics.get_counter("panel.degraded") == 2
+    assert len(results) == 1
+    chain = results[0]
+    assert len(chain) == 1
+    assert chain[0].text == f"替身信息\n\n{UITexts.PANEL_UNAVAILABLE}"
+
+
+def test_probes_steer_url_mode_away_from_failing_endpoint():
+    async def scenario():
+        healthy, broken = StubPanelAPI("ok"), StubPanelAPI(500)
+        servers = [await start_stub(healthy), await start_stub(broken)]
+        healthy_url = str(servers[0].make_url("/"))
+        service = StandAPIService([healthy_url, str(servers[1].make_url("/"))])
+        await service.start()
+        try:
+            # 直接发送图片地址时节点统计只来自健康检查
+            for _ in range(service.endpoint_pool.eject_consecutive_failures):
+                await service.probe_endpoints()
+            urls = {service.get_image_url(name="a") for _ in range(20)}
+        finally:
+            await service.close()
+            for server in servers:
+                await server.close()
+        return urls, healthy_url, service
+
+    urls, healthy_url, service = run(scenario())
+    assert all(url.startswith(healthy_url) for url in urls)
+    assert service.metrics.get_counter("api.endpoint_ejections") == 1
@@ -0,0 +1,31 @@
+"""
+原子写入：新文件使用固定权限，覆盖写入沿用已有文件的权限
+"""
+
+import os
+import stat
+
+import pytest
+
+from stand_plugin.utils.atomic_file import NEW_FILE_MODE, AtomicFileWriter
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="Windows不支持POSIX权限")
+
+
+def _mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_file_uses_fixed_mode(tmp_path):
+    target = tmp_path / "data.json"
+    AtomicFileWriter("never").write_json(target, {"a": 1})
+    assert _mode(target) == NEW_FILE_MODE
+
+
+def test_overwrite_keeps_existing_mode(tmp_path):
+    target = tmp_path / "data.json"
+    target.write_text("{}")
+    os.chmod(target, 0o600)
+    AtomicFileWriter("never").write_json(target, {"a": 1})
+    assert _mode(target) == 0o600
+    assert target.read_text(encoding="utf-8").startswith("{")
@@ -0,0 +1,88 @@
+"""
+觉醒记录的保留策略：写入时顺便压缩为紧凑格式，超出保留期的逐日次数并入累计值
+"""
+
+import json
+
+from stand_plugin.services.stand_storage import JsonStandStorage, SQLiteStandStorage
+
+USER_ID = "10001"
+
+
+def _record(count: int, date: str) -> dict:
+    return {"count": count, "last_awaken_time": f"{date} 08:00:00"}
+
+
+def test_write_compacts_legacy_file_and_archives_old_days(tmp_path):
+    storage = JsonStandStorage(tmp_path, retention_days=2)
+    # 旧版按日期索引的文件
+    file_path = storage._get_awaken_records_file(USER_ID)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_text(
+        json.dumps(
+            {
+                "2024-01-01": _record(3, "2024-01-01"),
+                "2024-01-08": _record(1, "2024-01-08"),
+                "2024-01-09": _record(2, "2024-01-09"),
+            }
+        ),
+        encoding="utf-8",
+    )
+    assert storage.load_awaken_record(USER_ID, "2024-01-09")["count"] == 2
+
+    storage.save_awaken_record(USER_ID, "2024-01-10", _record(1, "2024-01-10"))
+
+    data = json.loads(file_path.read_text(encoding="utf-8"))
+    assert data["version"] == JsonStandStorage.AWAKEN_RECORDS_VERSION
+    assert data["today"]["date"] == "2024-01-10"
+    # 保留期为2天：截止日期 2024-01-08 之前的记录并入累计值
+    assert data["history"] == {"2024-01-08": 1, "2024-01-09": 2}
+    assert data["archived_total"] == 3
+    assert storage.load_awaken_record(USER_ID, "2024-01-10")["count"] == 1
+    assert storage.load_awaken_record(USER_ID, "2024-01-09") == {"count": 2}
+    assert storage.load_awaken_record(USER_ID, "2024-01-01") is None
+    storage.close()
+
+
+def test_archived_total_carries_over_across_compactions(tmp_path):
+    storage = JsonStandStorage(tmp_path, retention_days=1)
+    for day, count in ((1, 2), (2, 3), (3, 4)):
+        date = f"2024-01-0{day}"
+        storage.save_awaken_record(USER_ID, date, _record(count, date))
+
+    assert storage.compact_awaken_records("2024-01-05", pause=0) == 1
+    data = json.loads(
+        storage._get_awaken_records_file(USER_ID).read_text(encoding="utf-8")
+    )
+    assert data["today"] is None
+    assert data["history"] == {}
+    assert data["archived_total"] == 2 + 3 + 4
+    # 已经是最新格式时不再改写
+    assert storage.compact_awaken_records("2024-01-05", pause=0) == 0
+
+    storage.save_awaken_record(USER_ID, "2024-01-09", _record(1, "2024-01-09"))
+    data = json.loads(
+        storage._get_awaken_records_file(USER_ID).read_text(encoding="utf-8")
+    )
+    assert data["archived_total"] == 9
+    assert data["today"]["count"] == 1
+    storage.close()
+
+
+def test_sqlite_compaction_accumulates_totals(tmp_path):
+    storage = SQLiteStandStorage(tmp_path / "stands.db", retention_days=1)
+    for day, count in ((1, 2), (2, 3), (3, 4)):
+        date = f"2024-01-0{day}"
+        storage.save_awaken_record(USER_ID, date, _record(count, date))
+
+    assert storage.compact_awaken_records("2024-01-03") == 1
+    storage.save_awaken_record(USER_ID, "2024-01-05", _record(1, "2024-01-05"))
+    assert storage.compact_awaken_records("2024-01-06") == 2
+
+    conn = storage._get_connection()
+    assert conn.execute(
+        "SELECT archived_total FROM awaken_totals WHERE user_id = ?", (USER_ID,)
+    ).fetchone() == (2 + 3 + 4,)
+    assert storage.load_awaken_record(USER_ID, "2024-01-05")["count"] == 1
+    assert storage.load_awaken_record(USER_ID, "2024-01-01") is None
+    storage.close()
@@ -0,0 +1,81 @@
+"""
+觉醒次数的检查与消耗在一次读写中完成，批量觉醒次数不足时一次也不扣除
+"""
+
+import datetime
+
+import pytest
+
+from stand_plugin.resources import UITexts
+from stand_plugin.services.stand_data_service import StandDataService
+
+USER_ID = "10001"
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def service(request, tmp_path):
+    service = StandDataService(datetime.timezone.utc, tmp_path, request.param)
+    yield service
+    service.close()
+
+
+def test_consume_until_daily_limit(service):
+    for expected in (1, 2, 3):
+        allowed, count, last_awaken_time, message = service.try_consume_awaken(
+            USER_ID, daily_limit=3
+        )
+        assert allowed and count == expected and message == ""
+        assert last_awaken_time is not None
+
+    allowed, count, _, message = service.try_consume_awaken(USER_ID, daily_limit=3)
+    assert not allowed
+    assert count == 3
+    assert "今日觉醒次数已用完" in message
+    assert service.get_today_awaken_count(USER_ID) == 3
+
+
+def test_batch_consume_is_all_or_nothing(service):
+    assert service.try_consume_awaken(USER_ID, daily_limit=10, amount=8)[:2] == (
+        True,
+        8,
+    )
+
+    allowed, count, _, message = service.try_consume_awaken(
+        USER_ID, daily_limit=10, amount=5
+    )
+    assert not allowed
+    assert count == 8
+    assert message == UITexts.AWAKEN_BATCH_INSUFFICIENT.format(remaining=2, amount=5)
+    assert service.get_today_awaken_count(USER_ID) == 8
+
+    assert service.try_consume_awaken(USER_ID, daily_limit=10, amount=2)[:2] == (
+        True,
+        10,
+    )
+
+
+def test_disabled_and_unlimited(service):
+    assert not service.try_consume_awaken(USER_ID, daily_limit=0)[0]
+    assert service.get_today_awaken_count(USER_ID) == 0
+    for expected in range(1, 6):
+        assert service.try_consume_awaken(USER_ID, daily_limit=-1)[:2] == (
+            True,
+            expected,
+        )
+
+
+def test_json_consume_reads_record_once(tmp_path):
+    service = StandDataService(datetime.timezone.utc, tmp_path, "json")
+    storage = service.storage
+    reads = []
+    original_read = storage._read_awaken_json
+
+    def counting_read(user_id):
+        reads.append(user_id)
+        return original_read(user_id)
+
+    storage._read_awaken_json = counting_read
+    service.try_consume_awaken(USER_ID, daily_limit=3)
+    service.try_consume_awaken(USER_ID, daily_limit=3)
+    assert reads == [USER_ID, USER_ID]
+    service.close()
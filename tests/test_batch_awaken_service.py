@@ -0,0 +1,121 @@
+"""
+十连觉醒候选替身：保存在数据目录中，重载后仍然有效，同一批候选只能被选择一次
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import time
+
+import pytest
+
+from stand_plugin.services.batch_awaken_service import BatchAwakenService
+from stand_plugin.services.stand_data_service import StandDataService
+
+USER_ID = "10001"
+
+
+class StubNameGenerator:
+    def __init__(self):
+        self.count = 0
+
+    def generate_random_stand_name(self):
+        self.count += 1
+        return f"替身{self.count}"
+
+
+@pytest.fixture
+def data_service(tmp_path):
+    service = StandDataService(datetime.timezone.utc, tmp_path, "json")
+    yield service
+    service.close()
+
+
+def _service(data_service, ttl=600):
+    return BatchAwakenService(
+        data_service,
+        StubNameGenerator(),
+        None,
+        data_service.data_dir_path,
+        datetime.timezone.utc,
+        candidate_ttl=ttl,
+        fsync_policy="never",
+    )
+
+
+def test_candidates_survive_reload(data_service):
+    service = _service(data_service)
+    candidates, count, _ = asyncio.run(service.awaken(USER_ID, 3, daily_limit=10))
+    assert len(candidates) == 3 and count == 3
+
+    # 插件重载或另一个进程使用同一数据目录
+    reloaded = _service(data_service)
+    assert asyncio.run(reloaded.has_pending(USER_ID))
+    chosen = asyncio.run(reloaded.choose(USER_ID, 2))
+    assert chosen == candidates[1]
+    assert data_service.get_user_stand(USER_ID).name == candidates[1].name
+
+    assert not asyncio.run(service.has_pending(USER_ID))
+    assert asyncio.run(service.choose(USER_ID, 1)) is None
+
+
+def test_concurrent_choices_save_once(data_service):
+    first, second = _service(data_service), _service(data_service)
+    asyncio.run(first.awaken(USER_ID, 3, daily_limit=10))
+
+    async def choose_both():
+        return await asyncio.gather(first.choose(USER_ID, 1), second.choose(USER_ID, 3))
+
+    results = asyncio.run(choose_both())
+    assert sum(result is not None for result in results) == 1
+    assert not list(first.pending_dir.iterdir())
+
+
+def test_invalid_index_keeps_candidates(data_service):
+    service = _service(data_service)
+    asyncio.run(service.awaken(USER_ID, 2, daily_limit=10))
+    assert asyncio.run(service.choose(USER_ID, 5)) is None
+    assert asyncio.run(service.has_pending(USER_ID))
+
+
+def test_failed_save_returns_candidates(data_service):
+    service = _service(data_service)
+    asyncio.run(service.awaken(USER_ID, 2, daily_limit=10))
+
+    async def failing_save(*args):
+        raise OSError("disk full")
+
+    data_service.asave_user_stand = failing_save
+    with pytest.raises(OSError):
+        asyncio.run(service.choose(USER_ID, 1))
+    assert asyncio.run(service.has_pending(USER_ID))
+    assert [p.name for p in service.pending_dir.iterdir()] == [f"{USER_ID}.json"]
+
+
+def test_expired_candidates_are_ignored_and_pruned(data_service):
+    service = _service(data_service)
+    asyncio.run(service.awaken(USER_ID, 2, daily_limit=10))
+    asyncio.run(service.awaken("10002", 2, daily_limit=10))
+
+    path = service.pending_dir / f"{USER_ID}.json"
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert record["date"] == service._today()
+    record["expires_at"] = time.time() - 1
+    path.write_text(json.dumps(record), encoding="utf-8")
+    # 进程在选择过程中中断后遗留的认领文件
+    stale_claim = service.pending_dir / f".10003.{'0' * 32}.claim"
+    stale_claim.write_text("{}", encoding="utf-8")
+    old = time.time() - service.candidate_ttl - 1
+    os.utime(stale_claim, (old, old))
+
+    assert not asyncio.run(service.has_pending(USER_ID))
+    assert asyncio.run(service.prune()) == 2
+    assert [p.name for p in service.pending_dir.iterdir()] == ["10002.json"]
+
+
+def test_insufficient_awakens_create_no_candidates(data_service):
+    service = _service(data_service)
+    candidates, count, message = asyncio.run(service.awaken(USER_ID, 5, daily_limit=3))
+    assert candidates is None and count == 0 and message
+    assert not asyncio.run(service.has_pending(USER_ID))
@@ -0,0 +1,122 @@
+"""
+指令装饰器：重复指令拦截与指令限流相互独立，被丢弃的重复指令不消耗限流次数，默认不限流
+"""
+
+import asyncio
+
+from stand_plugin.handlers.base_handler import (
+    BaseStandHandler,
+    rate_limited,
+    single_flight,
+)
+from stand_plugin.resources import UITexts
+from stand_plugin.utils.config_manager import ConfigManager
+from stand_plugin.utils.rate_limiter import RateLimiter
+from stand_plugin.utils.single_flight import CommandSingleFlight
+
+
+class StubEvent:
+    message_str = "/替身面板 白金之星"
+
+    def __init__(self, user_id="10001"):
+        self.user_id = user_id
+
+    def get_sender_id(self):
+        return self.user_id
+
+    def get_sender_name(self):
+        return "用户"
+
+    def get_message_type(self):
+        return None
+
+    def get_group_id(self):
+        return None
+
+    def chain_result(self, chain):
+        return chain[0].text
+
+
+class StubActivity:
+    def __init__(self):
+        self.touched = []
+
+    def touch(self, user_id, user_name, group_id=None):
+        self.touched.append(user_id)
+
+
+class PanelHandler(BaseStandHandler):
+    def __init__(self, rules, config=None):
+        self.config_manager = ConfigManager(config or {})
+        self.single_flight = CommandSingleFlight(window=5)
+        self.rate_limiter = RateLimiter(RateLimiter.parse_rules(rules))
+        self.activity_tracker = StubActivity()
+        self.gate = asyncio.Event()
+        self.executions = 0
+
+    @single_flight("替身面板")
+    @rate_limited("替身面板")
+    async def handle_panel(self, event):
+        self.executions += 1
+        await self.gate.wait()
+        yield "面板"
+
+
+async def _collect(handler, event):
+    return [result async for result in handler.handle_panel(event)]
+
+
+def test_rate_limits_are_off_by_default():
+    assert ConfigManager({}).get_rate_limits() == []
+
+    async def scenario():
+        handler = PanelHandler(ConfigManager({}).get_rate_limits())
+        handler.gate.set()
+        return [await _collect(handler, StubEvent()) for _ in range(20)]
+
+    assert asyncio.run(scenario()) == [["面板"]] * 20
+
+
+def test_rate_limited_replies_with_wait_message():
+    async def scenario():
+        handler = PanelHandler(["替身面板 2/60"])
+        handler.gate.set()
+        results = [await _collect(handler, StubEvent()) for _ in range(3)]
+        return handler, results
+
+    handler, results = asyncio.run(scenario())
+    assert results[:2] == [["面板"], ["面板"]]
+    assert results[2] != ["面板"] and len(results[2]) == 1
+    assert handler.executions == 2
+    assert handler.activity_tracker.touched == ["10001"] * 3
+
+
+def test_dropped_duplicates_do_not_consume_rate_limit():
+    async def scenario():
+        handler = PanelHandler(["替身面板 2/60"])
+        first = asyncio.ensure_future(_collect(handler, StubEvent()))
+        await asyncio.sleep(0)
+        # 上一条还在执行时重复发送：直接丢弃并提示，不计入限流
+        duplicates = [await _collect(handler, StubEvent()) for _ in range(3)]
+        handler.gate.set()
+        await first
+        second = await _collect(handler, StubEvent())
+        return handler, duplicates, second
+
+    handler, duplicates, second = asyncio.run(scenario())
+    assert duplicates == [[UITexts.DUPLICATE_COMMAND]] * 3
+    assert second == ["面板"]
+    assert handler.executions == 2
+
+
+def test_duplicate_notice_can_be_disabled():
+    async def scenario():
+        handler = PanelHandler([], {"duplicate_command_notice": False})
+        first = asyncio.ensure_future(_collect(handler, StubEvent()))
+        await asyncio.sleep(0)
+        duplicate = await _collect(handler, StubEvent())
+        handler.gate.set()
+        await first
+        return duplicate
+
+    assert asyncio.run(scenario()) == []
@@ -0,0 +1,78 @@
+"""
+冷却到期队列：冷却表和到期队列的长度只与冷却时长内的使用人数有关，不随累计用户数增长
+"""
+
+import pytest
+
+from stand_plugin.utils import cooldown_manager
+from stand_plugin.utils.cooldown_manager import CooldownManager
+
+
+class FakeClock:
+    """替换冷却管理器模块中的 time"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cooldown_manager, "time", clock)
+    return clock
+
+
+def test_many_distinct_users_stay_bounded(clock):
+    manager = CooldownManager(cooldown_seconds=60)
+    rate = 10  # 每秒使用的新用户数
+    steady = rate * 60
+    for user in range(20_000):
+        clock.now += 1 / rate
+        assert manager.check_cooldown(str(user)) == (True, 0)
+        assert len(manager.user_cooldowns) <= steady + 1
+        assert len(manager._expiry_queue) <= steady + 1
+    assert len(manager.user_cooldowns) >= steady - 1
+
+
+def test_repeat_users_do_not_grow_queue(clock):
+    manager = CooldownManager(cooldown_seconds=30)
+    users = [str(i) for i in range(50)]
+    for _ in range(200):
+        for user in users:
+            manager.check_cooldown(user)
+        clock.now += 31
+    # 每个用户在一个冷却时长内最多留下一条记录
+    assert len(manager.user_cooldowns) <= len(users)
+    assert len(manager._expiry_queue) <= len(users)
+
+
+def test_rejected_checks_do_not_enqueue(clock):
+    manager = CooldownManager(cooldown_seconds=60)
+    assert manager.check_cooldown("1") == (True, 0)
+    for _ in range(100):
+        clock.now += 0.5
+        allowed, remaining = manager.check_cooldown("1")
+        assert not allowed and remaining > 0
+    assert len(manager._expiry_queue) == 1
+
+    clock.now += 60
+    assert manager.check_cooldown("2") == (True, 0)
+    assert list(manager.user_cooldowns) == ["2"]
+    assert len(manager._expiry_queue) == 1
+
+
+def test_superseded_entries_are_dropped_without_evicting_newer(clock):
+    manager = CooldownManager(cooldown_seconds=10)
+    manager.check_cooldown("1")
+    clock.now += 10
+    # 旧记录刚好到期时再次使用，新的结束时间不会被旧队列项删除
+    assert manager.check_cooldown("1") == (True, 0)
+    clock.now += 5
+    assert manager.check_cooldown("1")[0] is False
+    assert len(manager._expiry_queue) == 1
@@ -0,0 +1,123 @@
+"""
+冷却快照：二进制快照写入后重新加载，未到期的冷却按用户ID哈希恢复，到期和损坏的数据被忽略
+"""
+
+import asyncio
+
+import pytest
+
+from stand_plugin.utils import cooldown_manager
+from stand_plugin.utils.cooldown_manager import CooldownManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cooldown_manager, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return tmp_path / "cooldowns.bin"
+
+
+def test_round_trip_restores_active_cooldowns(clock, snapshot_path):
+    manager = CooldownManager(60, snapshot_path=snapshot_path)
+    manager.check_cooldown("1")
+    clock.now += 30
+    manager.check_cooldown("2")
+    manager.check_cooldown("3")
+    manager.save_snapshot()
+
+    header = CooldownManager.SNAPSHOT_HEADER.size
+    assert snapshot_path.stat().st_size == header + 3 * 16
+
+    clock.now += 10
+    restored = CooldownManager(60, snapshot_path=snapshot_path)
+    assert restored._restored == 3
+    assert restored.check_cooldown("1") == (False, 20)
+    assert restored.check_cooldown("2") == (False, 50)
+    assert restored.check_cooldown("4") == (True, 0)
+
+    # 恢复的记录到期后被清理，不再需要按哈希查找
+    clock.now += 60
+    assert restored.check_cooldown("2") == (True, 0)
+    assert restored._restored == 0
+    assert set(restored.user_cooldowns) == {"2"}
+
+
+def test_expired_entries_are_skipped_on_load(clock, snapshot_path):
+    manager = CooldownManager(60, snapshot_path=snapshot_path)
+    manager.check_cooldown("1")
+    clock.now += 50
+    manager.check_cooldown("2")
+    manager.save_snapshot()
+
+    clock.now += 20
+    restored = CooldownManager(60, snapshot_path=snapshot_path)
+    assert restored._restored == 1
+    assert restored.check_cooldown("1") == (True, 0)
+    assert restored.check_cooldown("2") == (False, 40)
+
+
+def test_async_save_skips_when_unchanged(clock, snapshot_path):
+    manager = CooldownManager(60, snapshot_path=snapshot_path)
+    manager.check_cooldown("1")
+    asyncio.run(manager.asave_snapshot())
+    assert snapshot_path.exists()
+
+    # 没有变化时不写入
+    snapshot_path.unlink()
+    asyncio.run(manager.asave_snapshot())
+    assert not snapshot_path.exists()
+
+    manager.check_cooldown("2")
+    asyncio.run(manager.asave_snapshot())
+    assert snapshot_path.exists()
+    assert manager.metrics.snapshot()["cooldown.snapshot.count"] == 2
+
+
+def test_restored_snapshot_is_saved_again(clock, snapshot_path):
+    manager = CooldownManager(60, snapshot_path=snapshot_path)
+    manager.check_cooldown("1")
+    manager.save_snapshot()
+
+    # 恢复后再保存，哈希键的记录原样写回
+    restored = CooldownManager(60, snapshot_path=snapshot_path)
+    restored.check_cooldown("2")
+    restored.save_snapshot()
+    again = CooldownManager(60, snapshot_path=snapshot_path)
+    assert again._restored == 2
+    assert again.check_cooldown("1")[0] is False
+    assert again.check_cooldown("2")[0] is False
+
+
+@pytest.mark.parametrize(
+    "content",
+    [b"", b"JSCD", b"XXXX\x01\x00\x00\x00\x01\x00\x00\x00" + b"\x00" * 16],
+)
+def test_invalid_snapshot_is_ignored(clock, snapshot_path, content):
+    snapshot_path.write_bytes(content)
+    manager = CooldownManager(60, snapshot_path=snapshot_path)
+    assert manager._restored == 0
+    assert manager.check_cooldown("1") == (True, 0)
+
+
+def test_truncated_snapshot_is_ignored(clock, snapshot_path):
+    manager = CooldownManager(60, snapshot_path=snapshot_path)
+    manager.check_cooldown("1")
+    manager.save_snapshot()
+    snapshot_path.write_bytes(snapshot_path.read_bytes()[:-1])
+    assert CooldownManager(60, snapshot_path=snapshot_path)._restored == 0
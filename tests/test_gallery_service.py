@@ -0,0 +1,91 @@
+"""
+替身图鉴游标分页：翻页期间有新成员加入时，已有成员既不重复也不遗漏
+"""
+
+import asyncio
+import datetime
+
+import pytest
+
+from stand_plugin.services.activity_service import ActivityTracker
+from stand_plugin.services.gallery_service import GalleryService
+from stand_plugin.services.stand_data_service import StandDataService
+
+GROUP_ID = "100"
+
+
+@pytest.fixture
+def gallery(tmp_path):
+    data_service = StandDataService(datetime.timezone.utc, tmp_path, "json")
+    tracker = ActivityTracker(tmp_path, datetime.timezone.utc, fsync_policy="never")
+    gallery = GalleryService(data_service, tracker, None, page_size=4)
+    yield gallery
+    data_service.close()
+
+
+def _join(gallery, user_id, with_stand=True):
+    gallery.activity_tracker.touch(user_id, f"用户{user_id}", GROUP_ID)
+    if with_stand:
+        gallery.data_service.save_user_stand(user_id, "ABCDEA", f"替身{user_id}")
+
+
+def _page(gallery, cursor=None):
+    return asyncio.run(gallery.get_page(GROUP_ID, cursor))
+
+
+def _user_ids(page):
+    return [entry.user_id for entry in page.entries]
+
+
+def test_cursor_is_stable_across_inserts(gallery):
+    for i in range(20, 40):
+        _join(gallery, str(i))
+
+    first = _page(gallery)
+    assert _user_ids(first) == ["20", "21", "22", "23"]
+    assert first.next_cursor == "23"
+
+    # 翻页期间在游标前后都有新成员加入
+    _join(gallery, "10")
+    _join(gallery, "225")
+    _join(gallery, "245")
+
+    seen = _user_ids(first)
+    cursor = first.next_cursor
+    while cursor is not None:
+        page = _page(gallery, cursor)
+        seen.extend(_user_ids(page))
+        cursor = page.next_cursor
+
+    # 游标之前加入的成员不会让后续页面错位，游标之后加入的成员按顺序出现
+    assert len(seen) == len(set(seen))
+    assert set(str(i) for i in range(20, 40)) <= set(seen)
+    assert "245" in seen and "10" not in seen and "225" not in seen
+
+
+def test_members_without_stands_are_skipped(gallery):
+    for i in range(10, 30):
+        _join(gallery, str(i), with_stand=i % 3 == 0)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = _page(gallery, cursor)
+        pages += 1
+        seen.extend(_user_ids(page))
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == [str(i) for i in range(10, 30) if i % 3 == 0]
+    assert pages == 2
+
+
+def test_scan_limit_bounds_a_page(gallery):
+    # 大量成员没有替身时，单页最多检查 page_size × MAX_SCAN_FACTOR 个成员
+    for i in range(100, 200):
+        _join(gallery, str(i), with_stand=i >= 190)
+
+    page = _page(gallery)
+    assert page.entries == []
+    scanned = gallery.page_size * GalleryService.MAX_SCAN_FACTOR
+    assert page.next_cursor == str(100 + scanned - 1)
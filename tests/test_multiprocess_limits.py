@@ -0,0 +1,156 @@
+"""
+多进程共用数据目录时的冷却与每日觉醒次数限制
+
+启动多个进程（每个进程内再开多个线程）同时对同一个用户执行操作，
+验证跨进程后每日觉醒次数不超过上限、共享冷却期间只有一次使用成功。
+"""
+
+import asyncio
+import datetime
+import multiprocessing
+import threading
+
+import pytest
+
+from stand_plugin.services.stand_data_service import StandDataService
+from stand_plugin.services.stand_storage import JsonStandStorage
+from stand_plugin.utils.cooldown_manager import CooldownManager
+from stand_plugin.utils.shared_state import SQLiteSharedState
+
+PROCESSES = 6
+THREADS = 4
+ATTEMPTS = 20  # 每个线程的尝试次数
+DAILY_LIMIT = 5
+USER_ID = "10001"
+DATE = "2024-01-01"
+
+pytestmark = pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="需要 fork 启动方式（子进程沿用已注册的 stand_plugin 包）",
+)
+
+
+def _run_threads(func) -> int:
+    """在多个线程中执行 func，返回所有线程成功的次数之和"""
+    results = []
+    lock = threading.Lock()
+
+    def worker() -> None:
+        allowed = func()
+        with lock:
+            results.append(allowed)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(results)
+
+
+def _shared_counter_worker(db_path, barrier, queue) -> None:
+    state = SQLiteSharedState(db_path, busy_timeout=30)
+    barrier.wait()
+
+    def attempt() -> int:
+        return sum(
+            state.consume_counter("awaken:" + USER_ID, DATE, DAILY_LIMIT)[0]
+            for _ in range(ATTEMPTS)
+        )
+
+    queue.put(_run_threads(attempt))
+    state.close()
+
+
+def _json_awaken_worker(data_dir, barrier, queue) -> None:
+    storage = JsonStandStorage(data_dir)
+    barrier.wait()
+
+    def attempt() -> int:
+        return sum(
+            storage.consume_awaken(USER_ID, DATE, f"{DATE} 00:00:00", DAILY_LIMIT)[0]
+            for _ in range(ATTEMPTS)
+        )
+
+    queue.put(_run_threads(attempt))
+    storage.close()
+
+
+def _data_service_worker(data_dir, barrier, queue) -> None:
+    # 延迟写入时本地记录落盘较晚，次数限制只能依靠共享状态
+    shared_state = SQLiteSharedState(data_dir / "shared_state.db", busy_timeout=30)
+    service = StandDataService(
+        datetime.timezone.utc,
+        data_dir,
+        "json",
+        write_behind_max_pending=100,
+        shared_state=shared_state,
+    )
+    barrier.wait()
+
+    def attempt() -> int:
+        return sum(
+            service.try_consume_awaken(USER_ID, DAILY_LIMIT)[0] for _ in range(ATTEMPTS)
+        )
+
+    queue.put(_run_threads(attempt))
+    service.close()
+    shared_state.close()
+
+
+def _cooldown_worker(db_path, barrier, queue) -> None:
+    state = SQLiteSharedState(db_path, busy_timeout=30)
+    manager = CooldownManager(3600, shared_state=state)
+    barrier.wait()
+
+    async def attempt() -> int:
+        results = await asyncio.gather(
+            *(manager.acheck_cooldown(USER_ID) for _ in range(ATTEMPTS))
+        )
+        return sum(allowed for allowed, _ in results)
+
+    queue.put(asyncio.run(attempt()))
+    state.close()
+
+
+def _run_processes(target, *args) -> int:
+    """启动 PROCESSES 个进程同时执行 target，返回所有进程成功的次数之和"""
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(PROCESSES)
+    queue = context.Queue()
+    processes = [
+        context.Process(target=target, args=(*args, barrier, queue))
+        for _ in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    total = sum(queue.get(timeout=120) for _ in processes)
+    for process in processes:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+    return total
+
+
+def test_shared_counter_respects_limit_across_processes(tmp_path):
+    db_path = tmp_path / "shared_state.db"
+    assert _run_processes(_shared_counter_worker, db_path) == DAILY_LIMIT
+
+    state = SQLiteSharedState(db_path)
+    assert state.get_counter("awaken:" + USER_ID, DATE) == DAILY_LIMIT
+    state.close()
+
+
+def test_json_consume_awaken_respects_limit_across_processes(tmp_path):
+    assert _run_processes(_json_awaken_worker, tmp_path) == DAILY_LIMIT
+
+    storage = JsonStandStorage(tmp_path)
+    assert storage.load_awaken_record(USER_ID, DATE)["count"] == DAILY_LIMIT
+    storage.close()
+
+
+def test_write_behind_with_shared_state_respects_limit_across_processes(tmp_path):
+    assert _run_processes(_data_service_worker, tmp_path) == DAILY_LIMIT
+
+
+def test_shared_cooldown_allows_one_use_across_processes(tmp_path):
+    assert _run_processes(_cooldown_worker, tmp_path / "shared_state.db") == 1
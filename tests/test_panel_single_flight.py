@@ -0,0 +1,97 @@
+"""
+面板请求合并：并发的相同面板只渲染一次，不同面板各自渲染，个别等待者取消不影响其他人
+"""
+
+import asyncio
+import threading
+
+from stand_plugin.models.stand_models import PanelRequest
+from stand_plugin.services.api_service import StandAPIService
+from stand_plugin.services.panel_renderer import LocalPanelRenderer
+from stand_plugin.services.panel_service import PanelService
+
+
+class SlowRenderer(LocalPanelRenderer):
+    """计数的渲染器，渲染时等待放行，便于让请求在渲染期间并发到达"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self.release = threading.Event()
+
+    @staticmethod
+    def is_available() -> bool:
+        return True
+
+    def render(self, request: PanelRequest) -> bytes:
+        self.calls.append(request.name)
+        self.release.wait(5)
+        return f"png:{request.name}".encode()
+
+
+def _service(renderer):
+    return PanelService(StandAPIService("http://localhost"), "local", renderer)
+
+
+async def _wait_for_calls(renderer, count):
+    async def wait():
+        while len(renderer.calls) < count:
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(wait(), timeout=5)
+
+
+def test_concurrent_identical_panels_render_once():
+    renderer = SlowRenderer()
+    service = _service(renderer)
+    request = PanelRequest(name="白金之星", ability="5,5,5,5,4,5")
+
+    async def scenario():
+        tasks = [asyncio.ensure_future(service.get_panel(request)) for _ in range(10)]
+        await _wait_for_calls(renderer, 1)
+        renderer.release.set()
+        return await asyncio.gather(*tasks)
+
+    images = asyncio.run(scenario())
+    assert renderer.calls == ["白金之星"]
+    assert {image.data for image in images} == {"png:白金之星".encode()}
+    assert service.metrics.get_counter("panel.flight.executions") == 1
+    assert service.metrics.get_counter("panel.flight.shared") == 9
+
+
+def test_different_panels_and_later_requests_render_separately():
+    renderer = SlowRenderer()
+    renderer.release.set()
+    service = _service(renderer)
+
+    async def scenario():
+        await asyncio.gather(
+            service.get_panel(PanelRequest(name="a")),
+            service.get_panel(PanelRequest(name="b")),
+        )
+        # 上一次执行结束后（未启用缓存）重新渲染
+        await service.get_panel(PanelRequest(name="a"))
+
+    asyncio.run(scenario())
+    assert sorted(renderer.calls) == ["a", "a", "b"]
+    assert service.metrics.get_counter("panel.flight.shared") == 0
+
+
+def test_cancelled_waiter_does_not_cancel_shared_render():
+    renderer = SlowRenderer()
+    service = _service(renderer)
+    request = PanelRequest(name="a")
+
+    async def scenario():
+        first = asyncio.ensure_future(service.get_panel(request))
+        second = asyncio.ensure_future(service.get_panel(request))
+        await _wait_for_calls(renderer, 1)
+        first.cancel()
+        await asyncio.sleep(0)
+        renderer.release.set()
+        return first.cancelled(), await second
+
+    cancelled, image = asyncio.run(scenario())
+    assert cancelled
+    assert image.data == b"png:a"
+    assert renderer.calls == ["a"]
@@ -0,0 +1,105 @@
+"""
+渲染队列削峰：执行槽和排队都已占满时立即拒绝新请求，面板只回复文字
+"""
+
+import asyncio
+
+import pytest
+
+from stand_plugin.handlers.base_handler import BaseStandHandler
+from stand_plugin.models.stand_models import PanelRequest
+from stand_plugin.resources import UITexts
+from stand_plugin.services.api_service import StandAPIService
+from stand_plugin.services.panel_service import PanelService
+from stand_plugin.services.render_queue import RenderQueue, RenderQueueFullError
+
+
+async def _fill(queue, count):
+    """提交 count 个阻塞的任务，返回 (任务列表, 放行事件)"""
+    gate = asyncio.Event()
+
+    async def blocked():
+        await gate.wait()
+        return "done"
+
+    tasks = [asyncio.ensure_future(queue.submit(blocked)) for _ in range(count)]
+    await asyncio.sleep(0)
+    return tasks, gate
+
+
+def test_sheds_when_slots_and_queue_are_full():
+    async def scenario():
+        queue = RenderQueue(max_concurrency=2, max_queue=1)
+        tasks, gate = await _fill(queue, 3)
+        assert queue.is_saturated()
+
+        with pytest.raises(RenderQueueFullError):
+            await queue.submit(lambda: asyncio.sleep(0))
+        shed = queue.metrics.get_counter("render_queue.shed")
+
+        gate.set()
+        results = await asyncio.gather(*tasks)
+        # 队列空出后恢复接收
+        assert not queue.is_saturated()
+        assert await queue.submit(lambda: asyncio.sleep(0, "ok")) == "ok"
+        return shed, results
+
+    shed, results = asyncio.run(scenario())
+    assert shed == 1
+    assert results == ["done"] * 3
+
+
+def test_queued_requests_are_accepted_until_limit():
+    async def scenario():
+        queue = RenderQueue(max_concurrency=1, max_queue=2)
+        tasks, gate = await _fill(queue, 2)
+        # 一个执行中、一个排队，排队未满时仍然接收
+        assert not queue.is_saturated()
+        tasks.append(asyncio.ensure_future(queue.submit(gate.wait)))
+        await asyncio.sleep(0)
+        assert queue.is_saturated()
+        gate.set()
+        await asyncio.gather(*tasks)
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert queue.metrics.get_counter("render_queue.shed") == 0
+
+
+class StubConfig:
+    def get_progressive_commands(self):
+        return []
+
+
+class StubEvent:
+    def chain_result(self, chain):
+        return chain
+
+
+def test_full_queue_replies_text_with_busy_notice():
+    async def scenario():
+        queue = RenderQueue(max_concurrency=1, max_queue=0)
+        panel_service = PanelService(
+            StandAPIService("http://localhost"), "local", render_queue=queue
+        )
+        handler = BaseStandHandler.__new__(BaseStandHandler)
+        handler.config_manager = StubConfig()
+        handler.panel_service = panel_service
+        handler.metrics = panel_service.metrics
+
+        tasks, gate = await _fill(queue, 1)
+        with pytest.raises(RenderQueueFullError):
+            await panel_service.get_panel(PanelRequest(name="a"))
+        results = [
+            result
+            async for result in handler.send_response(
+                StubEvent(), "替身信息", panel=PanelRequest(name="b")
+            )
+        ]
+        gate.set()
+        await asyncio.gather(*tasks)
+        return results
+
+    results = asyncio.run(scenario())
+    assert len(results) == 1 and len(results[0]) == 1
+    assert results[0][0].text == f"替身信息\n\n{UITexts.PANEL_BUSY}"
@@ -0,0 +1,75 @@
+"""
+替身数据缓存：进程外修改后重新读取，读取期间的并发写入不会留下过期缓存
+"""
+
+import datetime
+import json
+import sqlite3
+
+import pytest
+
+from stand_plugin.services.stand_data_service import StandDataService
+from stand_plugin.utils.lru_cache import LRUCache
+
+USER_ID = "10001"
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def service(request, tmp_path):
+    service = StandDataService(
+        datetime.timezone.utc, tmp_path, request.param, stand_cache=LRUCache(16)
+    )
+    yield service
+    service.close()
+
+
+def _edit_behind_cache(service, name: str) -> None:
+    """绕过服务直接修改存储中的替身名"""
+    if service.storage.__class__.__name__ == "JsonStandStorage":
+        file_path = service.storage._get_user_stand_file(USER_ID)
+        data = json.loads(file_path.read_text(encoding="utf-8"))
+        data["name"] = name
+        # 原地改写（inode不变），依靠修改时间和大小识别
+        file_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    else:
+        conn = sqlite3.connect(service.data_dir_path / "stands.db")
+        conn.execute("UPDATE stands SET name = ? WHERE user_id = ?", (name, USER_ID))
+        conn.commit()
+        conn.close()
+
+
+def test_external_edit_invalidates_cache(service):
+    service.save_user_stand(USER_ID, "A,B,C,D,E,A", "白金之星")
+    assert service.get_user_stand(USER_ID).name == "白金之星"
+    assert service.get_user_stand(USER_ID).name == "白金之星"
+    assert service.stand_cache.get(USER_ID) is not LRUCache.MISSING
+
+    _edit_behind_cache(service, "世界（进程外修改）")
+    assert service.get_user_stand(USER_ID).name == "世界（进程外修改）"
+
+
+def test_save_invalidates_cached_entry(service):
+    service.save_user_stand(USER_ID, "A,B,C,D,E,A", "白金之星")
+    service.get_user_stand(USER_ID)
+    service.save_user_stand(USER_ID, "A,B,C,D,E,A", "黄金体验")
+    assert service.stand_cache.get(USER_ID) is LRUCache.MISSING
+    assert service.get_user_stand(USER_ID).name == "黄金体验"
+
+
+def test_write_during_read_does_not_leave_stale_entry(service):
+    service.save_user_stand(USER_ID, "A,B,C,D,E,A", "旧替身")
+    storage = service.storage
+    original_load = storage.load_stand
+
+    def load_then_write(user_id):
+        # 读取旧数据之后、写入缓存之前，其他线程保存了新数据
+        data = original_load(user_id)
+        storage.save_stand(user_id, dict(data, name="新替身"))
+        return data
+
+    storage.load_stand = load_then_write
+    assert service.get_user_stand(USER_ID).name == "旧替身"
+    storage.load_stand = original_load
+
+    # 缓存中的版本号是读取之前获取的，与新数据的版本号不同，不会命中
+    assert service.get_user_stand(USER_ID).name == "新替身"
@@ -0,0 +1,94 @@
+"""
+目录布局迁移：迁移前后平铺目录与分片目录的数据都能读到，分片目录中的新数据不被覆盖
+"""
+
+import json
+import threading
+
+import pytest
+
+from stand_plugin.services.stand_storage import JsonStandStorage
+
+DATE = "2024-01-01"
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+@pytest.fixture
+def legacy_dir(tmp_path):
+    """旧版平铺布局的数据目录"""
+    for i in range(5):
+        user_id = str(i)
+        _write(tmp_path / "stands" / f"{user_id}.json", {"name": f"stand-{i}"})
+        _write(
+            tmp_path / "awaken_records" / f"user_{user_id}.json",
+            {DATE: {"count": i + 1, "last_awaken_time": f"{DATE} 10:00:00"}},
+        )
+    return tmp_path
+
+
+def test_new_data_dir_starts_sharded(tmp_path):
+    storage = JsonStandStorage(tmp_path)
+    assert storage.layout_version == JsonStandStorage.LAYOUT_SHARDED
+    storage.save_stand("1", {"name": "new"})
+    assert storage._get_user_stand_file("1").exists()
+    assert not storage._get_legacy_stand_file("1").exists()
+
+
+def test_reads_fall_back_to_flat_files_before_migration(legacy_dir):
+    storage = JsonStandStorage(legacy_dir)
+    assert storage.layout_version == JsonStandStorage.LAYOUT_FLAT
+    assert storage.load_stand("3") == {"name": "stand-3"}
+    assert storage.load_awaken_record("3", DATE)["count"] == 4
+
+
+def test_sharded_copy_wins_over_flat_file(legacy_dir):
+    storage = JsonStandStorage(legacy_dir)
+    # 迁移前写入的新数据只进入分片目录，读取时优先于旧文件
+    storage.save_stand("2", {"name": "updated"})
+    assert storage.load_stand("2") == {"name": "updated"}
+    assert [uid for uid, _ in storage.iter_stand_files()].count("2") == 1
+
+    storage.migrate_layout(pause=0)
+    assert storage.load_stand("2") == {"name": "updated"}
+    assert not storage._get_legacy_stand_file("2").exists()
+
+
+def test_migration_moves_everything_and_stops_fallback(legacy_dir):
+    storage = JsonStandStorage(legacy_dir)
+    assert storage.migrate_layout(pause=0) == 10
+    assert storage.layout_version == JsonStandStorage.LAYOUT_SHARDED
+    assert not list(legacy_dir.glob("stands/*.json"))
+    for i in range(5):
+        assert storage.load_stand(str(i)) == {"name": f"stand-{i}"}
+        assert storage.load_awaken_record(str(i), DATE)["count"] == i + 1
+
+    # 重新打开时读取布局标记，不再回退到平铺目录
+    reopened = JsonStandStorage(legacy_dir)
+    assert reopened.layout_version == JsonStandStorage.LAYOUT_SHARDED
+    assert reopened.load_stand("4") == {"name": "stand-4"}
+
+
+def test_interrupted_migration_keeps_dual_reads(legacy_dir):
+    storage = JsonStandStorage(legacy_dir)
+    stop_event = threading.Event()
+    stop_event.set()
+    assert storage.migrate_layout(stop_event=stop_event) == 0
+    assert storage.layout_version == JsonStandStorage.LAYOUT_FLAT
+
+    # 部分文件已迁移、部分仍在平铺目录时，两处的数据都能读到
+    storage._move_legacy_file(
+        storage._get_legacy_stand_file("0"), storage._get_user_stand_file("0")
+    )
+    assert storage.load_stand("0") == {"name": "stand-0"}
+    assert storage.load_stand("1") == {"name": "stand-1"}
+    assert sorted(uid for uid, _ in storage.iter_stand_files()) == list("01234")
+
+    reopened = JsonStandStorage(legacy_dir)
+    assert reopened.layout_version == JsonStandStorage.LAYOUT_FLAT
+    reopened.migrate_layout(pause=0)
+    assert reopened.layout_version == JsonStandStorage.LAYOUT_SHARDED
+    assert sorted(uid for uid, _ in reopened.iter_stand_files()) == list("01234")
@@ -0,0 +1,115 @@
+"""
+JSON -> SQLite 迁移：可中断续传、导入期间回退读取JSON、不覆盖导入期间的新数据
+"""
+
+import threading
+
+import pytest
+
+from stand_plugin.services.stand_storage import JsonStandStorage, SQLiteStandStorage
+from stand_plugin.services.storage_migrator import (
+    ImportingStandStorage,
+    JsonToSQLiteMigrator,
+)
+
+USERS = 60
+DATE = "2024-01-01"
+
+
+def _stand(name: str) -> dict:
+    return {
+        "abilities": "A,B,C,D,E,A",
+        "name": name,
+        "created_at": "2024-01-01 00:00:00",
+        "acquisition_method": "awaken",
+    }
+
+
+@pytest.fixture
+def storages(tmp_path):
+    json_storage = JsonStandStorage(tmp_path)
+    for i in range(USERS):
+        user_id = f"{i:04d}"
+        json_storage.save_stand(user_id, _stand(f"json-{user_id}"))
+        json_storage.save_awaken_record(
+            user_id, DATE, {"count": 2, "last_awaken_time": f"{DATE} 08:00:00"}
+        )
+    sqlite_storage = SQLiteStandStorage(tmp_path / "stands.db")
+    yield json_storage, sqlite_storage
+    sqlite_storage.close()
+    json_storage.close()
+
+
+def _count(sqlite_storage, table: str) -> int:
+    conn = sqlite_storage._get_connection()
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_stopped_migration_resumes_from_cursor(storages):
+    json_storage, sqlite_storage = storages
+    stop_event = threading.Event()
+    reads = []
+
+    class CountingMigrator(JsonToSQLiteMigrator):
+        def _read_file(self, file_path):
+            reads.append(file_path.name)
+            if len(reads) == 25:
+                stop_event.set()
+            return super()._read_file(file_path)
+
+    migrator = CountingMigrator(json_storage, sqlite_storage, batch_size=10)
+    assert migrator.run(stop_event) is False
+    assert not migrator.is_done()
+    # 停止前读取的文件全部提交，游标停在最后一个文件
+    assert _count(sqlite_storage, "stands") == 25
+    assert sqlite_storage.get_meta(migrator.META_STANDS_CURSOR) == reads[-1]
+
+    reads.clear()
+    assert migrator.run() is True
+    assert migrator.is_done()
+    # 续传时跳过已提交的文件，不会重复读取
+    stand_reads = [name for name in reads if not name.startswith("user_")]
+    assert len(stand_reads) == USERS - 25
+    assert _count(sqlite_storage, "stands") == USERS
+    assert _count(sqlite_storage, "awaken_records") == USERS
+    assert sqlite_storage.load_awaken_record("0007", DATE)["count"] == 2
+
+
+def test_importing_storage_falls_back_to_json(storages):
+    json_storage, sqlite_storage = storages
+    storage = ImportingStandStorage(sqlite_storage, json_storage)
+    assert storage.importing
+
+    assert sqlite_storage.load_stand("0001") is None
+    assert storage.load_stand("0001")["name"] == "json-0001"
+    assert storage.load_awaken_record("0001", DATE)["count"] == 2
+    assert storage.stand_version("0001") is not None
+
+    # 消耗次数前先导入JSON中的今日记录，上限按完整的今日次数判断
+    assert storage.consume_awaken("0001", DATE, f"{DATE} 09:00:00", 3)[:2] == (
+        True,
+        3,
+    )
+    assert storage.consume_awaken("0001", DATE, f"{DATE} 10:00:00", 3)[:2] == (
+        False,
+        3,
+    )
+
+    storage.run_import()
+    assert not storage.importing
+    assert storage.load_stand("0042")["name"] == "json-0042"
+
+
+def test_import_does_not_overwrite_newer_sqlite_rows(storages):
+    json_storage, sqlite_storage = storages
+    storage = ImportingStandStorage(sqlite_storage, json_storage)
+
+    storage.save_stand("0003", _stand("written-during-import"))
+    storage.save_awaken_record(
+        "0003", DATE, {"count": 5, "last_awaken_time": f"{DATE} 12:00:00"}
+    )
+    storage.run_import()
+
+    assert storage.load_stand("0003")["name"] == "written-during-import"
+    assert storage.load_awaken_record("0003", DATE)["count"] == 5
+    assert storage.load_stand("0004")["name"] == "json-0004"
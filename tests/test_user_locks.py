@@ -0,0 +1,85 @@
+"""
+按用户分段的异步锁：同一用户的觉醒消耗串行执行，不同用户可以并行
+"""
+
+import asyncio
+import datetime
+import threading
+import time
+from collections import Counter
+
+from stand_plugin.services.stand_data_service import StandDataService
+from stand_plugin.utils.io_executor import IOExecutor
+from stand_plugin.utils.striped_lock import StripedLock
+
+
+def test_same_key_maps_to_same_lock():
+    locks = StripedLock(8)
+    assert locks.for_key("10001") is locks.for_key("10001")
+    assert len({id(locks.for_key(str(i))) for i in range(100)}) == 8
+
+
+def _tracking_service(tmp_path):
+    """记录存储层同时处理每个用户的请求数量，消耗次数时稍作停顿放大交错"""
+    service = StandDataService(
+        datetime.timezone.utc, tmp_path, "json", io_executor=IOExecutor(max_workers=8)
+    )
+    storage = service.storage
+    original = storage.consume_awaken
+    lock = threading.Lock()
+    active = Counter()
+    stats = {"max_same_user": 0, "max_total": 0}
+
+    def tracking_consume(user_id, *args, **kwargs):
+        with lock:
+            active[user_id] += 1
+            stats["max_same_user"] = max(stats["max_same_user"], active[user_id])
+            stats["max_total"] = max(stats["max_total"], sum(active.values()))
+        try:
+            time.sleep(0.01)
+            return original(user_id, *args, **kwargs)
+        finally:
+            with lock:
+                active[user_id] -= 1
+
+    storage.consume_awaken = tracking_consume
+    return service, stats
+
+
+def test_concurrent_consume_for_one_user_is_serialized(tmp_path):
+    service, stats = _tracking_service(tmp_path)
+
+    async def run():
+        return await asyncio.gather(
+            *(service.atry_consume_awaken("10001", daily_limit=5) for _ in range(12))
+        )
+
+    results = asyncio.run(run())
+    assert sum(1 for allowed, *_ in results if allowed) == 5
+    assert sorted(count for allowed, count, *_ in results if allowed) == [1, 2, 3, 4, 5]
+    assert stats["max_same_user"] == 1
+    assert service.get_today_awaken_count("10001") == 5
+    service.close()
+
+
+def test_different_users_run_in_parallel(tmp_path):
+    service, stats = _tracking_service(tmp_path)
+    # 选取落在不同分段锁上的用户
+    users, stripes = [], set()
+    for i in range(1000):
+        stripe = id(service.user_locks.for_key(str(i)))
+        if stripe not in stripes:
+            stripes.add(stripe)
+            users.append(str(i))
+        if len(users) == 4:
+            break
+
+    async def run():
+        return await asyncio.gather(
+            *(service.atry_consume_awaken(user_id, daily_limit=3) for user_id in users)
+        )
+
+    assert all(allowed for allowed, *_ in asyncio.run(run()))
+    assert stats["max_same_user"] == 1
+    assert stats["max_total"] > 1
+    service.close()
@@ -0,0 +1,70 @@
+"""
+延迟写入：锁外读取底层存储期间发生刷新时不丢失计数，刷新失败的数据保留在队列中
+"""
+
+from stand_plugin.services.stand_storage import JsonStandStorage
+from stand_plugin.services.write_behind_storage import WriteBehindStorage
+
+USER_ID = "10001"
+DATE = "2024-01-01"
+
+
+def test_flush_during_unlocked_read_does_not_lose_increment(tmp_path):
+    class RacingStorage(JsonStandStorage):
+        racing = True
+
+        def load_awaken_record(self, user_id, date):
+            record = super().load_awaken_record(user_id, date)
+            if self.racing:
+                # 读到旧记录之后，另一次觉醒完成并且已经刷新落盘
+                self.racing = False
+                wrapper.consume_awaken(user_id, date, f"{date} 09:00:00", 10)
+                wrapper.flush()
+            return record
+
+    inner = RacingStorage(tmp_path)
+    wrapper = WriteBehindStorage(inner, max_pending=100)
+
+    allowed, count, _ = wrapper.consume_awaken(USER_ID, DATE, f"{DATE} 10:00:00", 10)
+    assert allowed
+    # 刷新代数变化后重新读取，两次觉醒都被计入
+    assert count == 2
+    wrapper.flush()
+    assert inner.load_awaken_record(USER_ID, DATE)["count"] == 2
+    wrapper.close()
+
+
+def test_pending_records_are_visible_and_coalesced(tmp_path):
+    inner = JsonStandStorage(tmp_path)
+    wrapper = WriteBehindStorage(inner, max_pending=100)
+    for _ in range(3):
+        wrapper.consume_awaken(USER_ID, DATE, f"{DATE} 10:00:00", 10)
+
+    assert inner.load_awaken_record(USER_ID, DATE) is None
+    assert wrapper.load_awaken_record(USER_ID, DATE)["count"] == 3
+    assert wrapper.flush() == 1
+    assert inner.load_awaken_record(USER_ID, DATE)["count"] == 3
+    wrapper.close()
+
+
+def test_failed_flush_keeps_entries_queued(tmp_path):
+    class FailingStorage(JsonStandStorage):
+        failing = True
+
+        def write_batch(self, stands, awaken_records):
+            if self.failing:
+                raise OSError("disk full")
+            super().write_batch(stands, awaken_records)
+
+    inner = FailingStorage(tmp_path)
+    wrapper = WriteBehindStorage(inner, max_pending=2)
+    wrapper.save_awaken_record("a", DATE, {"count": 1})
+    # 达到积压上限触发刷新，刷新失败不影响已经进入队列的写入
+    wrapper.save_awaken_record("b", DATE, {"count": 1})
+    assert wrapper.pending_count() == 2
+    assert wrapper.load_awaken_record("b", DATE) == {"count": 1}
+
+    inner.failing = False
+    assert wrapper.flush() == 2
+    assert inner.load_awaken_record("a", DATE)["count"] == 1
+    wrapper.close()
@@ -0,0 +1,137 @@
+"""
+原子文件写入工具类
+"""
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Set
+
+from astrbot.api import logger
+
+# 新建文件的权限（不读取进程 umask：os.umask 只能通过设置来读取，多线程下不安全）
+NEW_FILE_MODE = 0o644
+
+
+class AtomicFileWriter:
+    """
+    原子文件写入器
+
+    先写入同目录下的临时文件，再用 os.replace 替换目标文件，
+    写入过程中崩溃只会留下临时文件，不会破坏原有数据。
+
+    落盘策略（fsync_policy）：
+    - always: 每次写入都 fsync 文件和目录，最安全，延迟最高
+    - batched: 记录待落盘的文件，由定时任务调用 sync_pending() 统一 fsync
+    - never: 不主动 fsync，交给操作系统回写，延迟最低
+    """
+
+    POLICIES = ("always", "batched", "never")
+
+    def __init__(self, fsync_policy: str = "batched"):
+        """
+        初始化写入器
+
+        Args:
+            fsync_policy: 落盘策略："always"、"batched"、"never"
+        """
+        if fsync_policy not in self.POLICIES:
+            logger.warning(f"⚠️ 未知的落盘策略 {fsync_policy}，使用 batched")
+            fsync_policy = "batched"
+        self.fsync_policy = fsync_policy
+        self._pending_lock = threading.Lock()
+        self._pending_files: Set[Path] = set()
+        self._pending_dirs: Set[Path] = set()
+
+    def write_json(self, file_path: Path, data: dict) -> None:
+        """
+        原子地写入JSON文件
+
+        Args:
+            file_path: 目标文件路径
+            data: 要写入的数据
+        """
+        content = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        self.write_bytes(file_path, content)
+
+    def write_bytes(self, file_path: Path, content: bytes) -> None:
+        """
+        原子地写入二进制文件
+
+        Args:
+            file_path: 目标文件路径
+            content: 文件内容
+        """
+        file_path = Path(file_path)
+        mode = self._target_mode(file_path)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp"
+        )
+        try:
+            # mkstemp 创建的文件权限为 0600，os.replace 后会变成目标文件的权限
+            if hasattr(os, "fchmod"):
+                os.fchmod(fd, mode)
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+                f.flush()
+                if self.fsync_policy == "always":
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        if self.fsync_policy == "always":
+            self._fsync_dir(file_path.parent)
+        elif self.fsync_policy == "batched":
+            with self._pending_lock:
+                self._pending_files.add(file_path)
+                self._pending_dirs.add(file_path.parent)
+
+    @staticmethod
+    def _target_mode(file_path: Path) -> int:
+        """获取写入后文件应有的权限：沿用已有文件的权限，新文件使用默认权限"""
+        try:
+            return os.stat(file_path).st_mode & 0o7777
+        except FileNotFoundError:
+            return NEW_FILE_MODE
+
+    def sync_pending(self) -> int:
+        """
+        fsync 所有待落盘的文件和目录（batched 策略下由定时任务调用）
+
+        Returns:
+            int: 本次落盘的文件数
+        """
+        with self._pending_lock:
+            files, self._pending_files = self._pending_files, set()
+            dirs, self._pending_dirs = self._pending_dirs, set()
+
+        for file_path in files:
+            try:
+                fd = os.open(file_path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        for dir_path in dirs:
+            self._fsync_dir(dir_path)
+        return len(files)
+
+    @staticmethod
+    def _fsync_dir(dir_path: Path) -> None:
+        """fsync 目录，使 os.replace 产生的目录项变更落盘（Windows不支持，直接跳过）"""
+        if os.name == "nt":
+            return
+        fd = os.open(dir_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
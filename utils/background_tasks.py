@@ -0,0 +1,149 @@
+"""
+后台任务管理工具类
+"""
+
+import asyncio
+import datetime
+from typing import Any, Awaitable, Callable, List
+
+from astrbot.api import logger
+
+
+class BackgroundTaskManager:
+    """管理插件的后台周期任务，插件卸载时统一取消"""
+
+    def __init__(self):
+        """初始化后台任务管理器"""
+        self._tasks: List[asyncio.Task] = []
+
+    def start_periodic(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        interval: float,
+        initial_delay: float = 0,
+    ) -> None:
+        """
+        启动周期任务
+
+        Args:
+            name: 任务名称（用于日志）
+            func: 每次执行的异步函数
+            interval: 执行间隔（秒）
+            initial_delay: 首次执行前的等待时间（秒）
+        """
+        task = asyncio.create_task(
+            self._run_periodic(name, func, interval, initial_delay), name=name
+        )
+        self._tasks.append(task)
+
+    def start_daily(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        timezone: Any,
+        offset: float = 0,
+    ) -> None:
+        """
+        启动每日任务，在指定时区每天零点过后 offset 秒执行
+
+        每次执行后重新计算到下一个零点的等待时间，执行耗时不会让执行时刻逐日漂移。
+
+        Args:
+            name: 任务名称（用于日志）
+            func: 每次执行的异步函数
+            timezone: 时区
+            offset: 零点之后的延迟（秒）
+        """
+        task = asyncio.create_task(
+            self._run_daily(name, func, timezone, offset), name=name
+        )
+        self._tasks.append(task)
+
+    def start_once(
+        self, name: str, func: Callable[[], Awaitable[None]], delay: float = 0
+    ) -> None:
+        """
+        启动一次性后台任务
+
+        Args:
+            name: 任务名称（用于日志）
+            func: 要执行的异步函数
+            delay: 执行前的等待时间（秒）
+        """
+        task = asyncio.create_task(self._run_once(name, func, delay), name=name)
+        self._tasks.append(task)
+
+    async def _run_once(
+        self, name: str, func: Callable[[], Awaitable[None]], delay: float
+    ) -> None:
+        """执行一次任务，失败只记录日志"""
+        await asyncio.sleep(delay)
+        try:
+            await func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ 后台任务 {name} 执行失败: {e}")
+
+    async def _run_periodic(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        interval: float,
+        initial_delay: float,
+    ) -> None:
+        """周期执行任务，单次失败只记录日志，不会终止任务"""
+        await asyncio.sleep(initial_delay)
+        while True:
+            try:
+                await func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ 后台任务 {name} 执行失败: {e}")
+            await asyncio.sleep(interval)
+
+    async def _run_daily(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        timezone: Any,
+        offset: float,
+    ) -> None:
+        """每天零点过后执行任务，单次失败只记录日志，不会终止任务"""
+        while True:
+            await asyncio.sleep(self.seconds_until_next_day(timezone) + offset)
+            try:
+                await func()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ 后台任务 {name} 执行失败: {e}")
+
+    @staticmethod
+    def seconds_until_next_day(timezone: Any) -> float:
+        """
+        计算到指定时区下一个零点的秒数
+
+        Args:
+            timezone: 时区
+
+        Returns:
+            float: 秒数
+        """
+        now = datetime.datetime.now(timezone)
+        tomorrow = (now + datetime.timedelta(days=1)).date()
+        midnight = datetime.datetime.combine(tomorrow, datetime.time())
+        if hasattr(timezone, "localize"):
+            midnight = timezone.localize(midnight)
+        else:
+            midnight = midnight.replace(tzinfo=timezone)
+        return max(0.0, (midnight - now).total_seconds())
+
+    async def shutdown(self) -> None:
+        """取消所有后台任务并等待其结束"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
@@ -0,0 +1,95 @@
+"""
+熔断器工具类
+"""
+
+import time
+from typing import Optional
+
+from .metrics import MetricsRegistry
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    - closed: 正常状态，连续失败达到阈值后进入 open
+    - open: 熔断状态，直接拒绝请求，经过恢复时间后进入 half_open
+    - half_open: 放行一个试探请求，成功则恢复 closed，失败则重新 open
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        metrics: Optional[MetricsRegistry] = None,
+        name: str = "circuit",
+    ):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 触发熔断的连续失败次数
+            reset_timeout: 熔断后等待多久（秒）放行试探请求
+            metrics: 指标注册表（可选）
+            name: 指标名前缀
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.metrics = metrics or MetricsRegistry()
+        self.name = name
+
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        # 试探请求的开始时间，试探请求被取消而没有回报结果时，超时后允许重新试探
+        self._probe_started: Optional[float] = None
+
+        self.metrics.register_gauge(
+            f"{name}.open", lambda: int(self.state != self.CLOSED)
+        )
+
+    def allow_request(self) -> bool:
+        """
+        检查是否允许发起请求
+
+        Returns:
+            bool: 允许时返回True；熔断中或已有试探请求在进行时返回False
+        """
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_started = None
+        # half_open 状态只放行一个试探请求
+        if (
+            self._probe_started is not None
+            and now - self._probe_started < self.reset_timeout
+        ):
+            return False
+        self._probe_started = now
+        return True
+
+    def record_success(self) -> None:
+        """记录一次成功请求"""
+        self._failures = 0
+        self._probe_started = None
+        if self.state != self.CLOSED:
+            self.state = self.CLOSED
+            self.metrics.inc(f"{self.name}.closes")
+
+    def record_failure(self) -> None:
+        """记录一次失败请求"""
+        self._failures += 1
+        self._probe_started = None
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.metrics.inc(f"{self.name}.opens")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
@@ -2,13 +2,17 @@
 配置管理工具类
 """
 
-from typing import List
+import re
+from typing import List, Optional
 from astrbot.api import AstrBotConfig
 
 
 class ConfigManager:
     """配置管理器"""
 
+    # 默认的远程面板API地址
+    DEFAULT_API_SERVER = "https://api.tripleying.com/api/chart"
+
     # 默认前缀词库
     DEFAULT_PREFIXES = [
         "白金",
@@ -199,7 +203,30 @@ class ConfigManager:
         Returns:
             str: API服务器地址
         """
-        return self.config.get("api_server", "https://api.tripleying.com/api/chart")
+        return self.get_api_servers()[0]
+
+    def get_api_servers(self) -> List[str]:
+        """
+        获取所有面板API节点地址
+        支持逗号或换行分隔的字符串，也支持列表配置
+
+        Returns:
+            List[str]: 节点地址列表（至少一个）
+        """
+        servers_config = self.config.get("api_server", None)
+
+        if isinstance(servers_config, str):
+            servers = [
+                server.strip()
+                for server in re.split(r"[,\n]", servers_config)
+                if server.strip()
+            ]
+        elif isinstance(servers_config, list):
+            servers = [str(server).strip() for server in servers_config if server]
+        else:
+            servers = []
+
+        return servers or [self.DEFAULT_API_SERVER]
 
     def get_white_list(self) -> List[str]:
         """
@@ -263,3 +290,317 @@ class ConfigManager:
             bool: 他的替身指令是否启用
         """
         return self.config.get("enable_view_others_stand", True)
+
+    def get_storage_engine(self) -> str:
+        """
+        获取数据存储引擎
+
+        Returns:
+            str: 存储引擎，"json"(每用户一个文件) 或 "sqlite"(单数据库)
+        """
+        return self.config.get("storage_engine", "json")
+
+    def get_io_max_workers(self) -> int:
+        """
+        获取数据读写线程数
+
+        Returns:
+            int: 专用I/O线程池的工作线程数
+        """
+        return self.config.get("io_max_workers", 4)
+
+    def get_stand_cache_capacity(self) -> int:
+        """
+        获取替身数据缓存容量
+
+        Returns:
+            int: 最多缓存的用户数，0为禁用缓存
+        """
+        return self.config.get("stand_cache_capacity", 2048)
+
+    def get_awaken_record_retention_days(self) -> int:
+        """
+        获取觉醒记录保留天数
+
+        Returns:
+            int: 保留逐日记录的天数，0为只保留累计值
+        """
+        return self.config.get("awaken_record_retention_days", 30)
+
+    def is_write_behind_enabled(self) -> bool:
+        """
+        检查延迟写入是否启用
+
+        Returns:
+            bool: 延迟写入是否启用
+        """
+        return self.config.get("enable_write_behind", False)
+
+    def get_write_behind_interval(self) -> int:
+        """
+        获取延迟写入的刷新间隔
+
+        Returns:
+            int: 刷新间隔（秒），即进程崩溃时最多丢失的写入时间窗口
+        """
+        return self.config.get("write_behind_interval", 5)
+
+    def get_write_behind_max_pending(self) -> int:
+        """
+        获取延迟写入的最大积压条目数
+
+        Returns:
+            int: 积压达到该数量时立即批量写入
+        """
+        return self.config.get("write_behind_max_pending", 500)
+
+    def get_fsync_policy(self) -> str:
+        """
+        获取数据落盘策略
+
+        Returns:
+            str: "always"(每次写入fsync)、"batched"(定时fsync)、"never"(不主动fsync)
+        """
+        return self.config.get("fsync_policy", "batched")
+
+    def get_fsync_interval(self) -> int:
+        """
+        获取batched落盘策略的同步间隔
+
+        Returns:
+            int: 同步间隔（秒）
+        """
+        return self.config.get("fsync_interval", 2)
+
+    def get_duplicate_command_window(self) -> float:
+        """
+        获取重复指令合并窗口
+
+        Returns:
+            float: 合并窗口（秒），执行中的指令在开始后该时间内拦截相同的指令，0表示不合并重复指令
+        """
+        return self.config.get("duplicate_command_window", 2.0)
+
+    def is_duplicate_command_notice_enabled(self) -> bool:
+        """
+        检查被丢弃的重复指令是否回复提示
+
+        Returns:
+            bool: 是否回复提示，关闭时静默丢弃
+        """
+        return self.config.get("duplicate_command_notice", True)
+
+    def get_panel_backend(self) -> str:
+        """
+        获取面板生成方式
+
+        Returns:
+            str: "remote"(远程面板API) 或 "local"(本地渲染)
+        """
+        return self.config.get("panel_backend", "remote")
+
+    def get_panel_font_path(self) -> Optional[str]:
+        """
+        获取本地面板渲染使用的字体路径
+
+        Returns:
+            Optional[str]: 字体文件路径，未配置时返回None（自动查找系统中文字体）
+        """
+        return self.config.get("panel_font_path") or None
+
+    def get_panel_cache_max_mb(self) -> int:
+        """
+        获取面板图片缓存的容量上限
+
+        Returns:
+            int: 缓存容量（MB），0表示禁用缓存
+        """
+        return self.config.get("panel_cache_max_mb", 64)
+
+    def is_api_fetch_enabled(self) -> bool:
+        """
+        检查是否由插件拉取远程面板图片
+
+        Returns:
+            bool: 开启时插件通过连接池下载图片后发送，关闭时直接发送图片地址
+        """
+        return self.config.get("enable_api_fetch", False)
+
+    def get_api_fetch_timeout(self) -> float:
+        """
+        获取拉取一张面板图片的总期限
+
+        Returns:
+            float: 期限（秒），包含所有重试
+        """
+        return self.config.get("api_fetch_timeout", 5.0)
+
+    def get_api_fetch_retries(self) -> int:
+        """
+        获取拉取面板图片失败后的最大重试次数
+
+        Returns:
+            int: 最大重试次数
+        """
+        return self.config.get("api_fetch_retries", 2)
+
+    def get_api_health_check_interval(self) -> int:
+        """
+        获取面板API节点健康检查间隔
+
+        Returns:
+            int: 间隔（秒），0表示不做健康检查（仅在配置了多个节点时生效）
+        """
+        return self.config.get("api_health_check_interval", 30)
+
+    def get_render_max_concurrency(self) -> int:
+        """
+        获取同时进行的面板渲染/下载数量上限
+
+        Returns:
+            int: 并发上限
+        """
+        return self.config.get("render_max_concurrency", 4)
+
+    def get_render_max_queue(self) -> int:
+        """
+        获取面板渲染的最大排队数
+
+        Returns:
+            int: 排队上限，超过时新的请求只回复文字
+        """
+        return self.config.get("render_max_queue", 32)
+
+    def get_progressive_commands(self) -> List[str]:
+        """
+        获取启用渐进式发送的指令列表
+
+        Returns:
+            List[str]: 指令名称列表（不带斜杠），如 ["随机替身", "觉醒替身"]
+        """
+        commands = [
+            str(command).strip().lstrip("/")
+            for command in self.config.get("progressive_commands", [])
+        ]
+        return [command for command in commands if command]
+
+    def get_progressive_deadline(self) -> float:
+        """
+        获取渐进式发送时等待面板图片的期限
+
+        Returns:
+            float: 期限（秒），超过后不再发送图片
+        """
+        return self.config.get("progressive_deadline", 15.0)
+
+    def get_today_precompute_days(self) -> int:
+        """
+        获取今日替身预计算覆盖的活跃天数
+
+        Returns:
+            int: 每天零点后为最近多少天内活跃的用户预计算今日替身，0表示不预计算
+        """
+        return self.config.get("today_precompute_days", 7)
+
+    def get_gallery_page_size(self) -> int:
+        """
+        获取替身图鉴每页的替身数量
+
+        Returns:
+            int: 每页数量（1-30）
+        """
+        return self.config.get("gallery_page_size", 9)
+
+    def get_batch_awaken_max(self) -> int:
+        """
+        获取十连觉醒一次最多觉醒的数量
+
+        Returns:
+            int: 最大数量，0为禁用十连觉醒
+        """
+        return self.config.get("batch_awaken_max", 10)
+
+    def get_cooldown_snapshot_interval(self) -> int:
+        """
+        获取冷却快照的保存间隔
+
+        Returns:
+            int: 间隔（秒），0为不保存快照（重启后冷却清空）
+        """
+        return self.config.get("cooldown_snapshot_interval", 30)
+
+    def get_rate_limits(self) -> List[str]:
+        """
+        获取指令限流规则
+
+        Returns:
+            List[str]: 规则列表，每条为 "指令 用户次数/秒数 [群聊次数/秒数]"，默认为空（不限流）
+        """
+        return [
+            str(rule).strip()
+            for rule in self.config.get("rate_limits", [])
+            if str(rule).strip()
+        ]
+
+    def is_adaptive_cooldown_enabled(self) -> bool:
+        """
+        检查是否启用自适应冷却
+
+        Returns:
+            bool: 是否根据负载自动调整随机替身冷却时间
+        """
+        return self.config.get("adaptive_cooldown", False)
+
+    def get_adaptive_cooldown_min(self) -> int:
+        """
+        获取自适应冷却时间下限
+
+        Returns:
+            int: 冷却时间下限（秒）
+        """
+        return self.config.get("adaptive_cooldown_min", 60)
+
+    def get_adaptive_cooldown_max(self) -> int:
+        """
+        获取自适应冷却时间上限
+
+        Returns:
+            int: 冷却时间上限（秒）
+        """
+        return self.config.get("adaptive_cooldown_max", 900)
+
+    def get_adaptive_cooldown_target_rate(self) -> int:
+        """
+        获取自适应冷却的全局基准使用频率
+
+        Returns:
+            int: 每分钟使用次数，达到时使用 random_cooldown 作为冷却时间
+        """
+        return self.config.get("adaptive_cooldown_target_rate", 30)
+
+    def get_adaptive_cooldown_group_target_rate(self) -> int:
+        """
+        获取自适应冷却的单群基准使用频率
+
+        Returns:
+            int: 单个群每分钟使用次数，达到时使用 random_cooldown 作为冷却时间
+        """
+        return self.config.get("adaptive_cooldown_group_target_rate", 10)
+
+    def get_adaptive_cooldown_target_latency(self) -> float:
+        """
+        获取自适应冷却的基准面板生成耗时
+
+        Returns:
+            float: 面板生成平均耗时（秒），达到时使用 random_cooldown 作为冷却时间
+        """
+        return self.config.get("adaptive_cooldown_target_latency", 2.0)
+
+    def get_shared_state_backend(self) -> str:
+        """
+        获取跨进程共享状态后端
+
+        Returns:
+            str: "none"(不共享) 或 "sqlite"(数据目录下的共享数据库)
+        """
+        return self.config.get("shared_state_backend", "none")
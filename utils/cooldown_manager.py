@@ -2,29 +2,139 @@
 冷却时间管理工具类
 """
 
+import hashlib
+import struct
+import sys
 import time
-from typing import Tuple
+from array import array
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from astrbot.api import logger
+
+from .atomic_file import AtomicFileWriter
+from .io_executor import IOExecutor
+from .metrics import MetricsRegistry
+from .shared_state import SharedStateBackend, SharedStateError
+from .sliding_window import SlidingWindow
+
+
+@dataclass(frozen=True)
+class AdaptiveCooldownPolicy:
+    """
+    自适应冷却参数
+
+    负载系数 = max(全局使用频率 / target_rate, 所在群使用频率 / group_target_rate,
+    面板生成延迟 / target_latency)，实际冷却时间 = 基础冷却时间 × 负载系数，限制在 [min_seconds, max_seconds] 内。
+    """
+
+    min_seconds: int = 60
+    max_seconds: int = 900
+    target_rate: float = 30  # 全局每分钟使用次数，达到时使用基础冷却时间
+    group_target_rate: float = 10  # 单个群每分钟使用次数，达到时使用基础冷却时间
+    target_latency: float = 2000  # 面板生成平均耗时（毫秒），达到时使用基础冷却时间
 
 
 class CooldownManager:
-    """冷却时间管理器"""
+    """
+    冷却时间管理器
+
+    冷却表以用户ID为键、冷却结束时间为值。
+    除冷却表外，另用一个按时间排列的到期队列记录 (结束时间, 用户ID)。
+    冷却时长固定，队首的记录总是最先到期，每次检查时只需从队首清理已到期的记录（均摊 O(1)），
+    内存占用只与冷却时长内使用过指令的用户数有关，不会随运行时间无限增长。
+
+    配置了快照文件时，未到期的冷却记录会定期写入紧凑的二进制快照，
+    插件重载或重启后从快照恢复，避免所有人的冷却同时被清空。
+    快照中只有用户ID的哈希，恢复的记录以哈希为键放在同一张冷却表中，
+    只在还有恢复的记录未到期时才需要为查询的用户计算哈希。
 
-    def __init__(self, cooldown_seconds: int = 300):
+    启用自适应冷却时，按最近一分钟的全局和所在群的使用次数（包括冷却中被拒绝的请求）以及面板生成延迟，
+    在上下限之间调整冷却时间。新的冷却时间从用户下一次使用时开始生效；
+    此时到期队列中的结束时间不再严格递增，队首未到期时其后已到期的记录会稍晚清理，不影响冷却判断。
+    """
+
+    # 统计使用频率的滑动窗口长度（秒）
+    RATE_WINDOW = 60.0
+    # 共享状态中冷却记录的键前缀
+    SHARED_KEY_PREFIX = "random_stand:"
+
+    # 快照格式：文件头（魔数、版本、条数），随后是全部用户哈希(u64)和全部结束时间(f64)
+    SNAPSHOT_MAGIC = b"JSCD"
+    SNAPSHOT_VERSION = 1
+    SNAPSHOT_HEADER = struct.Struct("<4sII")
+
+    def __init__(
+        self,
+        cooldown_seconds: int = 300,
+        metrics: Optional[MetricsRegistry] = None,
+        snapshot_path: Optional[Union[str, Path]] = None,
+        adaptive: Optional[AdaptiveCooldownPolicy] = None,
+        latency_provider: Optional[Callable[[], float]] = None,
+        shared_state: Optional[SharedStateBackend] = None,
+        io_executor: Optional[IOExecutor] = None,
+    ):
         """
-        初始化冷却管理器
+        初始化冷却管理器，配置了快照文件时从快照恢复未到期的冷却记录
 
         Args:
             cooldown_seconds: 冷却时间（秒）
+            metrics: 指标注册表（可选）
+            snapshot_path: 冷却快照文件路径（可选），不配置时冷却只保存在内存中
+            adaptive: 自适应冷却参数（可选），不配置时使用固定的冷却时间
+            latency_provider: 返回近期面板生成平均耗时（毫秒）的函数（可选）
+            shared_state: 跨进程共享状态后端（可选），配置后 acheck_cooldown 在所有进程间共享冷却
+            io_executor: 执行共享状态访问和快照写入的I/O线程池（可选）
         """
         self.cooldown_seconds = cooldown_seconds
-        self.user_cooldowns = {}  # {user_id: last_use_timestamp}
+        self.metrics = metrics or MetricsRegistry()
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        # 快照可以丢失（最多让部分用户提前结束冷却），不需要fsync
+        self._writer = AtomicFileWriter("never")
+        self._dirty = False
+        # {user_id: expires_at}，从快照恢复的记录以 user_hash 为键
+        self.user_cooldowns: Dict[Union[str, int], float] = {}
+        # 到期队列：(expires_at, user_id 或 user_hash)，按结束时间从早到晚排列
+        self._expiry_queue: Deque[Tuple[float, Union[str, int]]] = deque()
+        self._restored = 0  # 冷却表中尚未到期的恢复记录数
+
+        self.adaptive = adaptive
+        self.latency_provider = latency_provider
+        self.shared_state = shared_state
+        self.io_executor = io_executor or IOExecutor(metrics=self.metrics)
+        self._global_rate = SlidingWindow(self.RATE_WINDOW)
+        # {group_id: 使用次数窗口}，按最近使用时间排列，便于从头部清理不活跃的群
+        self._group_rates: "OrderedDict[str, SlidingWindow]" = OrderedDict()
 
-    def check_cooldown(self, user_id: str) -> Tuple[bool, int]:
+        self.metrics.register_gauge(
+            "cooldown.entries", lambda: len(self.user_cooldowns)
+        )
+        self.metrics.register_gauge("cooldown.effective", self.effective_cooldown)
+        if self.adaptive is not None:
+            self.metrics.register_gauge(
+                "cooldown.rate", lambda: round(self._global_rate.count(time.time()), 1)
+            )
+
+        if self.snapshot_path is not None:
+            self.load_snapshot()
+
+    @staticmethod
+    def _hash(user_id: str) -> int:
+        """用户ID的64位哈希（进程间稳定，用于快照）"""
+        digest = hashlib.blake2b(user_id.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def check_cooldown(
+        self, user_id: str, group_id: Optional[str] = None
+    ) -> Tuple[bool, int]:
         """
         检查用户冷却时间
 
         Args:
             user_id: 用户ID
+            group_id: 群聊ID（可选，自适应冷却按所在群的使用频率调整）
 
         Returns:
             tuple[bool, int]: (是否可以使用, 剩余冷却时间秒数)
@@ -33,24 +143,251 @@ class CooldownManager:
             return True, 0
 
         current_time = time.time()
-        last_use_time = self.user_cooldowns.get(user_id, 0)
+        self._expire(current_time)
+        if self.adaptive is not None:
+            self._record_usage(group_id, current_time)
 
         # 计算剩余冷却时间
-        remaining_cooldown = self.cooldown_seconds - (current_time - last_use_time)
+        remaining_cooldown = self._local_expiry(user_id) - current_time
 
         if remaining_cooldown <= 0:
-            # 更新最后使用时间
-            self.user_cooldowns[user_id] = current_time
+            # 记录本次使用后的冷却结束时间
+            self._remember(
+                user_id, current_time + self.effective_cooldown(group_id, current_time)
+            )
             return True, 0
         else:
             return False, int(remaining_cooldown)
 
-    def format_cooldown_message(self, remaining_seconds: int) -> str:
+    async def acheck_cooldown(
+        self, user_id: str, group_id: Optional[str] = None
+    ) -> Tuple[bool, int]:
+        """
+        检查用户冷却时间，配置了共享状态时冷却在所有进程间共享
+
+        本进程记录的冷却未结束时直接拒绝，不访问共享状态；否则在后台线程中原子地检查共享冷却，
+        并把结果记入本进程的冷却表。共享状态不可用时退回到本进程的判断。
+
+        Args:
+            user_id: 用户ID
+            group_id: 群聊ID（可选，自适应冷却按所在群的使用频率调整）
+
+        Returns:
+            tuple[bool, int]: (是否可以使用, 剩余冷却时间秒数)
+        """
+        if self.shared_state is None or self.cooldown_seconds <= 0:
+            return self.check_cooldown(user_id, group_id)
+
+        current_time = time.time()
+        self._expire(current_time)
+        if self.adaptive is not None:
+            self._record_usage(group_id, current_time)
+
+        remaining_cooldown = self._local_expiry(user_id) - current_time
+        if remaining_cooldown > 0:
+            return False, int(remaining_cooldown)
+
+        cooldown = self.effective_cooldown(group_id, current_time)
+        try:
+            allowed, expires_at = await self.io_executor.run(
+                self.shared_state.acquire_cooldown,
+                self.SHARED_KEY_PREFIX + user_id,
+                current_time,
+                cooldown,
+            )
+        except SharedStateError as e:
+            logger.warning(f"⚠️ 共享冷却不可用，只按本进程记录判断: {e}")
+            allowed, expires_at = True, current_time + cooldown
+
+        self._remember(user_id, expires_at)
+        if allowed:
+            return True, 0
+        return False, int(expires_at - current_time)
+
+    def _local_expiry(self, user_id: str) -> float:
+        """本进程记录的冷却结束时间（重启前的冷却记录只能按哈希查找），没有记录时返回0"""
+        expires_at = self.user_cooldowns.get(user_id, 0)
+        if not expires_at and self._restored:
+            expires_at = self.user_cooldowns.get(self._hash(user_id), 0)
+        return expires_at
+
+    def _remember(self, user_id: str, expires_at: float) -> None:
+        """记录用户的冷却结束时间"""
+        self.user_cooldowns[user_id] = expires_at
+        self._expiry_queue.append((expires_at, user_id))
+        self._dirty = True
+
+    def effective_cooldown(
+        self, group_id: Optional[str] = None, current_time: Optional[float] = None
+    ) -> int:
+        """
+        计算当前的实际冷却时间
+
+        Args:
+            group_id: 群聊ID（可选），不指定时只按全局负载计算
+            current_time: 当前时间（可选）
+
+        Returns:
+            int: 冷却时间（秒）
+        """
+        policy = self.adaptive
+        if policy is None or self.cooldown_seconds <= 0:
+            return self.cooldown_seconds
+
+        if current_time is None:
+            current_time = time.time()
+        load = self._global_rate.count(current_time) / policy.target_rate
+        group_rate = self._group_rates.get(group_id) if group_id else None
+        if group_rate is not None:
+            load = max(load, group_rate.count(current_time) / policy.group_target_rate)
+        if self.latency_provider is not None:
+            load = max(load, self.latency_provider() / policy.target_latency)
+
+        effective = round(self.cooldown_seconds * load)
+        return max(policy.min_seconds, min(policy.max_seconds, effective))
+
+    def _record_usage(self, group_id: Optional[str], current_time: float) -> None:
+        """记录一次使用，并清理最近两个统计窗口内没有使用过的群"""
+        self._global_rate.add(now=current_time)
+        if not group_id:
+            return
+        group_rates = self._group_rates
+        window = group_rates.get(group_id)
+        if window is None:
+            window = group_rates[group_id] = SlidingWindow(self.RATE_WINDOW)
+        else:
+            group_rates.move_to_end(group_id)
+        window.add(now=current_time)
+        while group_rates:
+            oldest = next(iter(group_rates.values()))
+            if not oldest.is_idle(current_time):
+                break
+            group_rates.popitem(last=False)
+
+    def _expire(self, current_time: float) -> None:
+        """从队首清理冷却已结束的记录"""
+        queue = self._expiry_queue
+        cooldowns = self.user_cooldowns
+        while queue and queue[0][0] <= current_time:
+            expires_at, key = queue.popleft()
+            # 用户之后再次使用过时，冷却表中是更新的时间，保留该记录
+            if cooldowns.get(key) == expires_at:
+                del cooldowns[key]
+                if type(key) is int:
+                    self._restored -= 1
+
+    def load_snapshot(self) -> int:
+        """
+        从快照文件恢复未到期的冷却记录
+
+        Returns:
+            int: 恢复的记录数
+        """
+        try:
+            content = self.snapshot_path.read_bytes()
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            logger.warning(f"⚠️ 读取冷却快照失败: {e}")
+            return 0
+
+        header_size = self.SNAPSHOT_HEADER.size
+        try:
+            magic, version, count = self.SNAPSHOT_HEADER.unpack_from(content)
+        except struct.error:
+            magic, version, count = b"", 0, 0
+        hashes, expiries = array("Q"), array("d")
+        body_size = count * (hashes.itemsize + expiries.itemsize)
+        if (
+            magic != self.SNAPSHOT_MAGIC
+            or version != self.SNAPSHOT_VERSION
+            or len(content) != header_size + body_size
+        ):
+            logger.warning("⚠️ 冷却快照格式无效，已忽略")
+            return 0
+
+        split = header_size + count * hashes.itemsize
+        hashes.frombytes(content[header_size:split])
+        expiries.frombytes(content[split:])
+        if sys.byteorder != "little":
+            hashes.byteswap()
+            expiries.byteswap()
+
+        current_time = time.time()
+        # 跳过已经到期的记录，其余按结束时间排序后放入到期队列
+        entries = [
+            (expires_at, user_hash)
+            for user_hash, expires_at in zip(hashes, expiries)
+            if expires_at > current_time
+        ]
+        entries.sort()
+        for expires_at, user_hash in entries:
+            if user_hash not in self.user_cooldowns:
+                self._restored += 1
+            # 哈希重复时保留较晚的结束时间（按时间排序，后出现的更晚）
+            self.user_cooldowns[user_hash] = expires_at
+        self._expiry_queue.extend(entries)
+        if entries:
+            logger.info(f"⏳ 已从快照恢复 {self._restored} 条冷却记录")
+        return self._restored
+
+    def _take_snapshot(self) -> Optional[List[Tuple[Union[str, int], float]]]:
+        """复制当前未到期的冷却记录（在事件循环中调用，复制后再在线程中编码写入）"""
+        if self.snapshot_path is None or not self._dirty:
+            return None
+        self._expire(time.time())
+        self._dirty = False
+        return list(self.user_cooldowns.items())
+
+    def _write_snapshot(self, items: List[Tuple[Union[str, int], float]]) -> None:
+        """把冷却记录编码为二进制快照并原子写入文件（在后台线程中计算用户ID哈希）"""
+        hashes = array(
+            "Q", (key if type(key) is int else self._hash(key) for key, _ in items)
+        )
+        expiries = array("d", (expires_at for _, expires_at in items))
+        if sys.byteorder != "little":
+            hashes.byteswap()
+            expiries.byteswap()
+        header = self.SNAPSHOT_HEADER.pack(
+            self.SNAPSHOT_MAGIC, self.SNAPSHOT_VERSION, len(items)
+        )
+        self._writer.write_bytes(
+            self.snapshot_path, header + hashes.tobytes() + expiries.tobytes()
+        )
+
+    def save_snapshot(self) -> None:
+        """同步写入冷却快照（插件卸载时调用）"""
+        items = self._take_snapshot()
+        if items is None:
+            return
+        try:
+            self._write_snapshot(items)
+        except OSError as e:
+            logger.error(f"❌ 保存冷却快照失败: {e}")
+
+    async def asave_snapshot(self) -> None:
+        """在I/O线程池中写入冷却快照（没有变化时跳过），不阻塞事件循环"""
+        items = self._take_snapshot()
+        if items is None:
+            return
+        start = time.monotonic()
+        try:
+            await self.io_executor.run(self._write_snapshot, items)
+        except OSError as e:
+            logger.error(f"❌ 保存冷却快照失败: {e}")
+            self._dirty = True
+            return
+        self.metrics.observe("cooldown.snapshot", (time.monotonic() - start) * 1000)
+
+    def format_cooldown_message(
+        self, remaining_seconds: int, effective_seconds: Optional[int] = None
+    ) -> str:
         """
         格式化冷却时间提示消息
 
         Args:
             remaining_seconds: 剩余冷却时间（秒）
+            effective_seconds: 当前的实际冷却时间（秒，可选），启用自适应冷却时显示在提示中
 
         Returns:
             str: 格式化的提示消息
@@ -58,7 +395,18 @@ class CooldownManager:
         minutes = remaining_seconds // 60
         seconds = remaining_seconds % 60
 
+        if self.adaptive is not None and effective_seconds is not None:
+            effective_minutes = effective_seconds // 60
+            effective_text = (
+                f"{effective_minutes} 分 {effective_seconds % 60} 秒"
+                if effective_minutes > 0
+                else f"{effective_seconds} 秒"
+            )
+            adaptive_hint = f"\n📈 当前冷却时间为 {effective_text}（根据使用人数和面板生成速度自动调整）"
+        else:
+            adaptive_hint = ""
+
         if minutes > 0:
-            return f"⏳ 随机替身命令冷却中，还需等待 {minutes} 分 {seconds} 秒后才能再次使用，如需频繁使用请进入官网: http://tripleying.com/jojo"
+            return f"⏳ 随机替身命令冷却中，还需等待 {minutes} 分 {seconds} 秒后才能再次使用，如需频繁使用请进入官网: http://tripleying.com/jojo{adaptive_hint}"
         else:
-            return f"⏳ 随机替身命令冷却中，还需等待 {seconds} 秒后才能再次使用，如需频繁使用请进入官网: http://tripleying.com/jojo"
+            return f"⏳ 随机替身命令冷却中，还需等待 {seconds} 秒后才能再次使用，如需频繁使用请进入官网: http://tripleying.com/jojo{adaptive_hint}"
@@ -0,0 +1,60 @@
+"""
+跨进程文件锁工具类
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，退化为只在进程内互斥
+    fcntl = None
+
+
+class FileLock:
+    """
+    跨进程互斥锁
+
+    用 fcntl.flock 锁定一个锁文件，多个进程（如共用同一数据目录的多个机器人实例）之间互斥；
+    flock 不区分同一进程内的线程，因此同时持有一把线程锁保证进程内互斥。
+    锁文件在第一次加锁时打开并一直保持打开，之后每次加锁不需要再打开文件。
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        初始化文件锁
+
+        Args:
+            path: 锁文件路径（不存在时自动创建）
+        """
+        self.path = Path(path)
+        self._thread_lock = threading.Lock()
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> "FileLock":
+        self._thread_lock.acquire()
+        try:
+            if fcntl is not None:
+                if self._fd is None:
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if fcntl is not None and self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+
+    def close(self) -> None:
+        """关闭锁文件"""
+        with self._thread_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
@@ -0,0 +1,100 @@
+"""
+专用I/O线程池，用于把阻塞的存储读写移出asyncio事件循环
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .metrics import MetricsRegistry
+
+
+class IOExecutor:
+    """有界的专用I/O执行器"""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_pending: int = 256,
+        metrics: Optional[MetricsRegistry] = None,
+        name: str = "stand_io",
+    ):
+        """
+        初始化I/O执行器
+
+        Args:
+            max_workers: 工作线程数
+            max_pending: 最多同时提交（排队+执行中）的任务数，超过时调用方等待
+            metrics: 指标注册表（可选）
+            name: 线程名前缀，同时用作指标名前缀
+        """
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending)
+        self.metrics = metrics or MetricsRegistry()
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=name
+        )
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._queued = 0  # 已提交但尚未开始执行的任务数
+        self._running = 0  # 正在执行的任务数
+
+        self.metrics.register_gauge(f"{name}.queue_depth", lambda: self._queued)
+        self.metrics.register_gauge(f"{name}.running", lambda: self._running)
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        在I/O线程池中执行阻塞函数
+
+        Args:
+            func: 阻塞函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            Any: 函数返回值
+        """
+        async with self._slots:
+            submitted_at = time.monotonic()
+            with self._lock:
+                self._queued += 1
+
+            call = functools.partial(
+                self._run_in_thread, submitted_at, func, args, kwargs
+            )
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, call)
+
+    def _run_in_thread(
+        self, submitted_at: float, func: Callable[..., Any], args: tuple, kwargs: dict
+    ) -> Any:
+        """在工作线程中执行任务并记录排队与执行耗时"""
+        started_at = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        self.metrics.observe(f"{self.name}.wait", (started_at - submitted_at) * 1000)
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+            self.metrics.observe(
+                f"{self.name}.exec", (time.monotonic() - started_at) * 1000
+            )
+            self.metrics.inc(f"{self.name}.completed")
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        关闭线程池
+
+        Args:
+            wait: 是否等待已提交的任务完成
+        """
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,106 @@
+"""
+线程安全的LRU缓存
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from .metrics import MetricsRegistry
+
+
+class LRUCache:
+    """容量有限的LRU缓存，超出容量时淘汰最久未使用的条目"""
+
+    # get() 未命中时的返回值，用于区分"未缓存"和"缓存了None"
+    MISSING = object()
+
+    def __init__(
+        self,
+        capacity: int,
+        metrics: Optional[MetricsRegistry] = None,
+        name: str = "lru_cache",
+    ):
+        """
+        初始化缓存
+
+        Args:
+            capacity: 最大条目数，小于等于0时禁用缓存
+            metrics: 指标注册表（可选）
+            name: 指标名前缀
+        """
+        self.capacity = capacity
+        self.name = name
+        self.metrics = metrics or MetricsRegistry()
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.metrics.register_gauge(f"{name}.size", lambda: len(self._data))
+
+    @property
+    def enabled(self) -> bool:
+        """缓存是否启用"""
+        return self.capacity > 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        读取缓存，命中时将条目移到最近使用的位置
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Any: 缓存的值，未命中时返回 LRUCache.MISSING
+        """
+        with self._lock:
+            value = self._data.get(key, self.MISSING)
+            if value is not self.MISSING:
+                self._data.move_to_end(key)
+        return value
+
+    def record_hit(self) -> None:
+        """记录一次命中"""
+        self.metrics.inc(f"{self.name}.hits")
+
+    def record_miss(self) -> None:
+        """记录一次未命中"""
+        self.metrics.inc(f"{self.name}.misses")
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        写入缓存，超出容量时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+        """
+        if not self.enabled:
+            return
+
+        evicted = 0
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            self.metrics.inc(f"{self.name}.evictions", evicted)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        删除缓存条目
+
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,113 @@
+"""
+运行指标收集工具类
+"""
+
+import threading
+from typing import Callable, Dict, List
+
+
+class MetricsRegistry:
+    """
+    简单的进程内指标注册表
+
+    支持三类指标：
+    - 计数器(counter)：只增不减的累计值
+    - 仪表(gauge)：当前值，可以直接设置或注册为回调函数
+    - 耗时(timing)：记录次数、总和与最大值，用于计算平均值
+    """
+
+    def __init__(self):
+        """初始化指标注册表"""
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, float] = {}
+        self._gauge_callbacks: Dict[str, Callable[[], float]] = {}
+        self._timings: Dict[str, List[float]] = {}  # {name: [count, total, max]}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        """
+        增加计数器
+
+        Args:
+            name: 指标名称
+            value: 增加的值
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """
+        设置仪表值
+
+        Args:
+            name: 指标名称
+            value: 当前值
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], float]) -> None:
+        """
+        注册回调式仪表，读取指标时才计算当前值
+
+        Args:
+            name: 指标名称
+            callback: 返回当前值的函数
+        """
+        with self._lock:
+            self._gauge_callbacks[name] = callback
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        记录一次耗时
+
+        Args:
+            name: 指标名称
+            value: 耗时（毫秒）
+        """
+        with self._lock:
+            timing = self._timings.setdefault(name, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += value
+            if value > timing[2]:
+                timing[2] = value
+
+    def get_counter(self, name: str) -> int:
+        """获取计数器当前值"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        获取所有指标的快照
+
+        Returns:
+            dict: {指标名称: 值}，耗时指标展开为 count/avg_ms/max_ms
+        """
+        with self._lock:
+            result: Dict[str, float] = dict(self._counters)
+            result.update(self._gauges)
+            callbacks = list(self._gauge_callbacks.items())
+            for name, (count, total, max_value) in self._timings.items():
+                result[f"{name}.count"] = count
+                result[f"{name}.avg_ms"] = round(total / count, 2) if count else 0
+                result[f"{name}.max_ms"] = round(max_value, 2)
+
+        for name, callback in callbacks:
+            try:
+                result[name] = callback()
+            except Exception:
+                result[name] = -1
+        return result
+
+    def format_text(self) -> str:
+        """
+        将指标快照格式化为文本
+
+        Returns:
+            str: 每行一个指标，按名称排序
+        """
+        snapshot = self.snapshot()
+        if not snapshot:
+            return "暂无指标数据"
+        return "\n".join(f"{name}: {snapshot[name]}" for name in sorted(snapshot))
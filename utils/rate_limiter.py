@@ -0,0 +1,217 @@
+"""
+指令限流工具类
+"""
+
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from astrbot.api import logger
+
+from .metrics import MetricsRegistry
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """令牌桶参数：每 period 秒最多 capacity 次"""
+
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        """每秒补充的令牌数"""
+        return self.capacity / self.period
+
+
+@dataclass(frozen=True)
+class CommandRateLimit:
+    """一条指令的限流规则"""
+
+    user: Optional[RateLimit] = None  # 每个用户的限制，None表示不限制
+    group: Optional[RateLimit] = None  # 每个群聊的限制，None表示不限制
+
+
+class RateLimiter:
+    """
+    令牌桶限流器
+
+    每条指令可以分别限制单个用户和单个群聊的使用频率，令牌桶以 (指令, 用户) 和 (指令, 群聊) 为键。
+    令牌在检查时按流逝的时间惰性补充，每次检查 O(1)；
+    令牌桶补满后与不存在等价，由补满队列从头部清理，内存只与近期使用过指令的用户数有关。
+    所有状态只在事件循环线程中访问，不需要加锁。
+    """
+
+    # 规则中匹配所有未单独配置的指令
+    DEFAULT_COMMAND = "*"
+
+    def __init__(
+        self,
+        rules: Dict[str, CommandRateLimit],
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        初始化限流器
+
+        Args:
+            rules: {指令名: 限流规则}，指令名为 "*" 的规则用于其余指令
+            metrics: 指标注册表（可选）
+        """
+        self.rules = rules
+        self.metrics = metrics or MetricsRegistry()
+        # {(指令, "user"/"group", ID): [令牌数, 更新时间, 补满时间]}
+        self._buckets: Dict[Tuple[str, str, str], List[float]] = {}
+        # 补满队列：(补满时间, 令牌桶键)，按使用先后排列。补满时间大致递增，
+        # 队首未补满时其后已补满的令牌桶要稍晚才被清理，不影响限流结果
+        self._full_queue: Deque[Tuple[float, Tuple[str, str, str]]] = deque()
+
+        self.metrics.register_gauge("rate_limit.buckets", lambda: len(self._buckets))
+
+    @classmethod
+    def parse_rules(cls, lines: Iterable[str]) -> Dict[str, CommandRateLimit]:
+        """
+        解析配置中的限流规则
+
+        每条规则的格式为 "指令 用户次数/秒数 [群聊次数/秒数]"，例如 "替身面板 3/60 20/60"；
+        次数/秒数 写为 0 表示不限制，指令名写为 * 表示其余所有指令。无效的规则会被忽略。
+
+        Args:
+            lines: 规则列表
+
+        Returns:
+            Dict[str, CommandRateLimit]: {指令名: 限流规则}
+        """
+        rules: Dict[str, CommandRateLimit] = {}
+        for line in lines:
+            parts = str(line).split()
+            if len(parts) not in (2, 3):
+                logger.warning(f"⚠️ 无效的限流规则: {line}")
+                continue
+            try:
+                limits = [cls._parse_limit(part) for part in parts[1:]]
+            except ValueError:
+                logger.warning(f"⚠️ 无效的限流规则: {line}")
+                continue
+            command = parts[0].lstrip("/")
+            rules[command] = CommandRateLimit(*limits)
+        return rules
+
+    @staticmethod
+    def _parse_limit(text: str) -> Optional[RateLimit]:
+        """解析 "次数/秒数"，"0" 表示不限制"""
+        if text == "0":
+            return None
+        capacity, period = text.split("/")
+        limit = RateLimit(int(capacity), float(period))
+        if limit.capacity <= 0 or limit.period <= 0:
+            return None
+        return limit
+
+    def check(
+        self, command: str, user_id: str, group_id: Optional[str] = None
+    ) -> Tuple[bool, int, bool]:
+        """
+        检查并消耗一次指令的使用次数
+
+        用户和群聊的令牌都充足时才同时各扣除一个令牌，任一不足时都不扣除。
+
+        Args:
+            command: 指令名称
+            user_id: 用户ID
+            group_id: 群聊ID（私聊时为None）
+
+        Returns:
+            Tuple[bool, int, bool]: (是否允许, 需要等待的秒数, 是否因群聊限制被拒绝)
+        """
+        rule = self.rules.get(command) or self.rules.get(self.DEFAULT_COMMAND)
+        if rule is None:
+            return True, 0, False
+
+        now = time.monotonic()
+        self._expire(now)
+
+        user_bucket = group_bucket = None
+        user_wait = group_wait = 0.0
+        if rule.user is not None:
+            user_bucket, user_wait = self._refill(
+                (command, "user", user_id), rule.user, now
+            )
+        if rule.group is not None and group_id:
+            group_bucket, group_wait = self._refill(
+                (command, "group", group_id), rule.group, now
+            )
+
+        if user_wait > 0 or group_wait > 0:
+            self.metrics.inc(f"rate_limit.rejected[{command}]")
+            # 向上取整，避免提示"等待 0 秒"
+            wait = math.ceil(max(user_wait, group_wait))
+            return False, wait, group_wait > user_wait
+
+        if user_bucket is not None:
+            self._consume((command, "user", user_id), user_bucket, rule.user)
+        if group_bucket is not None:
+            self._consume((command, "group", group_id), group_bucket, rule.group)
+        return True, 0, False
+
+    def _refill(
+        self, key: Tuple[str, str, str], limit: RateLimit, now: float
+    ) -> Tuple[List[float], float]:
+        """
+        按流逝的时间补充令牌
+
+        Returns:
+            Tuple[List[float], float]: (令牌桶, 令牌不足一个时需要等待的秒数)
+        """
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(limit.capacity), now, now]
+        else:
+            bucket[0] = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            return bucket, 0.0
+        return bucket, (1 - bucket[0]) / limit.rate
+
+    def _consume(
+        self, key: Tuple[str, str, str], bucket: List[float], limit: RateLimit
+    ) -> None:
+        """扣除一个令牌，并记录令牌桶的补满时间"""
+        bucket[0] -= 1
+        bucket[2] = bucket[1] + (limit.capacity - bucket[0]) / limit.rate
+        self._buckets[key] = bucket
+        self._full_queue.append((bucket[2], key))
+
+    def _expire(self, now: float) -> None:
+        """从队首清理已经补满的令牌桶"""
+        queue = self._full_queue
+        buckets = self._buckets
+        while queue and queue[0][0] <= now:
+            full_at, key = queue.popleft()
+            bucket = buckets.get(key)
+            # 之后又被使用过的令牌桶补满时间更晚，保留
+            if bucket is not None and bucket[2] == full_at:
+                del buckets[key]
+
+    @staticmethod
+    def format_wait_message(command: str, remaining_seconds: int, group: bool) -> str:
+        """
+        格式化限流提示消息
+
+        Args:
+            command: 指令名称
+            remaining_seconds: 需要等待的秒数
+            group: 是否因群聊限制被拒绝
+
+        Returns:
+            str: 格式化的提示消息
+        """
+        minutes = remaining_seconds // 60
+        seconds = remaining_seconds % 60
+        subject = "本群" if group else "你"
+
+        if minutes > 0:
+            return f"⏳ {subject}使用 /{command} 太频繁了，还需等待 {minutes} 分 {seconds} 秒后才能再次使用"
+        else:
+            return f"⏳ {subject}使用 /{command} 太频繁了，还需等待 {seconds} 秒后才能再次使用"
@@ -2,15 +2,34 @@
 服务容器类，用于管理插件中的所有依赖项
 """
 
-from typing import Any, Union
+import asyncio
+import datetime
+import time
+from typing import Any, Optional, Union
 from pathlib import Path
 import pytz
+from astrbot.api import logger
 
 from ..services.stand_data_service import StandDataService
 from ..services.api_service import StandAPIService
-from .cooldown_manager import CooldownManager
+from ..services.panel_cache import PanelImageCache
+from ..services.panel_renderer import LocalPanelRenderer
+from ..services.panel_service import PanelService
+from ..services.render_queue import RenderQueue
+from ..services.activity_service import ActivityTracker
+from ..services.today_stand_service import TodayStandService
+from ..services.gallery_service import GalleryService
+from ..services.batch_awaken_service import BatchAwakenService
+from .cooldown_manager import AdaptiveCooldownPolicy, CooldownManager
 from .config_manager import ConfigManager
 from .stand_name_generator import StandNameGenerator
+from .io_executor import IOExecutor
+from .metrics import MetricsRegistry
+from .lru_cache import LRUCache
+from .background_tasks import BackgroundTaskManager
+from .single_flight import CommandSingleFlight
+from .rate_limiter import RateLimiter
+from .shared_state import SharedStateBackend, SQLiteSharedState
 
 
 class ServiceContainer:
@@ -29,19 +48,171 @@ class ServiceContainer:
         self.timezone = pytz.timezone("Asia/Shanghai")
 
         # 从配置中获取参数
-        self.api_server = config_manager.get_api_server()
+        self.api_servers = config_manager.get_api_servers()
         self.group_white_list = config_manager.get_white_list()
         self.random_cooldown = config_manager.get_random_cooldown()
+        self.cooldown_snapshot_interval = (
+            config_manager.get_cooldown_snapshot_interval()
+        )
+        self.storage_engine = config_manager.get_storage_engine()
+        self.shared_state_backend = config_manager.get_shared_state_backend()
+        self.io_max_workers = config_manager.get_io_max_workers()
+        self.stand_cache_capacity = config_manager.get_stand_cache_capacity()
+        self.awaken_retention_days = config_manager.get_awaken_record_retention_days()
+        self.write_behind_enabled = config_manager.is_write_behind_enabled()
+        self.write_behind_interval = config_manager.get_write_behind_interval()
+        self.write_behind_max_pending = config_manager.get_write_behind_max_pending()
+        self.fsync_policy = config_manager.get_fsync_policy()
+        self.fsync_interval = config_manager.get_fsync_interval()
+        self.duplicate_command_window = config_manager.get_duplicate_command_window()
+        self.panel_backend = config_manager.get_panel_backend()
+        self.panel_font_path = config_manager.get_panel_font_path()
+        self.panel_cache_max_mb = config_manager.get_panel_cache_max_mb()
+        self.api_fetch_enabled = config_manager.is_api_fetch_enabled()
+        self.api_fetch_timeout = config_manager.get_api_fetch_timeout()
+        self.api_fetch_retries = config_manager.get_api_fetch_retries()
+        self.api_health_check_interval = config_manager.get_api_health_check_interval()
+        self.render_max_concurrency = config_manager.get_render_max_concurrency()
+        self.render_max_queue = config_manager.get_render_max_queue()
+        self.today_precompute_days = config_manager.get_today_precompute_days()
+        self.gallery_page_size = config_manager.get_gallery_page_size()
 
         # 初始化所有服务
         self._init_services()
 
     def _init_services(self):
         """初始化所有服务"""
-        self.data_service = StandDataService(self.timezone, self.data_dir_path)
-        self.api_service = StandAPIService(self.api_server)
-        self.cooldown_manager = CooldownManager(self.random_cooldown)
+        self.metrics = MetricsRegistry()
+        self.background_tasks = BackgroundTaskManager()
+        self.io_executor = IOExecutor(
+            max_workers=self.io_max_workers,
+            max_pending=self.io_max_workers * 64,
+            metrics=self.metrics,
+        )
+        self.stand_cache = LRUCache(
+            self.stand_cache_capacity, metrics=self.metrics, name="stand_cache"
+        )
+        # 多个实例共用数据目录时，冷却和每日觉醒次数通过共享状态在进程间共享
+        self.shared_state = self._create_shared_state()
+        self.data_service = StandDataService(
+            self.timezone,
+            self.data_dir_path,
+            self.storage_engine,
+            self.io_executor,
+            self.stand_cache,
+            self.awaken_retention_days,
+            self.write_behind_max_pending if self.write_behind_enabled else 0,
+            self.metrics,
+            self.fsync_policy,
+            self.shared_state,
+        )
+        self.api_service = StandAPIService(
+            self.api_servers,
+            timeout=self.api_fetch_timeout,
+            max_retries=self.api_fetch_retries,
+            metrics=self.metrics,
+        )
+        self.panel_cache = PanelImageCache(
+            Path(self.data_dir_path) / "panel_cache",
+            self.panel_cache_max_mb * 1024 * 1024,
+            metrics=self.metrics,
+        )
+        self.render_queue = RenderQueue(
+            self.render_max_concurrency, self.render_max_queue, metrics=self.metrics
+        )
+        self.panel_service = PanelService(
+            self.api_service,
+            self.panel_backend,
+            LocalPanelRenderer(self.panel_font_path),
+            self.metrics,
+            self.panel_cache,
+            self.api_fetch_enabled,
+            self.render_queue,
+            self.io_executor,
+        )
+        self.activity_tracker = ActivityTracker(
+            self.data_dir_path,
+            self.timezone,
+            fsync_policy=self.fsync_policy,
+            io_executor=self.io_executor,
+        )
+        self.today_stand_service = TodayStandService(
+            self.timezone,
+            self.panel_service,
+            self.activity_tracker,
+            self.metrics,
+            self.today_precompute_days,
+        )
+        self.gallery_service = GalleryService(
+            self.data_service,
+            self.activity_tracker,
+            self.panel_service,
+            self.metrics,
+            self.gallery_page_size,
+        )
+        self.rate_limiter = RateLimiter(
+            RateLimiter.parse_rules(self.config_manager.get_rate_limits()),
+            self.metrics,
+        )
+        adaptive_cooldown = None
+        if self.config_manager.is_adaptive_cooldown_enabled():
+            adaptive_cooldown = AdaptiveCooldownPolicy(
+                min_seconds=self.config_manager.get_adaptive_cooldown_min(),
+                max_seconds=self.config_manager.get_adaptive_cooldown_max(),
+                target_rate=max(
+                    1, self.config_manager.get_adaptive_cooldown_target_rate()
+                ),
+                group_target_rate=max(
+                    1, self.config_manager.get_adaptive_cooldown_group_target_rate()
+                ),
+                target_latency=max(
+                    0.1, self.config_manager.get_adaptive_cooldown_target_latency()
+                )
+                * 1000,
+            )
+        self.cooldown_manager = CooldownManager(
+            self.random_cooldown,
+            self.metrics,
+            # 共享状态本身持久保存冷却，不需要再写快照
+            (
+                Path(self.data_dir_path) / "cooldowns.bin"
+                if self.cooldown_snapshot_interval > 0 and self.shared_state is None
+                else None
+            ),
+            adaptive=adaptive_cooldown,
+            latency_provider=self.render_queue.recent_latency,
+            shared_state=self.shared_state,
+            io_executor=self.io_executor,
+        )
         self.stand_name_generator = StandNameGenerator(self.config_manager)
+        self.batch_awaken_service = BatchAwakenService(
+            self.data_service,
+            self.stand_name_generator,
+            self.panel_service,
+            self.data_dir_path,
+            self.timezone,
+            self.metrics,
+            fsync_policy=self.fsync_policy,
+            io_executor=self.io_executor,
+        )
+        self.single_flight = CommandSingleFlight(
+            self.duplicate_command_window, metrics=self.metrics
+        )
+
+    def _create_shared_state(self) -> Optional[SharedStateBackend]:
+        """根据配置创建跨进程共享状态后端，未启用时返回None"""
+        if self.shared_state_backend == "sqlite":
+            return SQLiteSharedState(Path(self.data_dir_path) / "shared_state.db")
+        if self.shared_state_backend != "none":
+            logger.warning(
+                f"⚠️ 未知的共享状态后端 {self.shared_state_backend}，不在进程间共享冷却和次数"
+            )
+        return None
+
+    async def _prune_shared_state(self) -> None:
+        """清理共享状态中已结束的冷却和往日的计数"""
+        today = datetime.datetime.now(self.timezone).strftime("%Y-%m-%d")
+        await self.io_executor.run(self.shared_state.prune, time.time(), today)
 
     def get_data_service(self) -> StandDataService:
         """获取数据服务"""
@@ -51,6 +222,26 @@ class ServiceContainer:
         """获取API服务"""
         return self.api_service
 
+    def get_panel_service(self) -> PanelService:
+        """获取面板服务"""
+        return self.panel_service
+
+    def get_activity_tracker(self) -> ActivityTracker:
+        """获取活跃用户记录"""
+        return self.activity_tracker
+
+    def get_today_stand_service(self) -> TodayStandService:
+        """获取今日替身服务"""
+        return self.today_stand_service
+
+    def get_gallery_service(self) -> GalleryService:
+        """获取替身图鉴服务"""
+        return self.gallery_service
+
+    def get_batch_awaken_service(self) -> BatchAwakenService:
+        """获取批量觉醒服务"""
+        return self.batch_awaken_service
+
     def get_cooldown_manager(self) -> CooldownManager:
         """获取冷却管理器"""
         return self.cooldown_manager
@@ -63,6 +254,18 @@ class ServiceContainer:
         """获取替身名生成器"""
         return self.stand_name_generator
 
+    def get_rate_limiter(self) -> RateLimiter:
+        """获取指令限流器"""
+        return self.rate_limiter
+
+    def get_single_flight(self) -> CommandSingleFlight:
+        """获取重复指令合并器"""
+        return self.single_flight
+
+    def get_metrics(self) -> MetricsRegistry:
+        """获取指标注册表"""
+        return self.metrics
+
     def get_group_white_list(self) -> list:
         """获取群组白名单"""
         return self.group_white_list
@@ -70,3 +273,110 @@ class ServiceContainer:
     def get_timezone(self) -> Any:
         """获取时区"""
         return self.timezone
+
+    def start_background_tasks(self):
+        """启动后台任务（需要在事件循环中调用）"""
+        # 切换到SQLite后导入旧的JSON数据（没有需要导入的数据时立即返回）
+        self.background_tasks.start_once(
+            "sqlite_import", self.data_service.run_sqlite_import
+        )
+        # 把旧版平铺目录迁移到分片目录（已迁移时立即返回）
+        self.background_tasks.start_once(
+            "layout_migration", self.data_service.run_layout_migration, delay=30
+        )
+        # 每天压缩一次觉醒记录，启动后稍作延迟避免与插件加载争抢磁盘
+        self.background_tasks.start_periodic(
+            "awaken_compaction",
+            self.data_service.run_awaken_compaction,
+            interval=24 * 3600,
+            initial_delay=300,
+        )
+        if self.write_behind_enabled:
+            self.background_tasks.start_periodic(
+                "write_behind_flush",
+                self.data_service.aflush_writes,
+                interval=max(1, self.write_behind_interval),
+                initial_delay=max(1, self.write_behind_interval),
+            )
+
+        # 定期保存活跃用户记录（没有变化时跳过）
+        self.background_tasks.start_periodic(
+            "activity_save",
+            self.activity_tracker.asave,
+            interval=300,
+            initial_delay=300,
+        )
+        # 定期保存冷却快照（没有变化时跳过），重启后冷却不会被清空
+        if self.cooldown_snapshot_interval > 0:
+            self.background_tasks.start_periodic(
+                "cooldown_snapshot",
+                self.cooldown_manager.asave_snapshot,
+                interval=self.cooldown_snapshot_interval,
+                initial_delay=self.cooldown_snapshot_interval,
+            )
+        if self.shared_state is not None:
+            self.background_tasks.start_periodic(
+                "shared_state_prune",
+                self._prune_shared_state,
+                interval=3600,
+                initial_delay=600,
+            )
+        # 定期清理过期未选择的十连觉醒候选
+        self.background_tasks.start_periodic(
+            "batch_awaken_prune",
+            self.batch_awaken_service.prune,
+            interval=3600,
+            initial_delay=600,
+        )
+        # 每天零点过后为最近活跃的用户预计算今日替身，稍作延迟避开零点的其他任务
+        if self.today_precompute_days > 0:
+            self.background_tasks.start_daily(
+                "today_precompute",
+                self.today_stand_service.precompute,
+                self.timezone,
+                offset=60,
+            )
+
+        # 多个面板API节点时定期健康检查，自动剔除和恢复节点。
+        # 直接发送图片地址时插件看不到平台下载的结果，节点统计只来自健康检查，因此不论是否开启拉取都要检查
+        if (
+            self.api_service.fetch_supported()
+            and len(self.api_servers) > 1
+            and self.api_health_check_interval > 0
+        ):
+            self.background_tasks.start_periodic(
+                "api_health_check",
+                self.api_service.probe_endpoints,
+                interval=self.api_health_check_interval,
+                initial_delay=self.api_health_check_interval,
+            )
+
+        if self.fsync_policy == "batched":
+            self.background_tasks.start_periodic(
+                "storage_fsync",
+                self.data_service.afsync_pending,
+                interval=max(1, self.fsync_interval),
+                initial_delay=max(1, self.fsync_interval),
+            )
+
+    async def start(self):
+        """创建需要在事件循环中初始化的资源（如HTTP连接池）"""
+        await self.api_service.start()
+
+    async def shutdown(self):
+        """停止后台任务并释放所有服务持有的资源"""
+        # 先通知在线程中运行的维护任务停止，取消协程并不会中断线程
+        self.data_service.stop_background_work()
+        await self.background_tasks.shutdown()
+        await self.api_service.close()
+        await self.io_executor.run(self.activity_tracker.save)
+        await self.io_executor.run(self.cooldown_manager.save_snapshot)
+        # 关闭线程池和存储都会等待线程结束，在单独的线程中执行，不阻塞事件循环
+        await asyncio.to_thread(self._close_resources)
+
+    def _close_resources(self) -> None:
+        """等待线程池中未完成的读写，再关闭存储（延迟写入的数据在关闭时全部落盘）"""
+        self.io_executor.shutdown(wait=True)
+        self.data_service.close()
+        if self.shared_state is not None:
+            self.shared_state.close()
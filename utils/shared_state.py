@@ -0,0 +1,239 @@
+"""
+跨进程共享状态
+
+多个机器人实例（如接入不同平台）共用同一个数据目录时，冷却和每日次数限制需要在所有进程间共享，
+否则用户换一个实例就能绕过限制。共享状态后端只提供两种原子操作：
+- 冷却：检查冷却是否结束，结束时记录新的冷却结束时间
+- 计数器：按周期（如日期）检查并增加计数，超过上限时不增加
+
+SQLiteSharedState 使用数据目录下的一个SQLite数据库，依赖SQLite自身的文件锁保证跨进程原子性，
+不需要额外的服务。以后需要跨机器共享时，可以用网络存储（如Redis）实现同样的接口。
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Tuple, Union
+
+from astrbot.api import logger
+
+
+class SharedStateError(Exception):
+    """共享状态后端不可用（调用方应退回到进程内的判断）"""
+
+
+class SharedStateBackend:
+    """共享状态后端接口"""
+
+    def acquire_cooldown(
+        self, key: str, now: float, cooldown: float
+    ) -> Tuple[bool, float]:
+        """
+        原子地检查冷却，冷却已结束时记录新的冷却结束时间
+
+        Args:
+            key: 冷却键，如 "随机替身:<用户ID>"
+            now: 当前时间（Unix时间戳）
+            cooldown: 本次使用后的冷却时间（秒）
+
+        Returns:
+            Tuple[bool, float]: (是否允许, 冷却结束时间)
+
+        Raises:
+            SharedStateError: 后端不可用
+        """
+        raise NotImplementedError
+
+    def consume_counter(
+        self, key: str, period: str, limit: int, amount: int = 1, initial: int = 0
+    ) -> Tuple[bool, int]:
+        """
+        原子地检查并增加计数器，增加后超过上限时不增加
+
+        Args:
+            key: 计数器键，如 "觉醒:<用户ID>"
+            period: 计数周期，如日期（YYYY-MM-DD），不同周期分别计数
+            limit: 上限，小于0为不限
+            amount: 本次增加的数量
+            initial: 该周期的计数器不存在时的初始值（如从旧数据中读取的今日次数）
+
+        Returns:
+            Tuple[bool, int]: (是否允许, 计数（允许时含本次）)
+
+        Raises:
+            SharedStateError: 后端不可用
+        """
+        raise NotImplementedError
+
+    def get_counter(self, key: str, period: str) -> int:
+        """
+        读取计数器
+
+        Raises:
+            SharedStateError: 后端不可用
+        """
+        raise NotImplementedError
+
+    def prune(self, now: float, period: str) -> int:
+        """
+        清理已结束的冷却和早于 period 的计数器（后台任务调用）
+
+        Returns:
+            int: 清理的条目数
+        """
+        return 0
+
+    def close(self) -> None:
+        """释放后端持有的资源"""
+
+
+class SQLiteSharedState(SharedStateBackend):
+    """基于本地SQLite数据库的共享状态（WAL模式，写操作使用 BEGIN IMMEDIATE 事务）"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cooldowns (
+        key TEXT PRIMARY KEY,
+        expires_at REAL NOT NULL
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS counters (
+        key TEXT NOT NULL,
+        period TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (key, period)
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: Union[str, Path], busy_timeout: float = 5.0):
+        """
+        初始化共享状态数据库
+
+        Args:
+            db_path: 数据库文件路径（所有实例使用同一个文件）
+            busy_timeout: 等待其他进程释放写锁的最长时间（秒）
+        """
+        self.db_path = Path(db_path)
+        self.busy_timeout = busy_timeout
+        # 每个线程使用独立连接
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._get_connection().executescript(self.SCHEMA)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"❌ 无法初始化共享状态数据库: {e}")
+            raise
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None 使用自动提交，事务显式控制
+            conn = sqlite3.connect(
+                str(self.db_path),
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            # 冷却和计数丢失最近一次提交的影响很小，不必每次提交都 fsync
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def acquire_cooldown(
+        self, key: str, now: float, cooldown: float
+    ) -> Tuple[bool, float]:
+        try:
+            conn = self._get_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT expires_at FROM cooldowns WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    allowed, expires_at = False, row[0]
+                else:
+                    allowed, expires_at = True, now + cooldown
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cooldowns (key, expires_at) VALUES (?, ?)",
+                        (key, expires_at),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            raise SharedStateError(str(e)) from e
+        return allowed, expires_at
+
+    def consume_counter(
+        self, key: str, period: str, limit: int, amount: int = 1, initial: int = 0
+    ) -> Tuple[bool, int]:
+        try:
+            conn = self._get_connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT count FROM counters WHERE key = ? AND period = ?",
+                    (key, period),
+                ).fetchone()
+                count = row[0] if row is not None else initial
+                if 0 <= limit < count + amount:
+                    allowed = False
+                else:
+                    allowed = True
+                    count += amount
+                    conn.execute(
+                        "INSERT OR REPLACE INTO counters (key, period, count) "
+                        "VALUES (?, ?, ?)",
+                        (key, period, count),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            raise SharedStateError(str(e)) from e
+        return allowed, count
+
+    def get_counter(self, key: str, period: str) -> int:
+        try:
+            row = (
+                self._get_connection()
+                .execute(
+                    "SELECT count FROM counters WHERE key = ? AND period = ?",
+                    (key, period),
+                )
+                .fetchone()
+            )
+        except sqlite3.Error as e:
+            raise SharedStateError(str(e)) from e
+        return row[0] if row is not None else 0
+
+    def prune(self, now: float, period: str) -> int:
+        try:
+            conn = self._get_connection()
+            removed = conn.execute(
+                "DELETE FROM cooldowns WHERE expires_at <= ?", (now,)
+            ).rowcount
+            removed += conn.execute(
+                "DELETE FROM counters WHERE period < ?", (period,)
+            ).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 清理共享状态失败: {e}")
+            return 0
+        return removed
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
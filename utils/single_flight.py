@@ -0,0 +1,137 @@
+"""
+重复指令与并发请求合并工具类
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from .metrics import MetricsRegistry
+
+
+class CommandSingleFlight:
+    """
+    重复指令拦截（single-flight）
+
+    同一用户发送的相同指令在上一次执行尚未结束时视为重复指令：重复指令直接丢弃，
+    不会重复执行，也不会得到正在执行的那一次的结果，调用方按配置回复一条简短提示或静默忽略。
+    上一次执行结束后再发送的相同指令会正常执行。
+    执行时间超过合并窗口的指令不再拦截重复指令，避免一次卡住的执行让用户长时间得不到回复。
+    所有状态只在事件循环线程中访问，不需要加锁。
+    """
+
+    def __init__(self, window: float = 2.0, metrics: Optional[MetricsRegistry] = None):
+        """
+        初始化重复指令合并器
+
+        Args:
+            window: 合并窗口（秒），执行中的指令在开始后该时间内拦截重复指令，小于等于0时禁用
+            metrics: 指标注册表（可选）
+        """
+        self.window = window
+        self.metrics = metrics or MetricsRegistry()
+        # {key: [最近一次开始执行的时间, 执行中的次数]}
+        self._in_flight: Dict[Hashable, list] = {}
+
+        self.metrics.register_gauge(
+            "single_flight.in_flight", lambda: len(self._in_flight)
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用"""
+        return self.window > 0
+
+    def try_acquire(self, command: str, key: Hashable) -> bool:
+        """
+        尝试开始执行一条指令
+
+        Args:
+            command: 指令名称（用于统计）
+            key: 指令的唯一标识，如 (指令名, 用户ID, 消息内容)
+
+        Returns:
+            bool: True 表示应当执行（之后必须调用 release），False 表示是重复指令应当跳过
+        """
+        if not self.enabled:
+            return True
+
+        now = time.monotonic()
+        entry = self._in_flight.get(key)
+        if entry is None:
+            self._in_flight[key] = [now, 1]
+            return True
+
+        if now - entry[0] < self.window:
+            self.metrics.inc("single_flight.suppressed")
+            self.metrics.inc(f"single_flight.suppressed.{command}")
+            return False
+
+        # 上一次执行已超过合并窗口仍未结束，允许再执行一次
+        entry[0] = now
+        entry[1] += 1
+        return True
+
+    def release(self, key: Hashable) -> None:
+        """
+        指令执行结束，之后相同的指令可以再次执行
+
+        Args:
+            key: 指令的唯一标识
+        """
+        entry = self._in_flight.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del self._in_flight[key]
+
+
+class AsyncSingleFlight:
+    """
+    并发相同请求合并（single-flight）
+
+    同一个键在执行期间的所有并发调用共享同一次执行的结果（或异常），
+    执行结束后立即移除，下一次调用会重新执行。
+    实际工作在独立的任务中运行，个别调用方被取消不会影响其他等待者。
+    """
+
+    def __init__(self, metrics: Optional[MetricsRegistry] = None, name: str = "flight"):
+        """
+        初始化请求合并器
+
+        Args:
+            metrics: 指标注册表（可选）
+            name: 指标名前缀
+        """
+        self.metrics = metrics or MetricsRegistry()
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+        self.metrics.register_gauge(f"{name}.in_flight", lambda: len(self._tasks))
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行或加入一次执行
+
+        Args:
+            key: 请求的唯一标识
+            func: 没有进行中的执行时调用，返回要执行的协程
+
+        Returns:
+            Any: 执行结果
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            self.metrics.inc(f"{self.name}.executions")
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.metrics.inc(f"{self.name}.shared")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """执行结束后移除记录"""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
@@ -0,0 +1,74 @@
+"""
+滑动窗口统计工具类
+"""
+
+import time
+from typing import Optional
+
+
+class SlidingWindow:
+    """
+    滑动窗口计数器
+
+    只保存当前和上一个固定窗口的次数与数值之和，按当前窗口已经过去的比例给上一个窗口加权，
+    近似得到最近一个窗口长度内的统计值。状态大小固定，每次记录和读取都是 O(1)。
+    """
+
+    __slots__ = ("window", "_start", "_count", "_sum", "_prev_count", "_prev_sum")
+
+    def __init__(self, window: float = 60.0):
+        """
+        初始化滑动窗口
+
+        Args:
+            window: 窗口长度（秒）
+        """
+        self.window = window
+        self._start = 0.0
+        self._count = 0
+        self._sum = 0.0
+        self._prev_count = 0
+        self._prev_sum = 0.0
+
+    def add(self, value: float = 1.0, now: Optional[float] = None) -> None:
+        """
+        记录一次事件
+
+        Args:
+            value: 事件的数值（如耗时），只计次数时可以省略
+            now: 当前时间（可选，默认取 time.monotonic()）
+        """
+        self._roll(time.monotonic() if now is None else now)
+        self._count += 1
+        self._sum += value
+
+    def count(self, now: Optional[float] = None) -> float:
+        """最近一个窗口长度内的事件次数（近似值）"""
+        weight = self._roll(time.monotonic() if now is None else now)
+        return self._count + self._prev_count * weight
+
+    def mean(self, now: Optional[float] = None) -> float:
+        """最近一个窗口长度内事件数值的平均值，没有事件时返回0"""
+        weight = self._roll(time.monotonic() if now is None else now)
+        count = self._count + self._prev_count * weight
+        if count <= 0:
+            return 0.0
+        return (self._sum + self._prev_sum * weight) / count
+
+    def is_idle(self, now: float) -> bool:
+        """最近两个窗口内都没有事件（可以丢弃该计数器）"""
+        return now - self._start >= 2 * self.window
+
+    def _roll(self, now: float) -> float:
+        """按需切换到新的固定窗口，返回上一个窗口的权重"""
+        elapsed = now - self._start
+        if elapsed >= self.window:
+            if elapsed >= 2 * self.window:
+                self._prev_count, self._prev_sum = 0, 0.0
+            else:
+                self._prev_count, self._prev_sum = self._count, self._sum
+            # 窗口起点对齐到窗口长度的整数倍
+            self._start = now - elapsed % self.window
+            self._count, self._sum = 0, 0.0
+            elapsed = now - self._start
+        return 1 - elapsed / self.window
@@ -0,0 +1,42 @@
+"""
+分段锁工具类
+"""
+
+import asyncio
+import zlib
+from typing import Any, Callable, List
+
+
+class StripedLock:
+    """
+    分段锁：固定数量的锁按键的哈希分配
+
+    同一个键总是映射到同一把锁，保证同一用户的操作串行执行；
+    不同用户大概率落在不同的锁上，可以并行执行。锁的数量固定，
+    不会随着用户数量增长而无限占用内存。
+    """
+
+    def __init__(
+        self, stripes: int = 64, lock_factory: Callable[[], Any] = asyncio.Lock
+    ):
+        """
+        初始化分段锁
+
+        Args:
+            stripes: 锁的数量
+            lock_factory: 创建单个锁的函数，如 asyncio.Lock 或 threading.Lock
+        """
+        self.stripes = max(1, stripes)
+        self._locks: List[Any] = [lock_factory() for _ in range(self.stripes)]
+
+    def for_key(self, key: str) -> Any:
+        """
+        获取键对应的锁
+
+        Args:
+            key: 键，如用户ID
+
+        Returns:
+            Any: 对应的锁对象
+        """
+        return self._locks[zlib.crc32(key.encode("utf-8")) % self.stripes]